@@ -1,16 +1,174 @@
-import io
-import pandas as pd
+import logging
+import struct
 import tempfile
-import os
+import time
+import uuid
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from botocore.exceptions import BotoCoreError, ClientError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Параметры записи Parquet по умолчанию: ZSTD дает файлы заметно меньше snappy
+# при небольшом росте времени записи, что выгодно при загрузке в S3
+DEFAULT_PARQUET_KWARGS = {
+    'engine': 'pyarrow',
+    'compression': 'zstd',
+    'compression_level': 3,
+    'use_dictionary': True,
+    'row_group_size': 500_000,
+}
+
+# Пресеты сжатия: fast - snappy для частой перезаписи (append), balanced - zstd
+# по умолчанию, max - zstd с высоким уровнем для редко переписываемых файлов
+CODEC_PRESETS = {
+    'fast': {'compression': 'snappy'},
+    'balanced': {'compression': 'zstd', 'compression_level': 3},
+    'max': {'compression': 'zstd', 'compression_level': 15},
+}
+
+# Порог, после которого буфер сериализации Parquet сбрасывается во временный файл
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# Размер хвоста файла, запрашиваемого для чтения футера Parquet одним запросом
+FOOTER_PROBE_SIZE = 64 * 1024
+
+# Коды ошибок S3, означающие отсутствие объекта
+_MISSING_OBJECT_CODES = {'NoSuchKey', '404', 'NotFound'}
+
+def _is_missing_object(error):
+    """
+    Проверка, что исключение означает отсутствие объекта в S3, а не сбой.
+
+    :param error: Исключение, полученное при чтении
+    :return: True, если объекта нет
+    """
+    if isinstance(error, FileNotFoundError):
+        return True
+    if isinstance(error, ClientError):
+        return error.response.get('Error', {}).get('Code') in _MISSING_OBJECT_CODES
+    return False
+
+def _merge_parquet_kwargs(base, overrides):
+    """
+    Наложение параметров to_parquet поверх базовых.
+
+    Уровень сжатия базовых параметров относится к их кодеку: если переопределение
+    меняет кодек, не задавая уровень, уровень отбрасывается - snappy и другие
+    кодеки без уровней его не принимают.
+
+    :param base: Базовые параметры
+    :param overrides: Параметры, имеющие приоритет (или None)
+    :return: Новый словарь параметров
+    """
+    kwargs = dict(base)
+    overrides = overrides or {}
+    if 'compression' in overrides and 'compression_level' not in overrides:
+        kwargs.pop('compression_level', None)
+    kwargs.update(overrides)
+    return kwargs
+
+def _integer_keys_superseded(existing_table, new_table, key_columns):
+    """
+    Векторная проверка вхождения составных целочисленных ключей через NumPy:
+    ключевые колонки упаковываются в непрерывный int64-массив, строки которого
+    сравниваются как байтовые записи, без hash join и сортировки номеров строк.
+
+    :param existing_table: Существующая таблица
+    :param new_table: Новая таблица
+    :param key_columns: Ключевые колонки
+    :return: Булева маска строк existing_table, ключи которых есть в new_table,
+             или None, если ключи не целочисленные или содержат пропуски
+    """
+    def pack(table):
+        columns = []
+        for key in key_columns:
+            column = table[key]
+            if not pa.types.is_integer(column.type) or column.null_count:
+                return None
+            columns.append(pc.cast(column, pa.int64()).to_numpy())
+        keys = np.ascontiguousarray(np.column_stack(columns))
+        return keys.view(np.dtype((np.void, keys.dtype.itemsize * len(key_columns)))).ravel()
+
+    try:
+        old_keys, new_keys = pack(existing_table), pack(new_table)
+    except pa.ArrowInvalid:
+        # uint64 за пределами int64
+        return None
+    if old_keys is None or new_keys is None:
+        return None
+    return np.isin(old_keys, new_keys)
 
 class ParquetUploader:
-    def __init__(self, s3_uploader):
+    def __init__(self, s3_uploader, parquet_defaults=None, codec='balanced',
+                 spool_max_size=SPOOL_MAX_SIZE):
         """
         Инициализация uploader'а для работы с Parquet файлами.
         
         :param s3_uploader: Экземпляр класса S3Uploader
+        :param parquet_defaults: Параметры to_parquet по умолчанию, переопределяющие
+            DEFAULT_PARQUET_KWARGS (опционально)
+        :param codec: Пресет сжатия из CODEC_PRESETS: 'fast', 'balanced' или 'max'
+        :param spool_max_size: Размер буфера сериализации, после которого он уходит
+            во временный файл; None - держать весь файл в памяти
         """
         self.s3_uploader = s3_uploader
+        self.codec = codec
+        self.spool_max_size = spool_max_size
+        # Сжатие, явно заданное в parquet_defaults, имеет приоритет над пресетами
+        self._compression_overridden = 'compression' in (parquet_defaults or {})
+        self.parquet_defaults = _merge_parquet_kwargs(
+            _merge_parquet_kwargs(DEFAULT_PARQUET_KWARGS, self._codec_kwargs(codec)), parquet_defaults
+        )
+
+    @staticmethod
+    def _codec_kwargs(codec, parquet_kwargs=None):
+        """
+        Параметры сжатия пресета, дополненные параметрами вызова.
+
+        :param codec: Название пресета из CODEC_PRESETS
+        :param parquet_kwargs: Параметры to_parquet, имеющие приоритет над пресетом (опционально)
+        :return: Словарь параметров для to_parquet
+        """
+        if codec not in CODEC_PRESETS:
+            raise ValueError(f"Неизвестный пресет сжатия: {codec}. Доступны: {list(CODEC_PRESETS)}")
+        return _merge_parquet_kwargs(CODEC_PRESETS[codec], parquet_kwargs)
+
+    def _preset_parquet_kwargs(self, codec, parquet_kwargs=None):
+        """
+        Параметры вызова с пресетом сжатия.
+
+        Пресет применяется, только если сжатие не задано ни в parquet_defaults, ни
+        в параметрах вызова: явно выбранный пользователем кодек не подменяется.
+
+        :param codec: Название пресета из CODEC_PRESETS
+        :param parquet_kwargs: Параметры to_parquet для конкретного вызова (опционально)
+        :return: Параметры вызова, дополненные пресетом
+        """
+        if self._compression_overridden or 'compression' in (parquet_kwargs or {}):
+            return parquet_kwargs
+        return self._codec_kwargs(codec, parquet_kwargs)
+
+    def _build_parquet_kwargs(self, parquet_kwargs=None):
+        """
+        Объединение параметров по умолчанию с параметрами конкретного вызова.
+
+        :param parquet_kwargs: Параметры to_parquet для конкретного вызова (опционально)
+        :return: Итоговый словарь параметров для to_parquet
+        """
+        return _merge_parquet_kwargs(self.parquet_defaults, parquet_kwargs)
+
+    def _serialization_buffer(self):
+        """
+        Буфер для сериализации Parquet перед загрузкой через upload_fileobj.
+
+        :return: SpooledTemporaryFile; при spool_max_size=None он не сбрасывается на диск
+        """
+        # max_size=0 отключает сброс во временный файл
+        return tempfile.SpooledTemporaryFile(max_size=self.spool_max_size or 0, mode='w+b')
 
     def upload_dataframe(self, df, s3_key, bucket_name=None, skip_if_exists=False, 
                         parquet_kwargs=None):
@@ -23,28 +181,45 @@ class ParquetUploader:
         :param skip_if_exists: Если True, не загружать файл, если он уже существует и не изменился
         :param parquet_kwargs: Дополнительные параметры для to_parquet (опционально)
         """
-        try:
-            buffer = io.BytesIO()
-            parquet_kwargs = parquet_kwargs or {}
+        parquet_kwargs = self._build_parquet_kwargs(parquet_kwargs)
+        # Небольшие файлы остаются в памяти, крупные уходят на диск
+        # вместо многократного перевыделения растущего BytesIO
+        with self._serialization_buffer() as buffer:
             df.to_parquet(buffer, index=False, **parquet_kwargs)
             buffer.seek(0)
-            
-            # Используем существующий метод загрузки файла из S3Uploader
-            with tempfile.NamedTemporaryFile(suffix='.parquet', delete=False) as tmp_file:
-                tmp_file.write(buffer.getvalue())
-                tmp_file_path = tmp_file.name
-            
-            self.s3_uploader.upload_file(
-                local_file_path=tmp_file_path,
+
+            # Загружаем буфер напрямую, без промежуточного временного файла
+            self.s3_uploader.upload_fileobj(
+                fileobj=buffer,
+                s3_key=s3_key,
+                bucket_name=bucket_name,
+                skip_if_exists=skip_if_exists
+            )
+
+    def upload_table(self, table, s3_key, bucket_name=None, skip_if_exists=False,
+                     parquet_kwargs=None):
+        """
+        Загрузка pyarrow.Table в S3 в формате Parquet без конвертации в pandas.
+
+        :param table: pyarrow.Table для загрузки
+        :param s3_key: Ключ объекта в S3 (путь внутри бакета)
+        :param bucket_name: Название S3 бакета (опционально, если установлен default_bucket)
+        :param skip_if_exists: Если True, не загружать файл, если он уже существует и не изменился
+        :param parquet_kwargs: Дополнительные параметры для pq.write_table (опционально)
+        """
+        parquet_kwargs = self._build_parquet_kwargs(parquet_kwargs)
+        # engine относится только к pandas.to_parquet
+        parquet_kwargs.pop('engine', None)
+        with self._serialization_buffer() as buffer:
+            pq.write_table(table, buffer, **parquet_kwargs)
+            buffer.seek(0)
+
+            self.s3_uploader.upload_fileobj(
+                fileobj=buffer,
                 s3_key=s3_key,
                 bucket_name=bucket_name,
                 skip_if_exists=skip_if_exists
             )
-            
-            os.unlink(tmp_file_path)
-            
-        except Exception as e:
-            print(f"Ошибка загрузки DataFrame: {e}")
 
     def upload_tuples(self, data, s3_key, columns=None, bucket_name=None, 
                      skip_if_exists=False, parquet_kwargs=None):
@@ -58,35 +233,144 @@ class ParquetUploader:
         :param skip_if_exists: Если True, не загружать файл, если он уже существует и не изменился
         :param parquet_kwargs: Дополнительные параметры для to_parquet (опционально)
         """
-        try:
-            df = pd.DataFrame(data, columns=columns)
-            self.upload_dataframe(df, s3_key, bucket_name, skip_if_exists, parquet_kwargs)
-            
-        except Exception as e:
-            print(f"Ошибка загрузки данных кортежей: {e}")
+        df = pd.DataFrame(data, columns=columns)
+        self.upload_dataframe(df, s3_key, bucket_name, skip_if_exists, parquet_kwargs)
 
-    def download_dataframe(self, s3_key, bucket_name=None):
+    def download_dataframe(self, s3_key, bucket_name=None, columns=None, filters=None,
+                           as_arrow=False):
         """
         Скачивание Parquet файла из S3 в pandas DataFrame.
 
+        Ключ, оканчивающийся на '/', считается каталогом набора данных: читаются
+        и объединяются все его части part-*.parquet.
+
         :param s3_key: Ключ объекта в S3
         :param bucket_name: Название S3 бакета (опционально, если установлен default_bucket)
-        :return: pandas DataFrame или None в случае ошибки
+        :param columns: Список колонок для чтения (опционально, по умолчанию все)
+        :param filters: Фильтры pyarrow для отбора строк по статистикам row group (опционально)
+        :param as_arrow: Если True, вернуть pyarrow.Table без конвертации в pandas
+        :return: pandas DataFrame (или pyarrow.Table)
+        :raises FileNotFoundError: Если в каталоге набора данных нет частей
+        """
+        bucket = self.s3_uploader._resolve_bucket(bucket_name)
+        if self._is_dataset(s3_key):
+            table = self._read_parts_table(bucket, s3_key, self._list_parts(s3_key, bucket),
+                                           columns, filters)
+        else:
+            table = self._read_object_table(bucket, s3_key, columns, filters)
+        if as_arrow:
+            return table
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    def _read_parts_table(self, bucket, prefix, part_keys, columns=None, filters=None):
+        """
+        Чтение и объединение частей набора данных.
+
+        :param bucket: Название S3 бакета
+        :param prefix: Каталог набора данных
+        :param part_keys: Ключи частей из _list_parts
+        :param columns: Список колонок для чтения (опционально)
+        :param filters: Фильтры pyarrow (опционально)
+        :return: pyarrow.Table
+        :raises FileNotFoundError: Если частей нет
+        """
+        if not part_keys:
+            raise FileNotFoundError(f"В каталоге {prefix} нет частей набора данных")
+        return pa.concat_tables(
+            [self._read_object_table(bucket, key, columns, filters) for key in part_keys],
+            promote_options='permissive'
+        )
+
+    def _download_existing_table(self, s3_key, bucket_name=None, part_keys=None):
+        """
+        Скачивание существующей таблицы для upsert/append.
+
+        Отсутствие объекта не является ошибкой, прочие сбои пробрасываются, чтобы
+        не перезаписать существующие данные из-за временной ошибки чтения.
+
+        :param s3_key: Ключ объекта или каталога в S3
+        :param bucket_name: Название S3 бакета (опционально)
+        :param part_keys: Уже полученный список частей каталога (опционально, иначе
+            каталог листингуется заново)
+        :return: pyarrow.Table или None, если объекта нет
         """
         try:
-            # Скачивание через существующий клиент в память
-            buffer = io.BytesIO()
-            bucket = self.s3_uploader._resolve_bucket(bucket_name)
-            self.s3_uploader.s3_client.download_fileobj(bucket, s3_key, buffer)
-            buffer.seek(0)
-            
-            # Чтение Parquet в DataFrame
-            df = pd.read_parquet(buffer)
-            return df
-        except Exception as e:
-            print(f"Ошибка скачивания DataFrame: {e}")
+            if part_keys is not None:
+                bucket = self.s3_uploader._resolve_bucket(bucket_name)
+                return self._read_parts_table(bucket, s3_key, part_keys)
+            return self.download_dataframe(s3_key, bucket_name, as_arrow=True)
+        except (ClientError, FileNotFoundError) as e:
+            if not _is_missing_object(e):
+                raise
+            _LOGGER.info("Файл %s не существует, создаем новый", s3_key)
             return None
 
+    def _read_object_table(self, bucket, s3_key, columns=None, filters=None):
+        """
+        Чтение одного Parquet объекта из S3 в pyarrow.Table.
+
+        :param bucket: Название S3 бакета
+        :param s3_key: Ключ объекта в S3
+        :param columns: Список колонок для чтения (опционально)
+        :param filters: Фильтры pyarrow (опционально)
+        :return: pyarrow.Table
+        """
+        response = self.s3_uploader.s3_client.get_object(Bucket=bucket, Key=s3_key)
+        # Тело ответа читается одним куском известного размера и передается
+        # в pyarrow без копирования, вместо постепенно растущего BytesIO
+        data = response['Body'].read()
+
+        # Чтение только нужных колонок и row group'ов
+        return pq.read_table(pa.BufferReader(data), columns=columns, filters=filters)
+
+    @staticmethod
+    def _is_dataset(s3_key):
+        """
+        Проверка, что ключ указывает на каталог набора данных из нескольких частей.
+
+        :param s3_key: Ключ объекта в S3
+        :return: True, если ключ оканчивается на '/'
+        """
+        return s3_key.endswith('/')
+
+    @staticmethod
+    def _new_part_key(prefix):
+        """
+        Генерация ключа новой части набора данных.
+
+        Метка времени в начале имени сохраняет порядок частей при листинге.
+
+        :param prefix: Каталог набора данных (оканчивается на '/')
+        :return: Ключ вида <prefix>part-<ts>-<uuid>.parquet
+        """
+        return f"{prefix}part-{time.time_ns():020d}-{uuid.uuid4().hex}.parquet"
+
+    def _target_key(self, s3_key):
+        """
+        Ключ для записи: для каталога набора данных - новая часть, иначе сам ключ.
+
+        :param s3_key: Ключ объекта или каталога в S3
+        :return: Ключ объекта для загрузки
+        """
+        return self._new_part_key(s3_key) if self._is_dataset(s3_key) else s3_key
+
+    def _list_parts(self, prefix, bucket):
+        """
+        Получение отсортированного списка частей набора данных.
+
+        :param prefix: Каталог набора данных
+        :param bucket: Название S3 бакета
+        :return: Список ключей part-*.parquet
+        """
+        paginator = self.s3_uploader.s3_client.get_paginator('list_objects_v2')
+        part_keys = []
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                name = obj['Key'][len(prefix):]
+                if '/' not in name and name.startswith('part-') and name.endswith('.parquet'):
+                    part_keys.append(obj['Key'])
+        return sorted(part_keys)
+
     def dataframe_to_s3_url(self, df, s3_key, bucket_name=None, skip_if_exists=False):
         """
         Сохранение DataFrame и возврат URL файла в S3.
@@ -106,116 +390,195 @@ class ParquetUploader:
         """
         Upsert (update + insert) DataFrame в существующую Parquet таблицу в S3.
 
+        Для каталога набора данных (ключ оканчивается на '/') результат записывается
+        одной новой частью, после чего старые части удаляются. Части листингуются
+        один раз: проверка пересечения ключей, чтение и удаление работают с одним
+        и тем же списком.
+
         :param new_df: Новый DataFrame для upsert
         :param s3_key: Ключ объекта в S3
         :param key_columns: Список колонок, используемых как ключи для upsert
         :param bucket_name: Название S3 бакета (опционально)
         :param parquet_kwargs: Дополнительные параметры для to_parquet (опционально)
-        :return: Объединенный DataFrame
+        :return: Объединенный DataFrame. Для каталога набора данных, как и в
+            append_dataframe, - строки записанной части: если ключи не пересекаются
+            с существующими, это только new_df (старые части не читаются), иначе
+            весь набор после upsert
         """
-        try:
-            # Проверяем, существует ли файл в S3
-            bucket = self.s3_uploader._resolve_bucket(bucket_name)
-            existing_df = None
-            
-            try:
-                existing_df = self.download_dataframe(s3_key, bucket_name)
-            except Exception:
-                # Файл не существует, создаем новый
-                print(f"Файл {s3_key} не существует, создаем новый")
-                self.upload_dataframe(new_df, s3_key, bucket_name, parquet_kwargs=parquet_kwargs)
-                return new_df
-            
-            if existing_df is not None:
-                # Выполняем upsert: объединяем существующие и новые данные
-                # Удаляем дубликаты по ключевым колонкам, оставляя новые записи
-                combined_df = self._perform_upsert(existing_df, new_df, key_columns)
-                
-                self.upload_dataframe(combined_df, s3_key, bucket_name, parquet_kwargs=parquet_kwargs)
-                return combined_df
-            else:
-                # Если существующий файл не удалось прочитать, загружаем новый
-                self.upload_dataframe(new_df, s3_key, bucket_name, parquet_kwargs=parquet_kwargs)
-                return new_df
-                
-        except Exception as e:
-            print(f"Ошибка при upsert операции: {e}")
-            return None
+        bucket = self.s3_uploader._resolve_bucket(bucket_name)
+        part_keys = self._list_parts(s3_key, bucket) if self._is_dataset(s3_key) else None
+        # Обе ветки пишут файл с одними параметрами, независимо от пересечения ключей
+        parquet_kwargs = self._preset_parquet_kwargs(self.codec, parquet_kwargs)
+
+        # Диапазоны ключей не пересекаются: обновлять нечего, достаточно дописать новую
+        # часть. Проверяется только для каталога - для одного объекта append все равно
+        # скачивает и переписывает файл целиком, и чтение футеров лишь добавило бы запросы
+        if part_keys is not None and self._keys_disjoint(new_df, bucket, key_columns, part_keys):
+            return self.append_dataframe(new_df, s3_key, bucket_name,
+                                         parquet_kwargs=parquet_kwargs, codec=self.codec)
 
-    def _perform_upsert(self, existing_df, new_df, key_columns):
+        existing_table = self._download_existing_table(s3_key, bucket_name, part_keys)
+        if existing_table is None:
+            self.upload_dataframe(new_df, self._target_key(s3_key), bucket_name,
+                                  parquet_kwargs=parquet_kwargs)
+            return new_df
+
+        # Выполняем upsert на Arrow-таблицах: удаляем существующие строки
+        # с ключами из новых данных и дописываем новые записи
+        new_table = pa.Table.from_pandas(new_df, preserve_index=False)
+        combined_table = self._perform_upsert_table(existing_table, new_table, key_columns)
+
+        self.upload_table(combined_table, self._target_key(s3_key), bucket_name,
+                          parquet_kwargs=parquet_kwargs)
+        # Старые части удаляются только после записи новой, пакетами delete_objects
+        if part_keys:
+            self.s3_uploader.delete_files(part_keys, bucket_name)
+        return combined_table.to_pandas(split_blocks=True)
+
+    def _read_metadata(self, s3_key, bucket):
         """
-        Выполнение upsert операции на уровне DataFrame.
+        Чтение метаданных Parquet файла по хвосту объекта, без скачивания данных.
+
+        :param s3_key: Ключ объекта в S3
+        :param bucket: Название S3 бакета
+        :return: pyarrow.parquet.FileMetaData
+        """
+        s3_client = self.s3_uploader.s3_client
+        tail = s3_client.get_object(
+            Bucket=bucket, Key=s3_key, Range=f'bytes=-{FOOTER_PROBE_SIZE}'
+        )['Body'].read()
+        # Последние 8 байт: длина футера и магическая строка PAR1
+        footer_size = struct.unpack('<I', tail[-8:-4])[0] + 8
+        if footer_size > len(tail):
+            tail = s3_client.get_object(
+                Bucket=bucket, Key=s3_key, Range=f'bytes=-{footer_size}'
+            )['Body'].read()
+        return pq.read_metadata(pa.BufferReader(tail))
+
+    def _keys_disjoint(self, new_df, bucket, key_columns, part_keys):
+        """
+        Проверка по статистикам row group'ов, что ключи новых данных не пересекаются
+        с ключами частей набора данных.
+
+        Достаточно, чтобы диапазон [min, max] хотя бы одной ключевой колонки не
+        пересекался с диапазоном в частях. При отсутствии статистик, ошибке чтения
+        футера или несравнимых типах ключей возвращается False, и upsert выполняется
+        полным путем.
 
-        :param existing_df: Существующий DataFrame
         :param new_df: Новый DataFrame
+        :param bucket: Название S3 бакета
         :param key_columns: Ключевые колонки для upsert
-        :return: Объединенный DataFrame
+        :param part_keys: Ключи частей каталога из _list_parts
+        :return: True, если пересечений заведомо нет
         """
+        if new_df.empty:
+            return False
         try:
-            missing_keys = set(key_columns) - set(existing_df.columns) - set(new_df.columns)
-            if missing_keys:
-                raise ValueError(f"Отсутствуют ключевые колонки: {missing_keys}")
-            
-            # Удаляем дубликаты из существующего DataFrame по ключевым колонкам,
-            # которые присутствуют в новом DataFrame
-            if not new_df.empty:
-                # Создаем индекс по ключевым колонкам для нового DataFrame
-                new_index = new_df.set_index(key_columns)
-                
-                # Удаляем строки из существующего DataFrame, если они есть в новом
-                existing_without_duplicates = existing_df.merge(
-                    new_index.reset_index()[key_columns], 
-                    on=key_columns, 
-                    how='left', 
-                    indicator=True
-                )
-                existing_without_duplicates = existing_without_duplicates[
-                    existing_without_duplicates['_merge'] == 'left_only'
-                ].drop('_merge', axis=1)
-                
-                # Объединяем оставшиеся существующие записи с новыми
-                combined_df = pd.concat([existing_without_duplicates, new_df], ignore_index=True)
+            metadatas = [self._read_metadata(key, bucket) for key in part_keys]
+            if sum(metadata.num_rows for metadata in metadatas) == 0:
+                return False
+            for key in key_columns:
+                if new_df[key].isna().any():
+                    continue
+                bounds = []
+                for metadata in metadatas:
+                    names = metadata.schema.names
+                    if key not in names:
+                        bounds = None
+                        break
+                    index = names.index(key)
+                    for i in range(metadata.num_row_groups):
+                        stats = metadata.row_group(i).column(index).statistics
+                        if stats is None or not stats.has_min_max or stats.null_count:
+                            bounds = None
+                            break
+                        bounds.append((stats.min, stats.max))
+                    if bounds is None:
+                        break
+                if not bounds:
+                    continue
+                existing_min = min(b[0] for b in bounds)
+                existing_max = max(b[1] for b in bounds)
+                if new_df[key].max() < existing_min or new_df[key].min() > existing_max:
+                    return True
+        except (ClientError, BotoCoreError, pa.ArrowException, struct.error, TypeError) as e:
+            _LOGGER.debug("Не удалось сравнить диапазоны ключей по футерам: %s", e)
+            return False
+        return False
+
+    def _perform_upsert_table(self, existing_table, new_table, key_columns):
+        """
+        Выполнение upsert операции на уровне pyarrow.Table.
+
+        :param existing_table: Существующая таблица
+        :param new_table: Новая таблица
+        :param key_columns: Ключевые колонки для upsert
+        :return: Объединенная таблица
+        """
+        missing_keys = set(key_columns) - (set(existing_table.column_names) & set(new_table.column_names))
+        if missing_keys:
+            raise ValueError(f"Отсутствуют ключевые колонки: {missing_keys}")
+
+        if new_table.num_rows == 0:
+            return existing_table
+
+        if len(key_columns) == 1:
+            # Одна ключевая колонка: векторизованная проверка вхождения
+            key = key_columns[0]
+            mask = pc.is_in(existing_table[key], value_set=new_table[key].combine_chunks())
+            kept_table = existing_table.filter(pc.invert(mask))
+        else:
+            superseded = _integer_keys_superseded(existing_table, new_table, key_columns)
+            if superseded is not None:
+                # Составной целочисленный ключ: проверка вхождения упакованных строк ключей
+                kept_table = existing_table.filter(pa.array(~superseded))
             else:
-                combined_df = existing_df.copy()
-            
-            return combined_df
-            
-        except Exception as e:
-            print(f"Ошибка при выполнении upsert: {e}")
-            # В случае ошибки возвращаем объединение всех данных
-            return pd.concat([existing_df, new_df], ignore_index=True)
+                # Составной ключ: anti-join с номером строки, чтобы сохранить исходный порядок
+                row_column = '__row_number'
+                existing_keys = existing_table.select(key_columns).append_column(
+                    row_column, pa.array(np.arange(existing_table.num_rows))
+                )
+                kept_rows = existing_keys.join(
+                    new_table.select(key_columns), keys=key_columns, join_type='left anti'
+                )[row_column]
+                kept_table = existing_table.take(pc.take(kept_rows, pc.sort_indices(kept_rows)))
 
-    def append_dataframe(self, new_df, s3_key, bucket_name=None, parquet_kwargs=None):
+        # permissive допускает расширение типов (например, int64 и double)
+        return pa.concat_tables([kept_table, new_table], promote_options='permissive')
+
+    def append_dataframe(self, new_df, s3_key, bucket_name=None, parquet_kwargs=None,
+                         codec='fast'):
         """
         Добавление DataFrame к существующей Parquet таблице в S3.
 
+        Файл переписывается целиком при каждом добавлении, поэтому по умолчанию
+        используется быстрый пресет сжатия, если сжатие не задано в parquet_defaults
+        или parquet_kwargs. Если ключ оканчивается на '/', существующие
+        части не читаются и не переписываются: новые строки загружаются отдельной
+        частью part-<ts>-<uuid>.parquet.
+
         :param new_df: Новый DataFrame для добавления
         :param s3_key: Ключ объекта в S3
         :param bucket_name: Название S3 бакета (опционально)
         :param parquet_kwargs: Дополнительные параметры для to_parquet (опционально)
-        :return: Объединенный DataFrame
+        :param codec: Пресет сжатия из CODEC_PRESETS (по умолчанию 'fast')
+        :return: Объединенный DataFrame; для каталога набора данных - только добавленные строки
         """
-        try:
-            existing_df = None
-            
-            try:
-                existing_df = self.download_dataframe(s3_key, bucket_name)
-            except Exception:
-                # Файл не существует, создаем новый
-                print(f"Файл {s3_key} не существует, создаем новый")
-                self.upload_dataframe(new_df, s3_key, bucket_name, parquet_kwargs=parquet_kwargs)
-                return new_df
-            
-            if existing_df is not None:
-                combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-                
-                self.upload_dataframe(combined_df, s3_key, bucket_name, parquet_kwargs=parquet_kwargs)
-                return combined_df
-            else:
-                # Если существующий файл не удалось прочитать, загружаем новый
-                self.upload_dataframe(new_df, s3_key, bucket_name, parquet_kwargs=parquet_kwargs)
-                return new_df
-                
-        except Exception as e:
-            print(f"Ошибка при добавлении данных: {e}")
-            return None
\ No newline at end of file
+        parquet_kwargs = self._preset_parquet_kwargs(codec, parquet_kwargs)
+        if self._is_dataset(s3_key):
+            self.upload_dataframe(new_df, self._new_part_key(s3_key), bucket_name,
+                                  parquet_kwargs=parquet_kwargs)
+            return new_df
+
+        existing_table = self._download_existing_table(s3_key, bucket_name)
+        if existing_table is None:
+            self.upload_dataframe(new_df, s3_key, bucket_name, parquet_kwargs=parquet_kwargs)
+            return new_df
+
+        # Конкатенация Arrow-таблиц только дописывает список чанков
+        combined_table = pa.concat_tables([
+            existing_table, pa.Table.from_pandas(new_df, preserve_index=False)
+        ], promote_options='permissive')
+
+        self.upload_table(combined_table, s3_key, bucket_name, parquet_kwargs=parquet_kwargs)
+        return combined_table.to_pandas(split_blocks=True)
\ No newline at end of file
@@ -1,13 +1,215 @@
 import psycopg2
 from psycopg2 import sql
 from psycopg2.extras import execute_batch
+from psycopg2.pool import ThreadedConnectionPool
 import asyncpg
 from asyncpg import Connection
 import pandas as pd
 from typing import List, Optional
+import asyncio
 import logging
+import threading
+import tempfile
 import time
-from itertools import islice
+import weakref
+from functools import lru_cache
+from itertools import chain
+
+def _configure_logger() -> logging.Logger:
+    """
+    Настроить логгер модуля один раз при импорте.
+
+    :return: Логгер модуля с обработчиком вывода в stderr
+    """
+    logger = logging.getLogger(__name__)
+    if not logger.handlers:
+        logger.setLevel(logging.INFO)
+
+        formatter = logging.Formatter(
+            '[%(name)s] [%(asctime)s] [%(levelname)s] => %(message)s',
+            '%Y-%m-%d %H:%M:%S'
+        )
+
+        handler = logging.StreamHandler()
+        handler.setFormatter(formatter)
+
+        logger.addHandler(handler)
+
+    logger.propagate = False
+    return logger
+
+_LOGGER = _configure_logger()
+
+# Порог, после которого CSV-буфер для COPY сбрасывается во временный файл
+_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# Имя временной таблицы для upsert через COPY (удаляется при COMMIT внешней
+# транзакции, поэтому перед созданием удаляется оставшаяся от предыдущего upsert)
+_STAGING_TABLE = '_data_utils_staging'
+
+def _split_table_name(table: str):
+    """
+    Разделить имя таблицы вида schema.table на схему и имя.
+
+    :param table: Имя таблицы, возможно с указанием схемы
+    :return: Кортеж (schema или None, table)
+    """
+    schema, _, name = table.rpartition('.')
+    return schema or None, name
+
+# Общие пулы соединений, по одному на конфигурацию подключения
+_SYNC_POOLS = {}
+_SYNC_POOLS_LOCK = threading.Lock()
+# Пулы asyncpg привязаны к event loop, поэтому хранятся отдельно для каждого loop
+_ASYNC_POOLS = weakref.WeakKeyDictionary()
+
+def _pool_key(config: dict, pool_size: int) -> tuple:
+    """Ключ пула: конфигурация подключения и максимальный размер пула"""
+    return tuple(sorted(config.items())), pool_size
+
+def _get_sync_pool(config: dict, pool_size: int) -> ThreadedConnectionPool:
+    """
+    Получить общий пул psycopg2 для конфигурации, создав его при первом обращении.
+
+    :param config: Параметры подключения
+    :param pool_size: Максимальное число соединений в пуле
+    :return: ThreadedConnectionPool
+    """
+    key = _pool_key(config, pool_size)
+    with _SYNC_POOLS_LOCK:
+        pool = _SYNC_POOLS.get(key)
+        if pool is None or pool.closed:
+            pool = ThreadedConnectionPool(1, pool_size, **config)
+            _SYNC_POOLS[key] = pool
+        return pool
+
+async def _get_async_pool(config: dict, pool_size: int) -> asyncpg.Pool:
+    """
+    Получить общий пул asyncpg для конфигурации в текущем event loop.
+
+    :param config: Параметры подключения
+    :param pool_size: Максимальное число соединений в пуле
+    :return: asyncpg.Pool
+    """
+    pools = _ASYNC_POOLS.setdefault(asyncio.get_running_loop(), {})
+    key = _pool_key(config, pool_size)
+    pool = pools.get(key)
+    if pool is None or pool.is_closing():
+        new_pool = await asyncpg.create_pool(**config, min_size=1, max_size=pool_size)
+        # Пока пул создавался, другая корутина могла создать свой
+        pool = pools.get(key)
+        if pool is None or pool.is_closing():
+            pool = pools[key] = new_pool
+        else:
+            await new_pool.close()
+    return pool
+
+@lru_cache(maxsize=128)
+def _copy_sql(table: str, columns: tuple) -> sql.Composed:
+    """COPY ... FROM STDIN для таблицы и набора колонок (кэшируется по форме вставки)"""
+    return sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv, DELIMITER E'\\t', NULL '\\N')").format(
+        sql.Identifier(table),
+        sql.SQL(', ').join(map(sql.Identifier, columns))
+    )
+
+@lru_cache(maxsize=128)
+def _insert_sql(table: str, columns: tuple) -> sql.Composed:
+    """INSERT ... VALUES для таблицы и набора колонок (кэшируется по форме вставки)"""
+    return sql.SQL("INSERT INTO {} ({}) VALUES ({})").format(
+        sql.Identifier(table),
+        sql.SQL(', ').join(map(sql.Identifier, columns)),
+        sql.SQL(', ').join(sql.Placeholder() * len(columns))
+    )
+
+@lru_cache(maxsize=128)
+def _quoted_columns(columns: tuple) -> str:
+    """Список колонок в кавычках через запятую"""
+    return ', '.join(f'"{col}"' for col in columns)
+
+@lru_cache(maxsize=128)
+def _upsert_sql(table: str, columns: tuple, conflict_columns: tuple, update_columns: tuple) -> tuple:
+    """
+    Запросы upsert через временную таблицу (кэшируются по форме upsert).
+
+    :return: Кортеж (запрос создания временной таблицы, запрос INSERT ... ON CONFLICT)
+    """
+    cols_str = _quoted_columns(columns)
+    conflict_cols_str = _quoted_columns(conflict_columns)
+
+    if update_columns:
+        update_set = ', '.join(f'"{col}" = EXCLUDED."{col}"' for col in update_columns)
+        conflict_action = f"DO UPDATE SET {update_set}"
+    else:
+        conflict_action = "DO NOTHING"
+
+    # Внутри внешней транзакции upsert выполняется в точке сохранения, и ON COMMIT
+    # DROP срабатывает только при ее COMMIT: таблица предыдущего upsert удаляется
+    # в том же запросе, без лишнего обращения к серверу
+    create_query = (
+        f"DROP TABLE IF EXISTS pg_temp.{_STAGING_TABLE}; "
+        f"CREATE TEMP TABLE {_STAGING_TABLE} ON COMMIT DROP AS "
+        f"SELECT {cols_str} FROM {table} WITH NO DATA"
+    )
+    upsert_query = f"""
+        INSERT INTO {table} ({cols_str})
+        SELECT {cols_str} FROM {_STAGING_TABLE}
+        ON CONFLICT ({conflict_cols_str}) {conflict_action}
+        """
+    return create_query, upsert_query
+
+def _iter_record_batches(df: pd.DataFrame, batch_size: int):
+    """
+    Выдать строки DataFrame пачками, заменяя пропуски на None.
+
+    Преобразование выполняется по одной пачке за раз, без копии всего DataFrame.
+    Строки материализуются через ndarray.tolist(), который собирает списки на
+    уровне C, без построчного обхода массива из Python.
+
+    :param df: Исходный DataFrame
+    :param batch_size: Размер пачки
+    :return: Генератор списков строк (каждая строка - список значений)
+    """
+    for start in range(0, len(df), batch_size):
+        yield df.iloc[start:start + batch_size].to_numpy(dtype=object, na_value=None).tolist()
+
+# Число строк в одном куске CSV при потоковой передаче в COPY
+_CSV_CHUNK_ROWS = 50_000
+
+def _csv_chunk(df: pd.DataFrame) -> bytes:
+    """
+    Сериализовать кусок DataFrame в CSV для COPY (TAB-разделитель, NULL как \\N).
+
+    :param df: Кусок DataFrame
+    :return: Байты CSV в UTF-8
+    """
+    return df.to_csv(index=False, header=False, sep='\t', na_rep='\\N').encode('utf-8')
+
+async def _iter_csv_chunks(df: pd.DataFrame, chunk_rows: int = _CSV_CHUNK_ROWS):
+    """
+    Асинхронно выдавать DataFrame кусками CSV.
+
+    Сериализация выполняется в отдельном потоке на один кусок вперед, так что
+    подготовка следующего куска идет параллельно с отправкой текущего, а в памяти
+    одновременно находится не больше двух кусков.
+
+    :param df: Исходный DataFrame
+    :param chunk_rows: Число строк в куске
+    :return: Асинхронный генератор байтовых кусков CSV
+    """
+    pending = None
+    try:
+        for start in range(0, len(df), chunk_rows):
+            task = asyncio.ensure_future(asyncio.to_thread(_csv_chunk, df.iloc[start:start + chunk_rows]))
+            if pending is not None:
+                yield await pending
+            pending = task
+        if pending is not None:
+            chunk, pending = await pending, None
+            yield chunk
+    finally:
+        # COPY прервался: следующий кусок больше не нужен
+        if pending is not None:
+            pending.cancel()
 
 class SyncPostgresConnector:
     def __init__(self, 
@@ -16,7 +218,22 @@ class SyncPostgresConnector:
                  password: str, 
                  host: str = 'localhost', 
                  port: int = 5432, 
-                 debug: bool = False):
+                 debug: bool = False,
+                 pool_size: Optional[int] = None):
+        """
+        Синхронный коннектор к PostgreSQL на psycopg2.
+
+        :param dbname: Имя базы данных
+        :param user: Пользователь
+        :param password: Пароль
+        :param host: Хост
+        :param port: Порт
+        :param debug: Флаг отладки экземпляра; уровень общего логгера модуля не меняется,
+            отладочные сообщения включает вызывающий код через
+            logging.getLogger('data_utils.pg.pg').setLevel(logging.DEBUG)
+        :param pool_size: Если задан — соединения берутся из общего пула такого размера,
+            разделяемого всеми коннекторами с той же конфигурацией
+        """
         self.config = {
             'dbname': dbname,
             'user': user,
@@ -25,21 +242,10 @@ class SyncPostgresConnector:
             'port': port
         }
         self.conn = None
-        self.logger = logging.getLogger(__name__)
-        if not self.logger.handlers:
-            self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
-    
-            formatter = logging.Formatter(
-                '[%(name)s] [%(asctime)s] [%(levelname)s] => %(message)s',
-                '%Y-%m-%d %H:%M:%S'
-            )
-            
-            handler = logging.StreamHandler()
-            handler.setFormatter(formatter)
-            
-            self.logger.addHandler(handler)
-
-        self.logger.propagate = False
+        self.pool_size = pool_size
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self.logger = _LOGGER
+        self.debug = debug
 
     def __enter__(self):
         self.connect()
@@ -51,15 +257,24 @@ class SyncPostgresConnector:
     def connect(self):
         """Установить соединение с БД"""
         try:
-            self.conn = psycopg2.connect(**self.config)
+            if self.pool_size:
+                self._pool = _get_sync_pool(self.config, self.pool_size)
+                self.conn = self._pool.getconn()
+            else:
+                self.conn = psycopg2.connect(**self.config)
             self.logger.info("Connected to PostgreSQL successfully")
         except Exception as e:
             self.logger.error(f"Connection error: {e}")
             raise
 
     def close(self):
-        """Закрыть соединение"""
-        if self.conn and not self.conn.closed:
+        """Закрыть соединение (или вернуть его в пул)"""
+        if self._pool is not None:
+            if self.conn is not None:
+                self._pool.putconn(self.conn)
+                self.conn = None
+                self.logger.info("Connection returned to pool")
+        elif self.conn and not self.conn.closed:
             self.conn.close()
             self.logger.info("Connection closed")
 
@@ -114,33 +329,48 @@ class SyncPostgresConnector:
             self.logger.error(f"Query execution error: {e}\nQuery: {query[:250]}...")
             raise
 
-    def insert_dataframe(self, df: pd.DataFrame, table: str, page_size: int = 100) -> int:
-        """Вставить DataFrame в таблицу"""
+    def insert_dataframe(self, df: pd.DataFrame, table: str, page_size: int = 100, use_copy: bool = True) -> int:
+        """
+        Вставить DataFrame в таблицу.
+
+        :param df: DataFrame для вставки
+        :param table: Название таблицы
+        :param page_size: Размер пачки для execute_batch (только при use_copy=False)
+        :param use_copy: Если True — вставка через COPY FROM STDIN, иначе построчными INSERT
+            (нужно, например, для триггеров, рассчитанных на INSERT)
+        :return: Количество вставленных строк
+        """
         if df.empty:
             return 0
 
         columns = df.columns.tolist()
-        self.logger.debug(f"Column headers of the DataFrame to insert:\n{columns}")
-        self.logger.debug(f"Header of the DataFrame to be inserted:\n{df.head()}")
-        query = sql.SQL("INSERT INTO {} ({}) VALUES ({})").format(
-            sql.Identifier(table),
-            sql.SQL(', ').join(map(sql.Identifier, columns)),
-            sql.SQL(', ').join(sql.Placeholder() * len(columns))
-        )
+        # df.head() и его repr заметно дороже самого вызова логгера: формируем
+        # отладочный вывод, только если уровень DEBUG действительно включен
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Column headers of the DataFrame to insert:\n%s", columns)
+            self.logger.debug("Header of the DataFrame to be inserted:\n%s", df.head())
 
         try:
             with self.conn.cursor() as cursor:  
                 start_time = time.time() 
 
-                execute_batch(
-                    cursor,
-                    query,
-                    df.replace({pd.NA: None}).itertuples(index=False, name=None),
-                    page_size=page_size
-                )
+                if use_copy:
+                    with tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE, mode='w+b') as buffer:
+                        df.to_csv(buffer, index=False, header=False, sep='\t', na_rep='\\N', encoding='utf-8')
+                        buffer.seek(0)
+
+                        cursor.copy_expert(_copy_sql(table, tuple(columns)), buffer)
+                else:
+                    query = _insert_sql(table, tuple(columns))
+                    execute_batch(
+                        cursor,
+                        query,
+                        chain.from_iterable(_iter_record_batches(df, page_size)),
+                        page_size=page_size
+                    )
                 execution_time = time.time() - start_time
                 self.conn.commit()
-                self.logger.debug(f"Execution time () - {execution_time:.4f}")
+                self.logger.debug("Execution time (%s) - %.4f", 'COPY' if use_copy else 'INSERT', execution_time)
                 return len(df)
         except Exception as e:
             self.conn.rollback()
@@ -148,7 +378,22 @@ class SyncPostgresConnector:
             raise
 
 class AsyncPostgresConnector:
-    def __init__(self, dbname: str, user: str, password: str, host: str = 'localhost', port: int = 5432, debug = False):
+    def __init__(self, dbname: str, user: str, password: str, host: str = 'localhost', port: int = 5432, debug = False,
+                 pool_size: Optional[int] = None):
+        """
+        Асинхронный коннектор к PostgreSQL на asyncpg.
+
+        :param dbname: Имя базы данных
+        :param user: Пользователь
+        :param password: Пароль
+        :param host: Хост
+        :param port: Порт
+        :param debug: Флаг отладки экземпляра; уровень общего логгера модуля не меняется,
+            отладочные сообщения включает вызывающий код через
+            logging.getLogger('data_utils.pg.pg').setLevel(logging.DEBUG)
+        :param pool_size: Если задан — соединения берутся из общего пула такого размера,
+            разделяемого всеми коннекторами с той же конфигурацией в текущем event loop
+        """
         self.config = {
             'database': dbname,
             'user': user,
@@ -157,37 +402,10 @@ class AsyncPostgresConnector:
             'port': port
         }
         self.conn: Optional[Connection] = None
-        self.logger = logging.getLogger(__name__)
-        if not self.logger.handlers:
-            self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
-    
-            formatter = logging.Formatter(
-                '[%(name)s] [%(asctime)s] [%(levelname)s] => %(message)s',
-                '%Y-%m-%d %H:%M:%S'
-            )
-            
-            handler = logging.StreamHandler()
-            handler.setFormatter(formatter)
-            
-            self.logger.addHandler(handler)
-
-        self.logger.propagate = False
-
-    def _setup_logger(self, debug: bool):
-        """Настройка логгера"""
-        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
-        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
-        
-        if not self.logger.handlers:
-            handler = logging.StreamHandler()
-            formatter = logging.Formatter(
-                '[%(name)s] [%(asctime)s] [%(levelname)s] => %(message)s',
-                '%Y-%m-%d %H:%M:%S'
-            )
-            handler.setFormatter(formatter)
-            self.logger.addHandler(handler)
-        
-        self.logger.propagate = False
+        self.pool_size = pool_size
+        self._pool: Optional[asyncpg.Pool] = None
+        self.logger = _LOGGER
+        self.debug = debug
 
     async def __aenter__(self):
         await self.connect()
@@ -199,15 +417,24 @@ class AsyncPostgresConnector:
     async def connect(self):
         """Установить соединение с БД"""
         try:
-            self.conn = await asyncpg.connect(**self.config)
+            if self.pool_size:
+                self._pool = await _get_async_pool(self.config, self.pool_size)
+                self.conn = await self._pool.acquire()
+            else:
+                self.conn = await asyncpg.connect(**self.config)
             self.logger.info("Connected to PostgreSQL successfully")
         except Exception as e:
             self.logger.error(f"Connection error: {e}")
             raise
 
     async def close(self):
-        """Закрыть соединение"""
-        if self.conn and not self.conn.is_closed():
+        """Закрыть соединение (или вернуть его в пул)"""
+        if self._pool is not None:
+            if self.conn is not None:
+                await self._pool.release(self.conn)
+                self.conn = None
+                self.logger.info("Connection returned to pool")
+        elif self.conn and not self.conn.is_closed():
             await self.conn.close()
             self.logger.info("Connection closed")
 
@@ -226,92 +453,91 @@ class AsyncPostgresConnector:
             return 0
 
         try:
-            from io import BytesIO
-            buffer = BytesIO()
-            
-            df.to_csv(buffer, index=False, header=False, sep='\t', na_rep='\\N', encoding='utf-8')
-            buffer.seek(0)
-            
             columns = df.columns.tolist()
             start_time = time.time()
+            # CSV передается кусками: сериализация перекрывается с сетевой отправкой
+            # и не требует буфера размером со весь CSV
             await self.conn.copy_to_table(
                 table_name=table,
                 schema_name=schema,
-                source=buffer,
+                source=_iter_csv_chunks(df),
                 columns=columns,
                 format='csv',
                 delimiter='\t',
                 null='\\N'
             )
             execution_time = time.time() - start_time
-            self.logger.debug(f"Execution time (COPY) - {execution_time:.4f} sec")
+            self.logger.debug("Execution time (COPY) - %.4f sec", execution_time)
             return len(df)
         except Exception as e:
             self.logger.error(f"DataFrame insert error: {e}\nTable: {table}")
             raise
 
     async def insert_dataframe_executemany(self, df: pd.DataFrame, table: str, batch_size: int = 100) -> int:
+        """
+        Вставить DataFrame в таблицу через бинарный COPY (copy_records_to_table).
 
+        :param df: DataFrame для вставки
+        :param table: Название таблицы (допускается вид schema.table)
+        :param batch_size: Размер пачки строк при подготовке записей
+        :return: Количество вставленных строк
+        """
         if df.empty:
             return 0
 
         columns = df.columns.tolist()
-        cols_str = ', '.join(f'"{col}"' for col in columns)
-        placeholders = ', '.join(f'${i+1}' for i in range(len(columns)))
-        query = f"INSERT INTO {table} ({cols_str}) VALUES ({placeholders})"
+        schema, table_name = _split_table_name(table)
 
         try:
-            records = df.replace({pd.NA: None}).itertuples(index=False, name=None)
-            
-            total = 0
             start_time = time.time()
-            async with self.conn.transaction():
-                for i in range(0, len(df), batch_size):
-                    batch = list(islice(records, batch_size))
-                    await self.conn.executemany(query, batch)
-                    total += len(batch)
+            await self.conn.copy_records_to_table(
+                table_name,
+                schema_name=schema,
+                records=chain.from_iterable(_iter_record_batches(df, batch_size)),
+                columns=columns
+            )
             execution_time = time.time() - start_time
-            self.logger.debug(f"Execution time (INSERT) - {execution_time:.4f}")
+            self.logger.debug("Execution time (COPY records) - %.4f", execution_time)
             
-            return total
+            return len(df)
         except Exception as e:
             self.logger.error(f"DataFrame insert error: {e}\nTable: {table}")
             raise
     
     async def upsert_dataframe(self, df: pd.DataFrame, table: str, conflict_columns: list, update_columns: list = None, batch_size: int = 100) -> int:
+        """
+        Upsert DataFrame: COPY во временную таблицу и один INSERT ... SELECT ... ON CONFLICT.
+
+        :param df: DataFrame для upsert
+        :param table: Название таблицы (допускается вид schema.table)
+        :param conflict_columns: Колонки для ON CONFLICT
+        :param update_columns: Колонки для обновления (по умолчанию все, кроме conflict_columns)
+        :param batch_size: Размер пачки строк при подготовке записей
+        :return: Количество переданных строк
+        """
         if df.empty:
             return 0
 
         columns = df.columns.tolist()
-        cols_str = ', '.join(f'"{col}"' for col in columns)
-        placeholders = ', '.join(f'${i+1}' for i in range(len(columns)))
-        
-
-        conflict_cols_str = ', '.join(f'"{col}"' for col in conflict_columns)
         
         if update_columns is None:
             update_columns = [col for col in columns if col not in conflict_columns]
         
-        update_set = ', '.join(f'"{col}" = EXCLUDED."{col}"' for col in update_columns)
-        
-        query = f"""
-        INSERT INTO {table} ({cols_str})
-        VALUES ({placeholders})
-        ON CONFLICT ({conflict_cols_str}) DO UPDATE
-        SET {update_set}
-        """
+        create_query, query = _upsert_sql(table, tuple(columns), tuple(conflict_columns), tuple(update_columns))
 
         try:
-            records = df.replace({pd.NA: None}).itertuples(index=False, name=None)
-            
-            total = 0
             start_time = time.time()
             async with self.conn.transaction():
-                for i in range(0, len(df), batch_size):
-                    batch = list(islice(records, batch_size))
-                    await self.conn.executemany(query, batch)
-                    total += len(batch)
+                # Временная таблица с колонками DataFrame, без ограничений NOT NULL
+                await self.conn.execute(create_query)
+                await self.conn.copy_records_to_table(
+                    _STAGING_TABLE,
+                    records=chain.from_iterable(_iter_record_batches(df, batch_size)),
+                    columns=columns
+                )
+                await self.conn.execute(query)
             
+            total = len(df)
             execution_time = time.time() - start_time
             self.logger.info(f"Execution time (UPSERT) - {execution_time:.4f} sec, rows affected: {total}")
             
@@ -321,7 +547,16 @@ class AsyncPostgresConnector:
             raise
 
     async def upsert_dataframe_with_ids(self, df: pd.DataFrame, table: str, id_column: str, batch_size: int = 100) -> int:
-
+        """
+        Upsert DataFrame, индекс которого содержит ID: COPY во временную таблицу
+        и один INSERT ... SELECT ... ON CONFLICT (id_column) DO UPDATE.
+
+        :param df: DataFrame для upsert, индекс должен называться id_column
+        :param table: Название таблицы (допускается вид schema.table)
+        :param id_column: Колонка ID для ON CONFLICT
+        :param batch_size: Размер пачки строк при подготовке записей
+        :return: Количество переданных строк
+        """
         if df.empty:
             return 0
 
@@ -331,32 +566,26 @@ class AsyncPostgresConnector:
 
         # Все колонки кроме ID
         data_columns = [col for col in df.columns if col != id_column]
-        cols_str = ', '.join(f'"{col}"' for col in [id_column] + data_columns)
-        placeholders = ', '.join(f'${i+1}' for i in range(len([id_column] + data_columns)))
-        
-        query = f"""
-        INSERT INTO {table} ({cols_str})
-        VALUES ({placeholders})
-        ON CONFLICT ({id_column}) DO UPDATE SET
-        {', '.join(f'"{col}" = EXCLUDED."{col}"' for col in data_columns)}
-        """
+        columns = [id_column] + data_columns
+        create_query, query = _upsert_sql(table, tuple(columns), (id_column,), tuple(data_columns))
 
         try:
             # Подготовка данных: преобразуем индекс в колонку
-            temp_df = df.reset_index()
-            records = temp_df[[id_column] + data_columns].to_records(index=False).tolist()
+            temp_df = df.reset_index()[columns]
             
-            total = 0
             start_time = time.time()
             async with self.conn.transaction():
-                # Пакетная вставка через executemany
-                for i in range(0, len(records), batch_size):
-                    batch = records[i:i + batch_size]
-                    await self.conn.executemany(query, batch)
-                    total += len(batch)
+                await self.conn.execute(create_query)
+                await self.conn.copy_records_to_table(
+                    _STAGING_TABLE,
+                    records=chain.from_iterable(_iter_record_batches(temp_df, batch_size)),
+                    columns=columns
+                )
+                await self.conn.execute(query)
+            total = len(df)
             
             execution_time = time.time() - start_time
-            self.logger.debug(f"UPSERT completed in {execution_time:.4f} sec | Rows affected: {total}")
+            self.logger.debug("UPSERT completed in %.4f sec | Rows affected: %s", execution_time, total)
             
             return total
         except Exception as e:
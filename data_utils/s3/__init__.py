@@ -1,3 +1,4 @@
 from .s3 import S3Uploader
+from .async_s3 import AsyncS3Uploader
 
-__all__ = ['S3Uploader']
\ No newline at end of file
+__all__ = ['S3Uploader', 'AsyncS3Uploader']
\ No newline at end of file
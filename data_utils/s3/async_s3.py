@@ -0,0 +1,350 @@
+import asyncio
+import logging
+import os
+from itertools import islice
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from .s3 import DEFAULT_ASYNC_CONCURRENCY, DELETE_BATCH_SIZE, S3Uploader
+
+try:
+    import aioboto3
+    from aiobotocore.config import AioConfig
+except ImportError:  # AsyncS3Uploader доступен только с установленным aioboto3
+    aioboto3 = None
+    AioConfig = None
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _require_aioboto3():
+    """
+    Проверка наличия пакета aioboto3.
+
+    :raises ImportError: Если пакет aioboto3 не установлен
+    """
+    if aioboto3 is None:
+        raise ImportError("Для AsyncS3Uploader требуется пакет aioboto3: pip install aioboto3")
+
+
+class AsyncS3Uploader:
+    """
+    Асинхронный вариант S3Uploader на aioboto3.
+
+    Все операции идут через один асинхронный клиент с общим пулом соединений:
+    независимые запросы выполняются одновременно в event loop, без потока на запрос.
+    Сравнение файлов, хэширование и построение метаданных берутся из S3Uploader
+    и выполняются в потоках через asyncio.to_thread.
+
+    Клиент открывается при первом запросе и закрывается в close() или при выходе
+    из async with.
+    """
+
+    def __init__(self, aws_access_key_id, aws_secret_access_key, endpoint_url=None,
+                 region_name='us-east-1', default_bucket=None, debug=False,
+                 max_concurrency=DEFAULT_ASYNC_CONCURRENCY, **uploader_kwargs):
+        """
+        Инициализация асинхронного клиента S3.
+
+        :param aws_access_key_id: AWS Access Key ID
+        :param aws_secret_access_key: AWS Secret Access Key
+        :param endpoint_url: URL эндпоинта S3
+        :param region_name: Регион S3
+        :param default_bucket: Бакет по умолчанию (опционально)
+        :param debug: Флаг отладки экземпляра; уровень общего логгера модуля не меняется,
+            отладочные сообщения включает вызывающий код через
+            logging.getLogger('data_utils.s3.s3').setLevel(logging.DEBUG)
+        :param max_concurrency: Максимальное число одновременных запросов (и размер пула соединений)
+        :param uploader_kwargs: Дополнительные параметры S3Uploader (transfer_config и т.д.)
+        :raises ImportError: Если пакет aioboto3 не установлен
+        """
+        _require_aioboto3()
+        self._uploader = S3Uploader(
+            aws_access_key_id, aws_secret_access_key, endpoint_url=endpoint_url,
+            region_name=region_name, default_bucket=default_bucket, debug=debug, **uploader_kwargs
+        )
+        self.debug = debug
+        self._init_state(max_concurrency)
+
+    @classmethod
+    def from_uploader(cls, uploader, max_concurrency=DEFAULT_ASYNC_CONCURRENCY):
+        """
+        Асинхронный клиент поверх существующего S3Uploader: параметры подключения,
+        кэш head_object и состояние загрузок общие с ним.
+
+        :param uploader: Экземпляр S3Uploader
+        :param max_concurrency: Максимальное число одновременных запросов (и размер пула соединений)
+        :return: AsyncS3Uploader
+        :raises ImportError: Если пакет aioboto3 не установлен
+        """
+        _require_aioboto3()
+        self = cls.__new__(cls)
+        self._uploader = uploader
+        self._init_state(max_concurrency)
+        return self
+
+    def _init_state(self, max_concurrency):
+        """
+        Инициализация семафора и состояния асинхронного клиента.
+
+        :param max_concurrency: Максимальное число одновременных запросов
+        """
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client_lock = asyncio.Lock()
+        self._client_cm = None
+        self._client = None
+
+    @property
+    def default_bucket(self):
+        return self._uploader.default_bucket
+
+    @default_bucket.setter
+    def default_bucket(self, value):
+        self._uploader.default_bucket = value
+
+    async def __aenter__(self):
+        await self._get_client()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _get_client(self):
+        """
+        Асинхронный клиент S3, открываемый при первом обращении.
+
+        Открытие защищено блокировкой: одновременные задачи, пришедшие до открытия,
+        ждут один и тот же клиент, а не создают по своему.
+
+        :return: Клиент aioboto3
+        """
+        if self._client is None:
+            async with self._client_lock:
+                if self._client is None:
+                    session = aioboto3.Session()
+                    client_cm = session.client(
+                        's3', config=AioConfig(max_pool_connections=self.max_concurrency),
+                        **self._uploader._client_kwargs
+                    )
+                    self._client = await client_cm.__aenter__()
+                    self._client_cm = client_cm
+        return self._client
+
+    async def close(self):
+        """Закрытие асинхронного клиента и его пула соединений."""
+        if self._client_cm is not None:
+            client_cm, self._client_cm, self._client = self._client_cm, None, None
+            await client_cm.__aexit__(None, None, None)
+
+    async def _get_s3_object_info(self, bucket_name, s3_key):
+        """
+        Получение информации о файле в S3 через head_object.
+
+        :param bucket_name: Название бакета
+        :param s3_key: Ключ объекта в S3
+        :return: S3ObjectInfo или None, если файл не найден или запрос завершился ошибкой
+        """
+        client = await self._get_client()
+        try:
+            response = await client.head_object(Bucket=bucket_name, Key=s3_key, ChecksumMode='ENABLED')
+        except ClientError as e:
+            if e.response['Error']['Code'] != '404':
+                _LOGGER.error("Ошибка получения информации о файле %s: %s", s3_key, e)
+            return None
+        return S3Uploader._head_entry(response)
+
+    async def _upload(self, local_file_path, bucket, s3_key, s3_index=None, local_stat=None,
+                      skip_if_exists=False):
+        """
+        Загрузка одного файла с ограничением числа одновременных запросов.
+
+        :param local_file_path: Путь к локальному файлу
+        :param bucket: Название бакета
+        :param s3_key: Ключ объекта в S3
+        :param s3_index: Словарь {ключ: S3ObjectInfo} из листинга (опционально, иначе head_object)
+        :param local_stat: Уже полученный os.stat_result файла (опционально)
+        :param skip_if_exists: Если True, не загружать неизмененный файл
+        :return: 'uploaded', 'skipped' или 'error'
+        """
+        async with self._semaphore:
+            try:
+                if skip_if_exists:
+                    if s3_index is None:
+                        # Файл не менялся с момента загрузки: head_object не нужен
+                        if local_stat is not None and self._uploader._upload_state_matches(
+                            bucket, s3_key, local_file_path, local_stat
+                        ):
+                            return 'skipped'
+                        info = await self._get_s3_object_info(bucket, s3_key)
+                        s3_index = {s3_key: info} if info is not None else {}
+                    # Хэширование локального файла не блокирует event loop
+                    if await asyncio.to_thread(
+                        self._uploader._files_are_equal, local_file_path, bucket, s3_key, s3_index,
+                        local_stat
+                    ):
+                        return 'skipped'
+                extra_args = await asyncio.to_thread(
+                    self._uploader._upload_extra_args, local_file_path, local_stat
+                )
+                client = await self._get_client()
+                try:
+                    await client.upload_file(local_file_path, bucket, s3_key, ExtraArgs=extra_args)
+                finally:
+                    # Кэш head_object общий с синхронным загрузчиком (from_uploader)
+                    self._uploader._invalidate_head_cache(bucket, s3_key)
+                self._uploader._remember_upload(bucket, s3_key, local_file_path, local_stat)
+                return 'uploaded'
+            except (ClientError, BotoCoreError, OSError) as e:
+                _LOGGER.error("Ошибка загрузки файла %s: %s", local_file_path, e)
+                return 'error'
+
+    async def upload_file(self, local_file_path, s3_key, bucket_name=None, skip_if_exists=False):
+        """
+        Загрузка одного файла в S3 с возможностью пропуска неизмененных файлов.
+
+        :param local_file_path: Путь к локальному файлу
+        :param s3_key: Ключ объекта в S3 (путь внутри бакета)
+        :param bucket_name: Название S3 бакета (опционально, если установлен default_bucket)
+        :param skip_if_exists: Если True, не загружать файл, если он уже существует и не изменился
+        :return: 'uploaded', 'skipped' или 'error'
+        """
+        bucket = self._uploader._resolve_bucket(bucket_name)
+
+        try:
+            local_stat = os.stat(local_file_path)
+        except OSError:
+            _LOGGER.error("Ошибка: файл %s не найден.", local_file_path)
+            return 'error'
+
+        status = await self._upload(local_file_path, bucket, s3_key, local_stat=local_stat,
+                                    skip_if_exists=skip_if_exists)
+        if status == 'uploaded':
+            _LOGGER.info("Файл %s успешно загружен в %s",
+                         local_file_path, self._uploader._get_s3_url(bucket, s3_key))
+        elif status == 'skipped':
+            _LOGGER.info("Файл %s не изменился, пропускаем загрузку в %s",
+                         local_file_path, self._uploader._get_s3_url(bucket, s3_key))
+        return status
+
+    async def upload_directory(self, local_directory, s3_prefix='', bucket_name=None, skip_if_exists=False):
+        """
+        Загрузка всей директории в S3 одновременными запросами.
+
+        При skip_if_exists информация об объектах берется из одного постраничного
+        листинга префикса вместо head_object на каждый файл.
+
+        :param local_directory: Локальная директория для загрузки
+        :param s3_prefix: Префикс пути в S3 (например, 'uploads/')
+        :param bucket_name: Название S3 бакета (опционально, если установлен default_bucket)
+        :param skip_if_exists: Если True, не загружать файлы, которые уже существуют и не изменились
+        :return: Словарь со статистикой: {'uploaded': int, 'skipped': int, 'errors': int}
+        """
+        bucket = self._uploader._resolve_bucket(bucket_name)
+
+        if not os.path.isdir(local_directory):
+            _LOGGER.error("Ошибка: %s не является директорией.", local_directory)
+            return {'uploaded': 0, 'skipped': 0, 'errors': 1}
+
+        s3_index = None
+        if skip_if_exists:
+            client = await self._get_client()
+            s3_index = {}
+            paginator = client.get_paginator('list_objects_v2')
+            async for page in paginator.paginate(Bucket=bucket, Prefix=s3_prefix):
+                for obj in page.get('Contents', []):
+                    s3_index[obj['Key']] = S3Uploader._listing_entry(obj)
+
+        statuses = await asyncio.gather(*(
+            self._upload(local_file_path, bucket, s3_key, s3_index, local_stat, skip_if_exists)
+            for local_file_path, s3_key, local_stat in S3Uploader._iter_directory_files(local_directory, s3_prefix)
+        ))
+
+        stats = {
+            'uploaded': statuses.count('uploaded'),
+            'skipped': statuses.count('skipped'),
+            'errors': statuses.count('error')
+        }
+        _LOGGER.info("Загрузка завершена. Загружено: %s, Пропущено: %s, Ошибок: %s",
+                     stats['uploaded'], stats['skipped'], stats['errors'])
+        return stats
+
+    async def download_file(self, s3_key, local_file_path, bucket_name=None):
+        """
+        Скачивание файла из S3.
+
+        :param s3_key: Ключ объекта в S3
+        :param local_file_path: Локальный путь для сохранения файла
+        :param bucket_name: Название S3 бакета (опционально, если установлен default_bucket)
+        """
+        bucket = self._uploader._resolve_bucket(bucket_name)
+        client = await self._get_client()
+
+        try:
+            os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
+            async with self._semaphore:
+                await client.download_file(bucket, s3_key, local_file_path)
+            _LOGGER.info("Файл успешно скачан из %s в %s",
+                         self._uploader._get_s3_url(bucket, s3_key), local_file_path)
+        except ClientError as e:
+            _LOGGER.error("Ошибка скачивания файла: %s", e)
+
+    async def list_files(self, prefix='', bucket_name=None):
+        """
+        Получение списка файлов в бакете с опциональным префиксом.
+
+        :param prefix: Префикс для фильтрации файлов
+        :param bucket_name: Название S3 бакета (опционально, если установлен default_bucket)
+        :return: Список ключей файлов
+        """
+        bucket = self._uploader._resolve_bucket(bucket_name)
+        client = await self._get_client()
+
+        try:
+            keys = []
+            paginator = client.get_paginator('list_objects_v2')
+            async for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+                keys.extend(obj['Key'] for obj in page.get('Contents', []))
+            return keys
+        except ClientError as e:
+            _LOGGER.error("Ошибка получения списка файлов: %s", e)
+            return []
+
+    async def delete_files(self, s3_keys, bucket_name=None):
+        """
+        Удаление набора файлов из S3 пакетами delete_objects по DELETE_BATCH_SIZE ключей.
+
+        Пакеты отправляются одновременно, в режиме Quiet.
+
+        :param s3_keys: Итерируемый набор ключей объектов
+        :param bucket_name: Название S3 бакета (опционально, если установлен default_bucket)
+        :return: Словарь со статистикой: {'deleted': int, 'errors': int}
+        """
+        bucket = self._uploader._resolve_bucket(bucket_name)
+        client = await self._get_client()
+
+        async def delete_batch(batch):
+            for s3_key in batch:
+                self._uploader._invalidate_head_cache(bucket, s3_key)
+            self._uploader._forget_uploads(bucket, batch)
+            async with self._semaphore:
+                try:
+                    response = await client.delete_objects(
+                        Bucket=bucket,
+                        Delete={'Objects': [{'Key': s3_key} for s3_key in batch], 'Quiet': True}
+                    )
+                except ClientError as e:
+                    _LOGGER.error("Ошибка при батчевом удалении: %s", e)
+                    return 0, len(batch)
+            errors = response.get('Errors', [])
+            for error in errors:
+                _LOGGER.error("Ошибка удаления файла %s: %s", error['Key'], error['Message'])
+            return len(batch) - len(errors), len(errors)
+
+        keys = iter(s3_keys)
+        batches = iter(lambda: list(islice(keys, DELETE_BATCH_SIZE)), [])
+        results = await asyncio.gather(*(delete_batch(batch) for batch in batches))
+        return {
+            'deleted': sum(deleted for deleted, _ in results),
+            'errors': sum(errors for _, errors in results)
+        }
@@ -1,12 +1,259 @@
 import os
+import asyncio
+import logging
+import base64
 import boto3
 import hashlib
+import mmap
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from boto3.s3.transfer import TransferConfig, create_transfer_manager
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+
+
+try:
+    import xxhash
+except ImportError:  # Без xxhash содержимое сравнивается только по SHA-256 и MD5
+    xxhash = None
+
+_LOGGER = logging.getLogger(__name__)
+
+# Параметры multipart-передачи: объекты крупнее 64 МБ передаются частями
+# по 64 МБ в 20 параллельных потоков; крупные части снижают накладные расходы
+# на запрос и позволяют загрузить быстрый канал
+DEFAULT_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=64 * 1024 * 1024,
+    multipart_chunksize=64 * 1024 * 1024,
+    max_concurrency=20,
+    use_threads=True,
+)
+
+# Параметры скачивания: объекты крупнее 8 МБ читаются параллельными range-GET
+# по 8 МБ в 16 потоков; мелкие части начинают поступать раньше, а суммарная
+# пропускная способность S3 растет с числом одновременных запросов
+DEFAULT_DOWNLOAD_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=16,
+    use_threads=True,
+)
+
+# Параметры клиента: пул соединений рассчитан на одновременную работу потоков
+# TransferManager и параллельных вызовов из пользовательских потоков; при
+# меньшем пуле лишние запросы ждут свободный сокет. Короткий таймаут соединения
+# (вместо 60 секунд по умолчанию) быстрее переводит зависшее подключение в повтор
+DEFAULT_CLIENT_CONFIG = Config(
+    max_pool_connections=64,
+    retries={'mode': 'adaptive', 'max_attempts': 5},
+    tcp_keepalive=True,
+    connect_timeout=5,
+    read_timeout=30,
+)
+
+# S3 вычисляет и хранит SHA-256 объекта, который затем возвращается в head_object
+# и позволяет сравнивать содержимое без неоднозначности multipart ETag
+CHECKSUM_EXTRA_ARGS = {'ChecksumAlgorithm': 'SHA256'}
+
+# Ключи пользовательских метаданных объекта, которые записываются при загрузке файла:
+# время модификации исходного файла (нс) и SHA-256 содержимого
+MTIME_METADATA_KEY = 'mtime'
+SHA256_METADATA_KEY = 'sha256'
+# xxh3-64 содержимого (записывается при установленном xxhash): некриптографический
+# хэш считается на порядок быстрее MD5 и SHA-256 и проверяется первым
+XXH3_METADATA_KEY = 'xxh3'
+
+# Размер блока чтения при хэшировании локальных файлов
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Число потоков для проверки и хэширования файлов директории перед загрузкой:
+# подготовка упирается в чтение диска и сеть, а не в CPU, поэтому потоков больше, чем ядер
+DEFAULT_UPLOAD_WORKERS = min(32, (os.cpu_count() or 4) * 4)
+
+# Заготовки хэшеров: copy() дешевле создания объекта через hashlib.new.
+# Хэши служат только для сравнения содержимого (usedforsecurity=False): на сборках
+# OpenSSL в режиме FIPS MD5 иначе недоступен
+_HASHER_PROTOTYPES = {
+    'md5': hashlib.md5(usedforsecurity=False),
+    'sha256': hashlib.sha256(usedforsecurity=False),
+}
+if xxhash is not None:
+    _HASHER_PROTOTYPES['xxh3'] = xxhash.xxh3_64()
+
+# Буфер чтения при хэшировании создается один раз на поток
+_HASH_BUFFERS = threading.local()
+
+def _new_hasher(algorithm):
+    """
+    Создание пустого хэшера копированием заготовки.
+
+    :param algorithm: Алгоритм hashlib
+    :return: Объект хэшера
+    """
+    prototype = _HASHER_PROTOTYPES.get(algorithm)
+    return prototype.copy() if prototype is not None else hashlib.new(algorithm, usedforsecurity=False)
+
+def _hash_buffer():
+    """
+    Буфер размера HASH_BLOCK_SIZE для readinto, общий для вызовов в текущем потоке.
+
+    :return: bytearray
+    """
+    buffer = getattr(_HASH_BUFFERS, 'buffer', None)
+    if buffer is None:
+        buffer = _HASH_BUFFERS.buffer = bytearray(HASH_BLOCK_SIZE)
+    return buffer
+
+class _HasherGroup:
+    """Несколько хэшеров, обновляемых одними и теми же блоками данных."""
+
+    __slots__ = ('hashers',)
+
+    def __init__(self, hashers):
+        self.hashers = hashers
+
+    def update(self, data):
+        for hasher in self.hashers:
+            hasher.update(data)
+
+def _update_from_file(hasher, f, limit=None):
+    """
+    Хэширование файла блоками через readinto в переиспользуемый буфер,
+    без создания bytes на каждый блок.
+
+    :param hasher: Объект хэшера
+    :param f: Файл, открытый в бинарном режиме
+    :param limit: Максимальное число байт от текущей позиции (по умолчанию до конца файла)
+    """
+    buffer = _hash_buffer()
+    view = memoryview(buffer)
+    remaining = limit
+    while remaining is None or remaining > 0:
+        block = view if remaining is None or remaining >= len(buffer) else view[:remaining]
+        read = f.readinto(block)
+        if not read:
+            break
+        hasher.update(view[:read])
+        if remaining is not None:
+            remaining -= read
+
+# Размеры частей, которыми обычно загружают multipart-объекты (минимум S3, boto3,
+# aws cli и DEFAULT_TRANSFER_CONFIG); перебираются при восстановлении составного ETag
+KNOWN_PART_SIZES = (5 * 1024 * 1024, 8 * 1024 * 1024, 16 * 1024 * 1024, 64 * 1024 * 1024)
+
+# Число потоков для хэширования частей составного ETag: hashlib отпускает GIL
+# на крупных блоках, поэтому части считаются на нескольких ядрах одновременно
+MULTIPART_HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+def _md5_digest(data):
+    """
+    MD5 блока данных в виде bytes.
+
+    :param data: bytes-подобный объект
+    :return: Дайджест MD5
+    """
+    hasher = _new_hasher('md5')
+    hasher.update(data)
+    return hasher.digest()
+
+def _md5_file_range(fd, offset, length):
+    """
+    MD5 участка файла, прочитанного через os.preadv по смещению.
+
+    Чтение по смещению не меняет позицию дескриптора, поэтому участки одного
+    файла можно хэшировать из нескольких потоков одновременно.
+
+    :param fd: Дескриптор файла, открытого на чтение
+    :param offset: Смещение начала участка
+    :param length: Длина участка в байтах
+    :return: Дайджест MD5
+    """
+    hasher = _new_hasher('md5')
+    buffer = _hash_buffer()
+    view = memoryview(buffer)
+    end = offset + length
+    while offset < end:
+        read = os.preadv(fd, [view[:min(len(buffer), end - offset)]], offset)
+        if not read:
+            break
+        hasher.update(view[:read])
+        offset += read
+    return hasher.digest()
+
+@dataclass(slots=True, frozen=True)
+class S3ObjectInfo:
+    """
+    Информация об объекте S3 из head_object или листинга.
+
+    Поля хранятся в слотах, без словаря экземпляра: объект меньше кортежа той же
+    длины, а чтение поля идет через дескриптор слота, без поиска по индексу
+    в свойстве namedtuple. Экземпляры неизменяемы: один объект из кэша head_object
+    и индекса префикса читают несколько потоков.
+    """
+    size: int
+    etag: str
+    last_modified: datetime
+    checksum_sha256: str | None
+    metadata: dict | None
+
+# Максимальное число ключей в одном запросе delete_objects
+DELETE_BATCH_SIZE = 1000
+
+# Время жизни закэшированного результата head_object, секунды
+HEAD_CACHE_TTL = 30.0
+
+# Предел одновременных загрузок в upload_directory_async
+DEFAULT_ASYNC_CONCURRENCY = 64
+
+@lru_cache(maxsize=32)
+def _cached_session_client(aws_access_key_id, aws_secret_access_key, endpoint_url, region_name, client_config):
+    """
+    Сессия и клиент S3, общие для всех загрузчиков с одинаковыми параметрами.
+
+    Создание клиента (разбор моделей botocore, цепочка учетных данных) занимает
+    сотни миллисекунд, а клиент boto3 потокобезопасен, поэтому повторные
+    S3Uploader(...) переиспользуют его вместе с прогретым пулом соединений.
+
+    :param client_config: botocore Config клиента
+    :return: Кортеж (boto3 Session, клиент S3)
+    """
+    # Собственная сессия вместо глобальной сессии boto3 по умолчанию
+    session = boto3.session.Session(
+        aws_access_key_id=aws_access_key_id,
+        aws_secret_access_key=aws_secret_access_key,
+        region_name=region_name
+    )
+    return session, session.client('s3', endpoint_url=endpoint_url, config=client_config)
+
+@lru_cache(maxsize=32)
+def _cached_unvalidated_client(session, endpoint_url, client_config):
+    """
+    Клиент S3 без проверки параметров запросов по модели botocore.
+
+    Используется только TransferManager'ом upload_directory: ключи и ExtraArgs
+    его запросов формирует сам загрузчик, и проверка на каждом PutObject и
+    UploadPart лишь тратит время. Публичный s3_client параметры проверяет.
+    Имя бакета проверяется отдельным обработчиком botocore и при этом не отключается.
+
+    :param session: boto3 Session из _cached_session_client
+    :param endpoint_url: URL эндпоинта S3
+    :param client_config: botocore Config основного клиента
+    :return: Клиент S3
+    """
+    return session.client('s3', endpoint_url=endpoint_url,
+                          config=client_config.merge(Config(parameter_validation=False)))
 
 class S3Uploader:
     def __init__(self, aws_access_key_id, aws_secret_access_key, endpoint_url=None, 
-                 region_name='us-east-1', default_bucket=None, debug=False):
+                 region_name='us-east-1', default_bucket=None, debug=False,
+                 transfer_config=None, head_cache_ttl=HEAD_CACHE_TTL, client_config=None,
+                 download_config=None, upload_state_path=None):
         """
         Инициализация клиента S3.
 
@@ -15,138 +262,546 @@ class S3Uploader:
         :param endpoint_url: URL эндпоинта S3
         :param region_name: Регион S3
         :param default_bucket: Бакет по умолчанию (опционально)
-        :param debug: Включить режим отладки
-        """
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key,
-            endpoint_url=endpoint_url,
-            region_name=region_name
+        :param debug: Флаг отладки экземпляра; уровень общего логгера модуля не меняется,
+            отладочные сообщения включает вызывающий код через
+            logging.getLogger('data_utils.s3.s3').setLevel(logging.DEBUG)
+        :param transfer_config: boto3 TransferConfig для загрузки файлов
+            (опционально, по умолчанию DEFAULT_TRANSFER_CONFIG)
+        :param head_cache_ttl: Время жизни кэша head_object в секундах; 0 отключает кэш
+        :param client_config: botocore Config клиента (опционально, по умолчанию
+            DEFAULT_CLIENT_CONFIG); max_pool_connections стоит держать не меньше
+            числа потоков upload_directory
+        :param download_config: boto3 TransferConfig для скачивания файлов (опционально;
+            по умолчанию transfer_config, если он передан, иначе DEFAULT_DOWNLOAD_CONFIG)
+        :param upload_state_path: Путь к файлу SQLite с состоянием загрузок (опционально).
+            Если задан, файл, загруженный через этот загрузчик и с тех пор не менявшийся
+            (тот же путь, размер и время модификации), считается совпадающим с объектом
+            без запроса head_object и хэширования. Изменения объекта в S3 в обход
+            загрузчика при этом не обнаруживаются
+        """
+        # Параметры подключения сохраняются для создания асинхронного клиента
+        self._client_kwargs = {
+            'aws_access_key_id': aws_access_key_id,
+            'aws_secret_access_key': aws_secret_access_key,
+            'endpoint_url': endpoint_url,
+            'region_name': region_name
+        }
+        self._client_config = client_config or DEFAULT_CLIENT_CONFIG
+        self.session, self.s3_client = _cached_session_client(
+            aws_access_key_id, aws_secret_access_key, endpoint_url, region_name, self._client_config
         )
         self.default_bucket = default_bucket
         self.debug = debug
+        self.transfer_config = transfer_config or DEFAULT_TRANSFER_CONFIG
+        self.download_config = download_config or transfer_config or DEFAULT_DOWNLOAD_CONFIG
+        self.head_cache_ttl = head_cache_ttl
+        # (бакет, ключ) -> (time.monotonic() момента запроса, результат _get_s3_object_info)
+        self._head_cache = {}
+        # Бакет -> размер части, с которым совпал последний составной ETag
+        self._part_size_cache = {}
+        # Общий TransferManager загрузок и TransferManager upload_directory на клиенте
+        # без проверки параметров создаются при первом обращении
+        self._transfer_manager = None
+        self._directory_transfer_manager = None
+        self._transfer_manager_lock = threading.Lock()
+        # Состояние загрузок: (бакет, ключ) -> путь, размер и mtime загруженного файла
+        self._upload_state = None
+        self._upload_state_lock = threading.Lock()
+        if upload_state_path is not None:
+            self._upload_state = sqlite3.connect(
+                os.path.expanduser(upload_state_path), check_same_thread=False
+            )
+            self._upload_state.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                "bucket TEXT, key TEXT, path TEXT, size INTEGER, mtime_ns INTEGER, "
+                "PRIMARY KEY (bucket, key))"
+            )
+
+    def _get_transfer_manager(self):
+        """
+        Общий TransferManager загрузчика.
+
+        s3_client.upload_file создает новый TransferManager с собственным пулом
+        потоков на каждый вызов; общий менеджер создается один раз, и части
+        загрузок upload_file и upload_fileobj передаются через один пул из
+        transfer_config.max_concurrency потоков.
+
+        :return: boto3 TransferManager
+        """
+        if self._transfer_manager is None:
+            with self._transfer_manager_lock:
+                if self._transfer_manager is None:
+                    self._transfer_manager = create_transfer_manager(self.s3_client, self.transfer_config)
+        return self._transfer_manager
+
+    def _get_directory_transfer_manager(self):
+        """
+        TransferManager upload_directory на клиенте без проверки параметров.
+
+        Все запросы загрузки директории формирует сам загрузчик, поэтому они идут
+        через _cached_unvalidated_client; пользовательские вызовы через s3_client
+        и общий TransferManager по-прежнему проверяются botocore.
+
+        :return: boto3 TransferManager
+        """
+        if self._directory_transfer_manager is None:
+            with self._transfer_manager_lock:
+                if self._directory_transfer_manager is None:
+                    client = _cached_unvalidated_client(
+                        self.session, self._client_kwargs['endpoint_url'], self._client_config
+                    )
+                    self._directory_transfer_manager = create_transfer_manager(client, self.transfer_config)
+        return self._directory_transfer_manager
+
+    def close(self):
+        """Остановить потоки TransferManager'ов, дождавшись незавершенных загрузок, и закрыть состояние загрузок"""
+        with self._transfer_manager_lock:
+            for manager in (self._transfer_manager, self._directory_transfer_manager):
+                if manager is not None:
+                    manager.shutdown()
+            self._transfer_manager = self._directory_transfer_manager = None
+        with self._upload_state_lock:
+            if self._upload_state is not None:
+                self._upload_state.close()
+                self._upload_state = None
+
+    def _upload_state_matches(self, bucket_name, s3_key, local_file_path, local_stat):
+        """
+        Проверка, что в s3_key загружен этот же файл и он с тех пор не менялся.
+
+        :param bucket_name: Название бакета
+        :param s3_key: Ключ объекта в S3
+        :param local_file_path: Путь к локальному файлу
+        :param local_stat: os.stat_result файла
+        :return: True, если размер и время модификации совпадают с записанными при загрузке
+        """
+        if self._upload_state is None:
+            return False
+        with self._upload_state_lock:
+            row = self._upload_state.execute(
+                "SELECT path, size, mtime_ns FROM uploads WHERE bucket = ? AND key = ?",
+                (bucket_name, s3_key)
+            ).fetchone()
+        return row == (os.path.abspath(local_file_path), local_stat.st_size, local_stat.st_mtime_ns)
+
+    def _remember_upload(self, bucket_name, s3_key, local_file_path, local_stat):
+        """
+        Запись успешной загрузки файла в состояние загрузок.
+
+        :param bucket_name: Название бакета
+        :param s3_key: Ключ объекта в S3
+        :param local_file_path: Путь к локальному файлу
+        :param local_stat: os.stat_result файла, полученный до начала загрузки (или None)
+        """
+        if self._upload_state is None or local_stat is None:
+            return
+        with self._upload_state_lock:
+            with self._upload_state:
+                self._upload_state.execute(
+                    "INSERT OR REPLACE INTO uploads VALUES (?, ?, ?, ?, ?)",
+                    (bucket_name, s3_key, os.path.abspath(local_file_path),
+                     local_stat.st_size, local_stat.st_mtime_ns)
+                )
 
-    def _calculate_local_file_hash(self, file_path):
+    def _forget_uploads(self, bucket_name, s3_keys):
         """
-        Вычисление MD5 хэша локального файла.
+        Удаление записей о загрузках для объектов, замененных или удаленных иначе чем загрузкой файла.
+
+        :param bucket_name: Название бакета
+        :param s3_keys: Ключи объектов в S3
+        """
+        if self._upload_state is None:
+            return
+        with self._upload_state_lock:
+            with self._upload_state:
+                self._upload_state.executemany(
+                    "DELETE FROM uploads WHERE bucket = ? AND key = ?",
+                    ((bucket_name, s3_key) for s3_key in s3_keys)
+                )
+
+    def _calculate_local_file_hash(self, file_path, algorithm='md5'):
+        """
+        Вычисление хэша локального файла.
 
         :param file_path: Путь к локальному файлу
-        :return: MD5 хэш в виде hex строки
+        :param algorithm: Алгоритм hashlib: 'md5' (для ETag), 'sha256' (для ChecksumSHA256)
+            или 'xxh3' (при установленном xxhash)
+        :return: Хэш в виде hex строки
+        """
+        hashes = self._calculate_local_file_hashes(file_path, (algorithm,))
+        return hashes[algorithm] if hashes is not None else None
+
+    def _calculate_local_file_hashes(self, file_path, algorithms):
         """
-        hash_md5 = hashlib.md5()
+        Вычисление нескольких хэшей локального файла за один проход чтения.
+
+        Каждый блок передается всем хэшерам, пока он в кэше процессора, и файл
+        читается один раз, сколько бы алгоритмов ни требовалось.
+
+        :param file_path: Путь к локальному файлу
+        :param algorithms: Алгоритмы, как в _calculate_local_file_hash
+        :return: Словарь {алгоритм: hex строка} или None при ошибке чтения
+        """
+        hashers = [_new_hasher(algorithm) for algorithm in algorithms]
+        hasher = hashers[0] if len(hashers) == 1 else _HasherGroup(hashers)
         try:
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
-            return hash_md5.hexdigest()
+            # Небуферизованный FileIO читает сразу в буфер хэширования,
+            # без промежуточного буфера BufferedReader
+            with open(file_path, "rb", buffering=0) as f:
+                if os.fstat(f.fileno()).st_size <= HASH_BLOCK_SIZE:
+                    # Небольшой файл читается одним readinto, без отображения в память
+                    _update_from_file(hasher, f)
+                else:
+                    try:
+                        # Файл отображается в память и хэшируется одним вызовом OpenSSL,
+                        # без копирования блоков в bytes и цикла на Python; несколько
+                        # хэшеров получают отображение блоками по HASH_BLOCK_SIZE
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                            if len(hashers) == 1:
+                                hasher.update(mm)
+                            else:
+                                with memoryview(mm) as view:
+                                    for offset in range(0, len(view), HASH_BLOCK_SIZE):
+                                        hasher.update(view[offset:offset + HASH_BLOCK_SIZE])
+                    except (ValueError, OSError):
+                        # mmap не работает на некоторых файловых системах
+                        _update_from_file(hasher, f)
         except Exception as e:
-            print(f"Ошибка вычисления хэша для файла {file_path}: {e}")
+            _LOGGER.error("Ошибка вычисления хэша для файла %s: %s", file_path, e)
             return None
+        return {algorithm: h.hexdigest() for algorithm, h in zip(algorithms, hashers)}
 
     def _get_s3_object_info(self, bucket_name, s3_key):
         """
         Получение информации о файле в S3 (размер и ETag/хэш).
 
+        Результаты, включая отсутствие объекта, кэшируются на head_cache_ttl секунд;
+        загрузка и удаление через этот экземпляр сбрасывают кэш ключа.
+
         :param bucket_name: Название бакета
         :param s3_key: Ключ объекта в S3
-        :return: Словарь с информацией о файле или None, если файл не найден
+        :return: S3ObjectInfo или None, если файл не найден
         """
+        cache_key = (bucket_name, s3_key)
+        cached = self._head_cache.get(cache_key)
+        if cached is not None and time.monotonic() - cached[0] < self.head_cache_ttl:
+            return cached[1]
+
         try:
-            response = self.s3_client.head_object(Bucket=bucket_name, Key=s3_key)
-            return {
-                'size': response['ContentLength'],
-                'etag': response['ETag'].strip('"'),
-                'last_modified': response['LastModified']
-            }
+            response = self.s3_client.head_object(Bucket=bucket_name, Key=s3_key,
+                                                  ChecksumMode='ENABLED')
+            info = self._head_entry(response)
         except ClientError as e:
-            if e.response['Error']['Code'] == '404':
-                # Файл не найден
-                return None
-            else:
-                print(f"Ошибка получения информации о файле {s3_key}: {e}")
+            if e.response['Error']['Code'] != '404':
+                # Ошибки, кроме отсутствия файла, не кэшируются
+                _LOGGER.error("Ошибка получения информации о файле %s: %s", s3_key, e)
                 return None
+            # Файл не найден
+            info = None
+
+        if self.head_cache_ttl:
+            self._head_cache[cache_key] = (time.monotonic(), info)
+        return info
+
+    def _invalidate_head_cache(self, bucket_name, s3_key):
+        """
+        Удаление закэшированного результата head_object для измененного объекта.
+
+        :param bucket_name: Название бакета
+        :param s3_key: Ключ объекта в S3
+        """
+        self._head_cache.pop((bucket_name, s3_key), None)
+
+    def _index_prefix(self, bucket_name, prefix):
+        """
+        Получение информации обо всех объектах под префиксом постраничным листингом.
+
+        Один запрос list_objects_v2 возвращает до 1000 объектов, что заменяет
+        отдельный head_object на каждый файл. Результаты листинга также попадают
+        в кэш head_object, и последующие _get_s3_object_info для этих ключей
+        обходятся без запросов.
+
+        :param bucket_name: Название бакета
+        :param prefix: Префикс ключей
+        :return: Словарь {ключ: S3ObjectInfo}
+        """
+        index = {}
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                index[obj['Key']] = self._listing_entry(obj)
+
+        if self.head_cache_ttl:
+            now = time.monotonic()
+            for key, info in index.items():
+                cached = self._head_cache.get((bucket_name, key))
+                # Свежий ответ head_object полнее листинга (содержит метаданные)
+                if cached is None or now - cached[0] >= self.head_cache_ttl:
+                    self._head_cache[(bucket_name, key)] = (now, info)
+        return index
+
+    @staticmethod
+    def _head_entry(response):
+        """
+        Преобразование ответа head_object в S3ObjectInfo.
+
+        :param response: Ответ head_object
+        :return: S3ObjectInfo
+        """
+        return S3ObjectInfo(
+            response['ContentLength'],
+            response['ETag'].strip('"'),
+            response['LastModified'],
+            response.get('ChecksumSHA256'),
+            response.get('Metadata', {})
+        )
 
-    def _files_are_equal(self, local_file_path, bucket_name, s3_key):
+    @staticmethod
+    def _listing_entry(obj):
+        """
+        Преобразование элемента Contents из list_objects_v2 в S3ObjectInfo.
+
+        :param obj: Элемент Contents
+        :return: S3ObjectInfo
+        """
+        # Листинг не возвращает контрольную сумму и пользовательские метаданные
+        return S3ObjectInfo(obj['Size'], obj['ETag'].strip('"'), obj['LastModified'], None, None)
+
+    def _files_are_equal(self, local_file_path, bucket_name, s3_key, s3_index=None, local_stat=None):
         """
         Сравнение локального файла с файлом в S3 по размеру, времени модификации и хэшу.
 
         :param local_file_path: Путь к локальному файлу
         :param bucket_name: Название бакета
         :param s3_key: Ключ объекта в S3
+        :param s3_index: Результат _index_prefix для префикса, содержащего s3_key (опционально).
+            Отсутствие ключа в индексе означает, что объекта нет
+        :param local_stat: Уже полученный os.stat_result файла, например из обхода
+            директории (опционально, иначе вызывается os.stat)
         :return: True, если файлы идентичны, False в противном случае
         """
         try:
             # Получение информации о локальном файле
-            local_stat = os.stat(local_file_path)
+            if local_stat is None:
+                local_stat = os.stat(local_file_path)
             local_size = local_stat.st_size
             local_mtime = local_stat.st_mtime
-            local_mtime_dt = datetime.fromtimestamp(local_mtime)
         except OSError as e:
-            print(f"Ошибка получения информации о локальном файле {local_file_path}: {e}")
+            _LOGGER.error("Ошибка получения информации о локальном файле %s: %s", local_file_path, e)
             return False
 
+        # Файл загружен через этот загрузчик и с тех пор не менялся; при наличии
+        # индекса дополнительно проверяется, что объект не удален
+        if (s3_index is None or s3_key in s3_index) and \
+                self._upload_state_matches(bucket_name, s3_key, local_file_path, local_stat):
+            _LOGGER.debug("Файл %s не менялся с момента загрузки в %s", local_file_path, s3_key)
+            return True
+
         # Получение информации о файле в S3
-        s3_info = self._get_s3_object_info(bucket_name, s3_key)
+        if s3_index is not None:
+            s3_info = s3_index.get(s3_key)
+        else:
+            s3_info = self._get_s3_object_info(bucket_name, s3_key)
         
         if s3_info is None:
             # Файл не существует в S3
-            if self.debug:
-                print(f"Файл {s3_key} не существует в S3")
+            _LOGGER.debug("Файл %s не существует в S3", s3_key)
             return False
 
         # Сравнение размеров
-        if local_size != s3_info['size']:
-            if self.debug:
-                print(f"Размеры не совпадают: локальный={local_size}, S3={s3_info['size']}")
+        if local_size != s3_info.size:
+            _LOGGER.debug("Размеры не совпадают: локальный=%s, S3=%s", local_size, s3_info.size)
             return False
 
+        # Объект загружен из этого же файла, и файл с тех пор не менялся
+        metadata = s3_info.metadata or {}
+        if metadata.get(MTIME_METADATA_KEY) == str(local_stat.st_mtime_ns):
+            _LOGGER.debug("Время модификации совпадает с сохраненным в метаданных")
+            return True
+
         # Сравнение времени модификации
-        s3_mtime = s3_info['last_modified']
+        s3_mtime = s3_info.last_modified
         s3_mtime_ts = s3_mtime.timestamp()
-        
-        if self.debug:
-            print(f"Сравнение времени модификации:")
-            print(f"  Локальный файл: {local_mtime_dt} (timestamp: {local_mtime})")
-            print(f"  S3 файл:        {s3_mtime} (timestamp: {s3_mtime_ts})")
-            print(f"  Разница:        {abs(local_mtime - s3_mtime_ts)} секунд")
-
-        # Для файлов размером больше 5 МБ полагаемся только на размер
-        # Для меньших файлов проверяем время модификации
-        if local_size > 5 * 1024 * 1024:  # больше 5 МБ
-            # Для больших файлов проверяем только размер
-            if self.debug:
-                print("Файл большой (>5MB), проверяем только размер")
+        time_diff = abs(local_mtime - s3_mtime_ts)
+
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            # datetime для вывода создается только в режиме отладки
+            _LOGGER.debug(
+                "Сравнение времени модификации:\n"
+                "  Локальный файл: %s (timestamp: %s)\n"
+                "  S3 файл:        %s (timestamp: %s)\n"
+                "  Разница:        %s секунд",
+                datetime.fromtimestamp(local_mtime), local_mtime, s3_mtime, s3_mtime_ts, time_diff
+            )
+
+        if time_diff <= 2:
+            _LOGGER.debug("Время модификации совпадает (разница %s сек)", time_diff)
             return True
-        else:
-            time_diff = abs(local_mtime - s3_mtime_ts)
-            if time_diff <= 2:
-                if self.debug:
-                    print(f"Время модификации совпадает (разница {time_diff} сек)")
+        _LOGGER.debug("Время модификации НЕ совпадает (разница %s сек)", time_diff)
+
+        # Если размеры совпадают, но время нет - сравниваем содержимое; для объектов,
+        # загруженных частями, составной ETag восстанавливается по локальному файлу
+        if self._content_matches(
+            s3_info,
+            lambda algorithm: self._calculate_local_file_hash(local_file_path, algorithm),
+            lambda etag: self._multipart_etag_matches(local_file_path, bucket_name, local_size, etag)
+        ):
+            _LOGGER.debug("Хэши совпадают")
+            return True
+        _LOGGER.debug("Хэши НЕ совпадают")
+
+        return False
+
+    def _multipart_etag_matches(self, local_file_path, bucket_name, local_size, etag):
+        """
+        Проверка составного ETag вида '<md5>-<N>' по локальному файлу.
+
+        S3 вычисляет такой ETag как MD5 от склеенных MD5 всех частей. Размер части
+        неизвестен, поэтому перебираются размеры, дающие ровно N частей: найденный
+        ранее для бакета, текущий multipart_chunksize, KNOWN_PART_SIZES и размер
+        файла / N, округленный вверх до мегабайта.
+
+        :param local_file_path: Путь к локальному файлу
+        :param bucket_name: Название бакета
+        :param local_size: Размер локального файла
+        :param etag: Составной ETag без кавычек
+        :return: True, если ETag совпал при одном из размеров части
+        """
+        try:
+            part_count = int(etag.rsplit('-', 1)[1])
+        except (IndexError, ValueError):
+            return False
+
+        mebibyte = 1024 * 1024
+        min_part_size = -(-local_size // part_count)
+        candidates = [
+            self._part_size_cache.get(bucket_name),
+            self.transfer_config.multipart_chunksize,
+            *KNOWN_PART_SIZES,
+            -(-min_part_size // mebibyte) * mebibyte,
+        ]
+        tried = set()
+        for part_size in candidates:
+            if not part_size or part_size in tried or -(-local_size // part_size) != part_count:
+                continue
+            tried.add(part_size)
+            if self._calculate_multipart_etag(local_file_path, part_size, local_size) == etag:
+                self._part_size_cache[bucket_name] = part_size
                 return True
-            else:
-                if self.debug:
-                    print(f"Время модификации НЕ совпадает (разница {time_diff} сек)")
-
-        # Если размеры совпадают, но время нет - делаем дополнительную проверку хэша
-        # Но только для небольших файлов
-        if local_size < 50 * 1024 * 1024:  # меньше 50 МБ
-            local_hash = self._calculate_local_file_hash(local_file_path)
+        return False
+
+    def _calculate_multipart_etag(self, file_path, part_size, size=None):
+        """
+        Вычисление составного ETag, который S3 присвоил бы файлу при загрузке
+        частями заданного размера.
+
+        :param file_path: Путь к локальному файлу
+        :param part_size: Размер части в байтах
+        :param size: Уже известный размер файла (опционально, иначе os.fstat)
+        :return: ETag вида '<md5>-<число частей>' или None при ошибке чтения
+        """
+        part_digests = []
+        try:
+            with open(file_path, "rb", buffering=0) as f:
+                if size is None:
+                    size = os.fstat(f.fileno()).st_size
+                try:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        # Срезы memoryview не копируют данные части
+                        with memoryview(mm) as view:
+                            parts = [view[offset:offset + part_size]
+                                     for offset in range(0, size, part_size)]
+                            workers = min(MULTIPART_HASH_WORKERS, len(parts))
+                            if workers > 1:
+                                with ThreadPoolExecutor(max_workers=workers) as executor:
+                                    part_digests = list(executor.map(_md5_digest, parts))
+                            else:
+                                part_digests = [_md5_digest(part) for part in parts]
+                            for part in parts:
+                                part.release()
+                except (ValueError, OSError):
+                    # mmap недоступен: части читаются по смещению, тоже в нескольких потоках
+                    offsets = range(0, size, part_size)
+                    workers = min(MULTIPART_HASH_WORKERS, len(offsets))
+                    if workers > 1 and hasattr(os, 'preadv'):
+                        with ThreadPoolExecutor(max_workers=workers) as executor:
+                            part_digests = list(executor.map(
+                                lambda offset: _md5_file_range(f.fileno(), offset, part_size), offsets
+                            ))
+                    else:
+                        f.seek(0)
+                        part_digests = []
+                        for _ in offsets:
+                            hasher = _new_hasher('md5')
+                            _update_from_file(hasher, f, part_size)
+                            part_digests.append(hasher.digest())
+        except Exception as e:
+            _LOGGER.error("Ошибка вычисления хэша для файла %s: %s", file_path, e)
+            return None
+
+        combined = _new_hasher('md5')
+        combined.update(b"".join(part_digests))
+        return f"{combined.hexdigest()}-{len(part_digests)}"
+
+    def _content_matches(self, s3_info, compute_hash, match_multipart_etag=None):
+        """
+        Сравнение хэша локального содержимого с контрольной суммой объекта в S3.
+
+        Приоритет: xxh3 из метаданных объекта (при установленном xxhash); SHA-256
+        из метаданных, записанный при загрузке; SHA-256 целого объекта, посчитанный S3;
+        ETag - простой MD5 или составной ETag multipart-загрузки, если передана
+        функция его проверки.
+
+        :param s3_info: Информация об объекте из _get_s3_object_info
+        :param compute_hash: Функция algorithm -> hex хэш локального содержимого (или None)
+        :param match_multipart_etag: Функция etag -> bool для составного ETag (опционально)
+        :return: True, если содержимое совпадает
+        """
+        metadata = s3_info.metadata or {}
+        stored_xxh3 = metadata.get(XXH3_METADATA_KEY)
+        if stored_xxh3 and xxhash is not None:
+            return compute_hash('xxh3') == stored_xxh3
+
+        stored_sha256 = metadata.get(SHA256_METADATA_KEY)
+        if stored_sha256:
+            return compute_hash('sha256') == stored_sha256
+
+        checksum = s3_info.checksum_sha256
+        if checksum and '-' not in checksum:
+            local_hash = compute_hash('sha256')
             if local_hash is None:
                 return False
-            
-            # Проверяем, является ли ETag простым MD5 (без дефиса)
-            if '-' not in s3_info['etag']:
-                # ETag - это простой MD5
-                if local_hash == s3_info['etag']:
-                    if self.debug:
-                        print("Хэши совпадают")
-                    return True
-                else:
-                    if self.debug:
-                        print(f"Хэши НЕ совпадают: локальный={local_hash}, S3={s3_info['etag']}")
+            return base64.b64encode(bytes.fromhex(local_hash)).decode() == checksum
 
-        return False
+        if '-' in s3_info.etag:
+            return match_multipart_etag is not None and match_multipart_etag(s3_info.etag)
+        return compute_hash('md5') == s3_info.etag
+
+    def _upload_extra_args(self, local_file_path, local_stat=None):
+        """
+        Параметры ExtraArgs для загрузки файла: контрольная сумма и метаданные
+        для последующего сравнения без перечитывания файла.
+
+        SHA-256 и, при установленном xxhash, xxh3 в метаданные пишутся только для
+        файлов, загружаемых частями: для остальных S3 сам хранит SHA-256 целого
+        объекта, и лишнее чтение файла не нужно.
+
+        :param local_file_path: Путь к локальному файлу
+        :param local_stat: Уже полученный os.stat_result файла (опционально)
+        :return: Словарь ExtraArgs
+        """
+        if local_stat is None:
+            local_stat = os.stat(local_file_path)
+        metadata = {MTIME_METADATA_KEY: str(local_stat.st_mtime_ns)}
+        if local_stat.st_size >= self.transfer_config.multipart_threshold:
+            # Оба хэша считаются за один проход по файлу
+            algorithms = ('sha256', 'xxh3') if xxhash is not None else ('sha256',)
+            hashes = self._calculate_local_file_hashes(local_file_path, algorithms)
+            if hashes is not None:
+                metadata[SHA256_METADATA_KEY] = hashes['sha256']
+                if xxhash is not None:
+                    metadata[XXH3_METADATA_KEY] = hashes['xxh3']
+        return {**CHECKSUM_EXTRA_ARGS, 'Metadata': metadata}
 
     def _resolve_bucket(self, bucket_name=None):
         """
@@ -174,87 +829,277 @@ class S3Uploader:
         """
         bucket = self._resolve_bucket(bucket_name)
         
-        if not os.path.exists(local_file_path):
-            print(f"Ошибка: файл {local_file_path} не найден.")
+        try:
+            local_stat = os.stat(local_file_path)
+        except OSError:
+            _LOGGER.error("Ошибка: файл %s не найден.", local_file_path)
             return
 
         if skip_if_exists:
-            if self._files_are_equal(local_file_path, bucket, s3_key):
-                print(f"Файл {local_file_path} не изменился, пропускаем загрузку в {self._get_s3_url(bucket, s3_key)}")
+            if self._files_are_equal(local_file_path, bucket, s3_key, local_stat=local_stat):
+                _LOGGER.info("Файл %s не изменился, пропускаем загрузку в %s",
+                             local_file_path, self._get_s3_url(bucket, s3_key))
                 return
 
         try:
-            self.s3_client.upload_file(local_file_path, bucket, s3_key)
-            print(f"Файл {local_file_path} успешно загружен в {self._get_s3_url(bucket, s3_key)}")
+            extra_args = self._upload_extra_args(local_file_path, local_stat)
+            if not (0 < local_stat.st_size < self.transfer_config.multipart_threshold
+                    and self._put_file_mmap(local_file_path, bucket, s3_key, extra_args)):
+                self._get_transfer_manager().upload(
+                    local_file_path, bucket, s3_key, extra_args=extra_args
+                ).result()
+            self._remember_upload(bucket, s3_key, local_file_path, local_stat)
+            _LOGGER.info("Файл %s успешно загружен в %s", local_file_path, self._get_s3_url(bucket, s3_key))
         except ClientError as e:
-            print(f"Ошибка загрузки файла: {e}")
+            _LOGGER.error("Ошибка загрузки файла: %s", e)
+        finally:
+            self._invalidate_head_cache(bucket, s3_key)
+
+    def _put_file_mmap(self, local_file_path, bucket_name, s3_key, extra_args):
+        """
+        Загрузка файла одним put_object с телом, отображенным в память.
+
+        Тело запроса отправляется прямо из страниц файла, без чтения блоков
+        в bytes и без пула потоков TransferManager. Целостность проверяет S3
+        по контрольной сумме из ChecksumAlgorithm.
 
-    def upload_directory(self, local_directory, s3_prefix='', bucket_name=None, skip_if_exists=False):
+        :param local_file_path: Путь к локальному файлу
+        :param bucket_name: Название бакета
+        :param s3_key: Ключ объекта в S3
+        :param extra_args: Параметры из _upload_extra_args
+        :return: True, если файл загружен; False, если mmap недоступен для файла
+        :raises ClientError: При ошибке запроса
+        """
+        with open(local_file_path, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # mmap не работает на некоторых файловых системах
+                return False
+            with mm:
+                self.s3_client.put_object(Bucket=bucket_name, Key=s3_key, Body=mm, **extra_args)
+        return True
+
+    def upload_fileobj(self, fileobj, s3_key, bucket_name=None, skip_if_exists=False):
+        """
+        Загрузка файлового объекта (например, io.BytesIO) в S3 без записи на диск.
+
+        :param fileobj: Бинарный файловый объект, поддерживающий read и seek
+        :param s3_key: Ключ объекта в S3 (путь внутри бакета)
+        :param bucket_name: Название S3 бакета (опционально, если установлен default_bucket)
+        :param skip_if_exists: Если True, не загружать объект, если в S3 уже лежит такой же
+        """
+        bucket = self._resolve_bucket(bucket_name)
+
+        if skip_if_exists:
+            if self._fileobj_equals(fileobj, bucket, s3_key):
+                _LOGGER.info("Объект не изменился, пропускаем загрузку в %s", self._get_s3_url(bucket, s3_key))
+                return
+
+        try:
+            self._get_transfer_manager().upload(
+                fileobj, bucket, s3_key, extra_args=CHECKSUM_EXTRA_ARGS
+            ).result()
+            _LOGGER.info("Объект успешно загружен в %s", self._get_s3_url(bucket, s3_key))
+        except ClientError as e:
+            _LOGGER.error("Ошибка загрузки объекта: %s", e)
+        finally:
+            self._invalidate_head_cache(bucket, s3_key)
+            self._forget_uploads(bucket, [s3_key])
+
+    def _fileobj_equals(self, fileobj, bucket_name, s3_key):
+        """
+        Сравнение содержимого файлового объекта с объектом в S3 по размеру и хэшу.
+
+        :param fileobj: Бинарный файловый объект
+        :param bucket_name: Название бакета
+        :param s3_key: Ключ объекта в S3
+        :return: True, если содержимое совпадает, False в противном случае
+        """
+        s3_info = self._get_s3_object_info(bucket_name, s3_key)
+        if s3_info is None:
+            return False
+
+        start = fileobj.tell()
+        size = fileobj.seek(0, os.SEEK_END) - start
+        if size != s3_info.size:
+            fileobj.seek(start)
+            return False
+
+        def compute_hash(algorithm):
+            fileobj.seek(start)
+            hasher = _new_hasher(algorithm)
+            for chunk in iter(lambda: fileobj.read(HASH_BLOCK_SIZE), b""):
+                hasher.update(chunk)
+            return hasher.hexdigest()
+
+        try:
+            return self._content_matches(s3_info, compute_hash)
+        finally:
+            fileobj.seek(start)
+
+    def upload_directory(self, local_directory, s3_prefix='', bucket_name=None, skip_if_exists=False,
+                         max_workers=None, use_async=False):
         """
         Загрузка всей директории в S3 с сохранением структуры.
 
+        Все файлы передаются одному TransferManager на клиенте без проверки
+        параметров (_get_directory_transfer_manager): его пул потоков
+        (transfer_config.max_concurrency) чередует части разных файлов, и мелкие
+        файлы не простаивают за крупными. Проверка skip_if_exists и хэширование
+        для метаданных выполняются в отдельном пуле потоков, который сам ставит
+        файл в очередь загрузки: подготовка одних файлов идет одновременно
+        с передачей других, в порядке готовности, а не обхода.
+
         :param local_directory: Локальная директория для загрузки
         :param s3_prefix: Префикс пути в S3 (например, 'uploads/')
         :param bucket_name: Название S3 бакета (опционально, если установлен default_bucket)
         :param skip_if_exists: Если True, не загружать файлы, которые уже существуют и не изменились
+        :param max_workers: Число потоков проверки и хэширования файлов (по умолчанию DEFAULT_UPLOAD_WORKERS)
+        :param use_async: Если True, загрузить через upload_directory_async (требуется aioboto3)
         :return: Словарь со статистикой: {'uploaded': int, 'skipped': int, 'errors': int}
         """
+        if use_async:
+            return asyncio.run(self.upload_directory_async(
+                local_directory, s3_prefix, bucket_name, skip_if_exists
+            ))
+
         bucket = self._resolve_bucket(bucket_name)
         
         if not os.path.isdir(local_directory):
-            print(f"Ошибка: {local_directory} не является директорией.")
+            _LOGGER.error("Ошибка: %s не является директорией.", local_directory)
             return {'uploaded': 0, 'skipped': 0, 'errors': 1}
 
         stats = {'uploaded': 0, 'skipped': 0, 'errors': 0}
 
-        all_files = []
-        for root, dirs, files in os.walk(local_directory):
-            for file in files:
-                local_file_path = os.path.join(root, file)
-                relative_path = os.path.relpath(local_file_path, local_directory)
-                s3_key = os.path.join(s3_prefix, relative_path).replace("\\", "/")
-                all_files.append((local_file_path, s3_key))
-        
-        total_files = len(all_files)
-        print(f"Найдено {total_files} файлов для загрузки.")
+        manager = self._get_directory_transfer_manager()
+        # Состояние всех объектов под префиксом запрашивается одним листингом
+        s3_index = self._index_prefix(bucket, s3_prefix) if skip_if_exists else None
 
-        for i, (local_file_path, s3_key) in enumerate(all_files):
-            if not os.path.exists(local_file_path):
-                print(f"Предупреждение: файл {local_file_path} не найден, пропускаем.")
-                stats['errors'] += 1
-                continue
+        def queue_upload(local_file_path, s3_key, local_stat):
+            # Проверка, хэширование для метаданных и постановка в очередь загрузки
+            # выполняются в потоке пула и идут одновременно с передачей других файлов
+            if skip_if_exists and self._files_are_equal(local_file_path, bucket, s3_key,
+                                                        s3_index=s3_index, local_stat=local_stat):
+                return None
+            self._invalidate_head_cache(bucket, s3_key)
+            extra_args = self._upload_extra_args(local_file_path, local_stat)
+            return manager.upload(local_file_path, bucket, s3_key, extra_args=extra_args)
 
-            upload_status = self._upload_file_with_status(local_file_path, s3_key, bucket, skip_if_exists)
-            
-            if upload_status == 'uploaded':
+        transfers = []
+        with ThreadPoolExecutor(max_workers=max_workers or DEFAULT_UPLOAD_WORKERS) as executor:
+            # Файлы передаются в пул по мере обхода: проверки и загрузки начинаются,
+            # не дожидаясь, пока будет обойдена вся директория
+            queued = {
+                executor.submit(queue_upload, *item): item
+                for item in self._iter_directory_files(local_directory, s3_prefix)
+            }
+            for future in as_completed(queued):
+                local_file_path, s3_key, local_stat = queued[future]
+                try:
+                    transfer = future.result()
+                except Exception as e:
+                    _LOGGER.error("Ошибка загрузки файла %s: %s", local_file_path, e)
+                    stats['errors'] += 1
+                    continue
+                if transfer is None:
+                    stats['skipped'] += 1
+                else:
+                    transfers.append((local_file_path, s3_key, local_stat, transfer))
+
+        total_files = len(queued)
+        _LOGGER.info("Найдено %s файлов, в очереди на загрузку: %s", total_files, len(transfers))
+
+        processed = total_files - len(transfers)
+        for local_file_path, s3_key, local_stat, transfer in transfers:
+            try:
+                transfer.result()
                 stats['uploaded'] += 1
-            elif upload_status == 'skipped':
-                stats['skipped'] += 1
-            elif upload_status == 'error':
+                self._remember_upload(bucket, s3_key, local_file_path, local_stat)
+            except Exception as e:
+                _LOGGER.error("Ошибка загрузки файла %s: %s", local_file_path, e)
                 stats['errors'] += 1
-            
-            print(f"Обработано {i+1}/{total_files} файлов")
 
-        print(f"Загрузка завершена. Загружено: {stats['uploaded']}, Пропущено: {stats['skipped']}, Ошибок: {stats['errors']}")
+            processed += 1
+            _LOGGER.debug("Обработано %s/%s файлов", processed, total_files)
+
+        _LOGGER.info("Загрузка завершена. Загружено: %s, Пропущено: %s, Ошибок: %s",
+                     stats['uploaded'], stats['skipped'], stats['errors'])
         return stats
 
-    def _upload_file_with_status(self, local_file_path, s3_key, bucket, skip_if_exists=False):
+    async def upload_directory_async(self, local_directory, s3_prefix='', bucket_name=None,
+                                     skip_if_exists=False, max_concurrency=DEFAULT_ASYNC_CONCURRENCY):
         """
-        Внутренний метод загрузки файла, возвращающий статус операции.
+        Асинхронная загрузка всей директории в S3 через aioboto3.
+
+        Загрузка выполняется AsyncS3Uploader поверх этого экземпляра: все запросы
+        идут через один асинхронный клиент с общим пулом соединений, число
+        одновременных загрузок ограничено семафором.
+
+        :param local_directory: Локальная директория для загрузки
+        :param s3_prefix: Префикс пути в S3 (например, 'uploads/')
+        :param bucket_name: Название S3 бакета (опционально, если установлен default_bucket)
+        :param skip_if_exists: Если True, не загружать файлы, которые уже существуют и не изменились
+        :param max_concurrency: Максимальное число одновременных загрузок
+        :return: Словарь со статистикой: {'uploaded': int, 'skipped': int, 'errors': int}
+        :raises ImportError: Если пакет aioboto3 не установлен
         """
-        try:
-            if not os.path.exists(local_file_path):
-                return 'error'
+        # Локальный импорт: async_s3 сам импортирует этот модуль
+        from .async_s3 import AsyncS3Uploader
 
-            if skip_if_exists:
-                if self._files_are_equal(local_file_path, bucket, s3_key):
-                    return 'skipped'
+        async with AsyncS3Uploader.from_uploader(self, max_concurrency) as async_uploader:
+            return await async_uploader.upload_directory(local_directory, s3_prefix, bucket_name,
+                                                         skip_if_exists)
 
-            self.s3_client.upload_file(local_file_path, bucket, s3_key)
-            return 'uploaded'
-            
-        except Exception:
-            return 'error'
+    @staticmethod
+    def _iter_directory_files(local_directory, s3_prefix):
+        """
+        Обход файлов директории с построением ключей S3.
+
+        :param local_directory: Локальная директория
+        :param s3_prefix: Префикс пути в S3
+        :return: Генератор кортежей (local_file_path, s3_key, local_stat)
+        """
+        if s3_prefix and not s3_prefix.endswith('/'):
+            s3_prefix += '/'
+        return S3Uploader._iter_files(local_directory, s3_prefix)
+
+    @staticmethod
+    def _iter_files(base_directory, key_prefix=''):
+        """
+        Обход директории через os.scandir без рекурсии.
+
+        DirEntry хранит тип записи из readdir, поэтому, в отличие от os.walk
+        с os.path.relpath, обход не делает лишних stat и разбора путей на файл.
+        Результат DirEntry.stat() передается дальше, чтобы сравнение и загрузка
+        не вызывали os.stat повторно. Ключ строится срезом пути записи после
+        корня и конкатенацией с префиксом; на системах с разделителем '/'
+        замена разделителей не выполняется.
+
+        :param base_directory: Корневая директория
+        :param key_prefix: Префикс, добавляемый к относительному пути (уже с '/' на конце)
+        :return: Генератор кортежей (путь к файлу, key_prefix + относительный путь через '/',
+                 os.stat_result или None, если stat не удался)
+        """
+        base_length = len(os.path.join(base_directory, ''))
+        separator = os.sep if os.sep != '/' else None
+        stack = [base_directory]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        try:
+                            local_stat = entry.stat()
+                        except OSError:
+                            # Файл удален во время обхода: ошибка проявится при загрузке
+                            local_stat = None
+                        path = entry.path
+                        relative_path = path[base_length:]
+                        if separator:
+                            relative_path = relative_path.replace(separator, '/')
+                        yield path, key_prefix + relative_path, local_stat
 
     def download_file(self, s3_key, local_file_path, bucket_name=None):
         """
@@ -269,10 +1114,11 @@ class S3Uploader:
         try:
             # Создание директории, если она не существует
             os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
-            self.s3_client.download_file(bucket, s3_key, local_file_path)
-            print(f"Файл успешно скачан из {self._get_s3_url(bucket, s3_key)} в {local_file_path}")
+            self.s3_client.download_file(bucket, s3_key, local_file_path,
+                                         Config=self.download_config)
+            _LOGGER.info("Файл успешно скачан из %s в %s", self._get_s3_url(bucket, s3_key), local_file_path)
         except ClientError as e:
-            print(f"Ошибка скачивания файла: {e}")
+            _LOGGER.error("Ошибка скачивания файла: %s", e)
 
     def list_files(self, prefix='', bucket_name=None):
         """
@@ -282,18 +1128,31 @@ class S3Uploader:
         :param bucket_name: Название S3 бакета (опционально, если установлен default_bucket)
         :return: Список ключей файлов
         """
-        bucket = self._resolve_bucket(bucket_name)
-        
         try:
-            response = self.s3_client.list_objects_v2(Bucket=bucket, Prefix=prefix)
-            if 'Contents' in response:
-                return [obj['Key'] for obj in response['Contents']]
-            else:
-                return []
+            return list(self.iter_keys(prefix, bucket_name))
         except ClientError as e:
-            print(f"Ошибка получения списка файлов: {e}")
+            _LOGGER.error("Ошибка получения списка файлов: %s", e)
             return []
 
+    def iter_keys(self, prefix='', bucket_name=None):
+        """
+        Постраничный обход ключей в бакете с опциональным префиксом.
+
+        Один запрос list_objects_v2 возвращает не больше 1000 ключей, поэтому страницы
+        запрашиваются по мере потребления: первые ключи доступны до получения
+        последней страницы, а в памяти находится одна страница.
+
+        :param prefix: Префикс для фильтрации файлов
+        :param bucket_name: Название S3 бакета (опционально, если установлен default_bucket)
+        :return: Генератор ключей файлов
+        :raises ClientError: При ошибке запроса страницы
+        """
+        bucket = self._resolve_bucket(bucket_name)
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                yield obj['Key']
+
     def delete_file(self, s3_key, bucket_name=None):
         """
         Удаление файла из S3.
@@ -305,14 +1164,66 @@ class S3Uploader:
         
         try:
             self.s3_client.delete_object(Bucket=bucket, Key=s3_key)
-            print(f"Файл {s3_key} успешно удален из бакета {bucket}")
+            _LOGGER.info("Файл %s успешно удален из бакета %s", s3_key, bucket)
         except ClientError as e:
-            print(f"Ошибка удаления файла: {e}")
+            _LOGGER.error("Ошибка удаления файла: %s", e)
+        finally:
+            self._invalidate_head_cache(bucket, s3_key)
+            self._forget_uploads(bucket, [s3_key])
+
+    def delete_files(self, s3_keys, bucket_name=None):
+        """
+        Удаление набора файлов из S3 пакетами delete_objects по DELETE_BATCH_SIZE ключей.
+
+        Один запрос на пакет вместо delete_object на каждый файл. Пакеты отправляются
+        в режиме Quiet: S3 возвращает только ошибки, а не список всех удаленных ключей.
+
+        :param s3_keys: Итерируемый набор ключей объектов (например, генератор)
+        :param bucket_name: Название S3 бакета (опционально, если установлен default_bucket)
+        :return: Словарь со статистикой: {'deleted': int, 'errors': int}
+        """
+        bucket = self._resolve_bucket(bucket_name)
+        deleted_count = 0
+        error_count = 0
+
+        keys = iter(s3_keys)
+        while True:
+            batch = list(islice(keys, DELETE_BATCH_SIZE))
+            if not batch:
+                break
+            for s3_key in batch:
+                self._invalidate_head_cache(bucket, s3_key)
+            self._forget_uploads(bucket, batch)
+
+            try:
+                delete_response = self.s3_client.delete_objects(
+                    Bucket=bucket,
+                    Delete={
+                        'Objects': [{'Key': s3_key} for s3_key in batch],
+                        'Quiet': True
+                    }
+                )
+            except ClientError as e:
+                _LOGGER.error("Ошибка при батчевом удалении: %s", e)
+                error_count += len(batch)
+                continue
+
+            errors = delete_response.get('Errors', [])
+            for error in errors:
+                _LOGGER.error("Ошибка удаления файла %s: %s", error['Key'], error['Message'])
+            error_count += len(errors)
+            deleted_count += len(batch) - len(errors)
+            _LOGGER.debug("Удалено %s файлов, ошибок: %s", deleted_count, error_count)
+
+        return {'deleted': deleted_count, 'errors': error_count}
 
     def delete_all_files_in_directory(self, prefix='', bucket_name=None, confirm=False):
         """
         Удаление всех файлов в директории бакета.
 
+        Ключи обходятся постранично через iter_keys и удаляются пакетами по мере
+        получения страниц, поэтому удаляются все файлы, а не первые 1000.
+
         :param prefix: Префикс директории для удаления файлов (например, 'folder/')
         :param bucket_name: Название S3 бакета (опционально, если установлен default_bucket)
         :param confirm: Подтверждение выполнения операции (по умолчанию False)
@@ -328,53 +1239,17 @@ class S3Uploader:
                 return {'deleted': 0, 'errors': 0}
         
         try:
-            response = self.s3_client.list_objects_v2(Bucket=bucket, Prefix=prefix)
-            
-            if 'Contents' not in response:
-                print(f"Директория '{prefix}' пуста или не существует в бакете '{bucket}'")
-                return {'deleted': 0, 'errors': 0}
-            
-            files_to_delete = response['Contents']
-            total_files = len(files_to_delete)
-            print(f"Найдено {total_files} файлов для удаления.")
-            
-            objects_to_delete = [{'Key': obj['Key']} for obj in files_to_delete]
-            
-            deleted_count = 0
-            error_count = 0
-            
-            batch_size = 1000
-            for i in range(0, len(objects_to_delete), batch_size):
-                batch = objects_to_delete[i:i + batch_size]
-                
-                try:
-                    delete_response = self.s3_client.delete_objects(
-                        Bucket=bucket,
-                        Delete={
-                            'Objects': batch,
-                            'Quiet': False
-                        }
-                    )
-                    
-                    if 'Deleted' in delete_response:
-                        deleted_count += len(delete_response['Deleted'])
-                    
-                    if 'Errors' in delete_response:
-                        error_count += len(delete_response['Errors'])
-                        for error in delete_response['Errors']:
-                            print(f"Ошибка удаления файла {error['Key']}: {error['Message']}")
-                
-                except ClientError as e:
-                    print(f"Ошибка при батчевом удалении: {e}")
-                    error_count += len(batch)
-                
-                print(f"Удалено {deleted_count}/{total_files} файлов")
-            
-            print(f"Удаление завершено. Удалено: {deleted_count}, Ошибок: {error_count}")
-            return {'deleted': deleted_count, 'errors': error_count}
+            stats = self.delete_files(self.iter_keys(prefix, bucket), bucket)
+
+            if stats['deleted'] == 0 and stats['errors'] == 0:
+                _LOGGER.info("Директория '%s' пуста или не существует в бакете '%s'", prefix, bucket)
+                return stats
+
+            _LOGGER.info("Удаление завершено. Удалено: %s, Ошибок: %s", stats['deleted'], stats['errors'])
+            return stats
             
         except ClientError as e:
-            print(f"Ошибка получения списка файлов для удаления: {e}")
+            _LOGGER.error("Ошибка получения списка файлов для удаления: %s", e)
             return {'deleted': 0, 'errors': 1}
 
     def _get_s3_url(self, bucket_name, s3_key):
@@ -398,17 +1273,30 @@ class S3Uploader:
         :param bucket_name: Название бакета (опционально, если установлен default_bucket)
         """
         bucket = self._resolve_bucket(bucket_name)
-        
+
+        # Дешевая проверка существования вместо заведомо неудачного CreateBucket
+        try:
+            self.s3_client.head_bucket(Bucket=bucket)
+            _LOGGER.info("Бакет %s уже существует", bucket)
+            return
+        except ClientError as e:
+            if e.response['Error']['Code'] == '403':
+                _LOGGER.info("Бакет %s уже существует", bucket)
+                return
+            # 404 и прочие ошибки: пробуем создать, обработчики ниже
+            # остаются на случай гонки с параллельным созданием
+
+        # Классы исключений, сгенерированные botocore по модели S3
+        exceptions = self.s3_client.exceptions
         try:
             self.s3_client.create_bucket(Bucket=bucket)
-            print(f"Бакет {bucket} успешно создан")
+            _LOGGER.info("Бакет %s успешно создан", bucket)
+        except exceptions.BucketAlreadyExists:
+            _LOGGER.info("Бакет %s уже существует", bucket)
+        except exceptions.BucketAlreadyOwnedByYou:
+            _LOGGER.info("Бакет %s уже принадлежит вам", bucket)
         except ClientError as e:
-            if e.response['Error']['Code'] == 'BucketAlreadyExists':
-                print(f"Бакет {bucket} уже существует")
-            elif e.response['Error']['Code'] == 'BucketAlreadyOwnedByYou':
-                print(f"Бакет {bucket} уже принадлежит вам")
-            else:
-                print(f"Ошибка создания бакета: {e}")
+            _LOGGER.error("Ошибка создания бакета: %s", e)
 
     def list_buckets(self):
         """
@@ -421,5 +1309,5 @@ class S3Uploader:
             buckets = [bucket['Name'] for bucket in response['Buckets']]
             return buckets
         except ClientError as e:
-            print(f"Ошибка получения списка бакетов: {e}")
+            _LOGGER.error("Ошибка получения списка бакетов: %s", e)
             return []
\ No newline at end of file
@@ -29,11 +29,19 @@ setup(
     extras_require={
         "dev": [
             "pytest>=7.0.0",
+            "pytest-asyncio>=1.1.0",
             "pytest-mock>=3.6.0",
+            "pytest-xdist>=3.0.0",
             "pytest-cov>=4.0.0",
             "moto>=4.0.0",
             "black",
             "flake8",
-        ]
+        ],
+        "async": [
+            "aioboto3>=12.0.0",
+        ],
+        "xxhash": [
+            "xxhash>=3.0.0",
+        ],
     },
 )
\ No newline at end of file
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+import pandas as pd
+
+
+# Тестовые DataFrame строятся один раз при импорте, с явными типами колонок:
+# тесты их только читают
+_SAMPLE_DF = pd.DataFrame({
+    'id': np.arange(1, 4, dtype='int64'),
+    'name': pd.array(['Alice', 'Bob', 'Charlie'], dtype='string'),
+    'age': np.array([25, 30, 35], dtype='int64')
+})
+
+# Тот же набор данных, ID которого вынесен в индекс user_id
+_SAMPLE_DF_USER_ID = _SAMPLE_DF.drop(columns='id').set_index(pd.Index([1, 2, 3], name='user_id'))
+
+
+@pytest.fixture(scope="session")
+def sample_dataframe():
+    """Фикстура с тестовым DataFrame для тестов коннекторов."""
+    return _SAMPLE_DF
+
+
+@pytest.fixture(scope="session")
+def sample_dataframe_with_ids():
+    """Фикстура с тестовым DataFrame, индекс которого содержит ID (user_id)."""
+    return _SAMPLE_DF_USER_ID
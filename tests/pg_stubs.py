@@ -0,0 +1,163 @@
+"""
+Заглушки соединений psycopg2 и asyncpg для тестов коннекторов PostgreSQL.
+
+Используются вместо MagicMock/AsyncMock: вызовы записываются в обычный список,
+без ленивого создания дочерних моков на каждое обращение к атрибуту.
+"""
+import pandas as pd
+
+
+CONNECTOR_KWARGS = {
+    'dbname': 'test_db',
+    'user': 'test_user',
+    'password': 'test_password',
+    'host': 'localhost',
+    'port': 5432,
+    'debug': False,
+}
+
+# Пустые DataFrame: методы коннекторов только проверяют df.empty и не изменяют их
+EMPTY_DF = pd.DataFrame()
+EMPTY_DF_USER_ID = pd.DataFrame(index=pd.Index([], name='user_id'))
+
+
+class CallRecorder:
+    """Базовая заглушка: записывает вызовы методов в список calls."""
+    __slots__ = ('calls', 'errors')
+
+    def __init__(self):
+        self.calls = []
+        # Исключения, которые должен выбросить вызов метода с данным именем
+        self.errors = {}
+
+    def _record(self, name, *args):
+        self.calls.append((name, args))
+        error = self.errors.get(name)
+        if error is not None:
+            raise error
+
+
+def recorded_calls(stub, name):
+    """
+    Аргументы всех вызовов метода заглушки.
+
+    :param stub: Заглушка соединения или курсора
+    :param name: Имя метода
+    :return: Список кортежей аргументов в порядке вызовов
+    """
+    return [args for called, args in stub.calls if called == name]
+
+
+class StubCursor(CallRecorder):
+    """Заглушка курсора psycopg2."""
+    __slots__ = ('rows', 'description')
+
+    def __init__(self):
+        super().__init__()
+        self.rows = []
+        self.description = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return None
+
+    def execute(self, query, params=None):
+        self._record('execute', query, params)
+
+    def executemany(self, query, params_list):
+        self._record('executemany', query, params_list)
+
+    def fetchall(self):
+        self._record('fetchall')
+        return self.rows
+
+    def copy_expert(self, query, buffer):
+        # Буфер закрывается после выхода из insert_dataframe, поэтому данные читаются сразу
+        self._record('copy_expert', query, buffer.read())
+
+
+class StubConnection(CallRecorder):
+    """Заглушка соединения psycopg2."""
+    __slots__ = ('closed', 'cursor_stub')
+
+    def __init__(self):
+        super().__init__()
+        self.closed = False
+        self.cursor_stub = StubCursor()
+
+    def cursor(self):
+        return self.cursor_stub
+
+    def commit(self):
+        self._record('commit')
+
+    def rollback(self):
+        self._record('rollback')
+
+    def close(self):
+        self._record('close')
+        self.closed = True
+
+
+class StubTransaction:
+    """Заглушка транзакции asyncpg: пустой асинхронный контекстный менеджер."""
+    __slots__ = ()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return None
+
+
+TRANSACTION = StubTransaction()
+
+
+class StubAsyncConnection(CallRecorder):
+    """Заглушка соединения asyncpg."""
+    __slots__ = ('closed', 'rows', 'copied')
+
+    def __init__(self):
+        super().__init__()
+        self.closed = False
+        self.rows = []
+        # Куски CSV, прочитанные copy_to_table из source
+        self.copied = []
+
+    def is_closed(self):
+        return self.closed
+
+    def transaction(self):
+        self._record('transaction')
+        return TRANSACTION
+
+    async def execute(self, query, *args):
+        self._record('execute', query, *args)
+
+    async def executemany(self, query, args):
+        self._record('executemany', query, args)
+
+    async def fetch(self, query, *args):
+        self._record('fetch', query, *args)
+        return self.rows
+
+    async def copy_to_table(self, table_name, **kwargs):
+        self._record('copy_to_table', table_name, kwargs)
+        async for chunk in kwargs['source']:
+            self.copied.append(chunk)
+
+    async def copy_records_to_table(self, table_name, **kwargs):
+        self._record('copy_records_to_table', table_name, kwargs)
+
+    async def close(self):
+        self._record('close')
+        self.closed = True
+
+
+def raising(error):
+    """Функция-подмена connect, выбрасывающая исключение при вызове"""
+    def connect(**kwargs):
+        raise error
+    return connect
@@ -0,0 +1,225 @@
+import asyncio
+import hashlib
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, call, patch
+
+import pytest
+
+from data_utils.s3 import async_s3 as async_s3_module
+from data_utils.s3 import s3 as s3_module
+from data_utils.s3.async_s3 import AsyncS3Uploader
+
+
+def _fake_aioboto3(async_client, pages=()):
+    """Мок модуля aioboto3 с асинхронным клиентом и постраничным листингом."""
+    async def paginate(**kwargs):
+        for page in pages:
+            yield page
+
+    async_client.get_paginator = MagicMock()
+    async_client.get_paginator.return_value.paginate = MagicMock(side_effect=paginate)
+
+    client_cm = MagicMock()
+    client_cm.__aenter__ = AsyncMock(return_value=async_client)
+    client_cm.__aexit__ = AsyncMock(return_value=None)
+
+    fake_module = MagicMock()
+    fake_module.Session.return_value.client.return_value = client_cm
+    return fake_module
+
+
+class TestAsyncS3Uploader:
+    """Тесты для класса AsyncS3Uploader."""
+
+    @pytest.fixture
+    def async_client(self):
+        """Мок асинхронного клиента aioboto3."""
+        client = MagicMock()
+        client.upload_file = AsyncMock()
+        client.download_file = AsyncMock()
+        client.head_object = AsyncMock()
+        client.delete_objects = AsyncMock(return_value={})
+        return client
+
+    @pytest.fixture
+    def pages(self):
+        """Страницы листинга list_objects_v2, возвращаемые моком клиента."""
+        return []
+
+    @pytest.fixture
+    def fake_aioboto3(self, async_client, pages):
+        """Подмена модуля aioboto3 в async_s3."""
+        fake_module = _fake_aioboto3(async_client, pages)
+        with patch.object(async_s3_module, "aioboto3", fake_module), \
+                patch.object(async_s3_module, "AioConfig", MagicMock()):
+            yield fake_module
+
+    @pytest.fixture
+    def uploader(self, fake_aioboto3):
+        """Фикстура, создающая экземпляр AsyncS3Uploader с мокированными клиентами."""
+        s3_module._cached_session_client.cache_clear()
+        with patch("data_utils.s3.s3.boto3.session.Session"):
+            yield AsyncS3Uploader("test_key", "test_secret", default_bucket="test-bucket")
+        s3_module._cached_session_client.cache_clear()
+
+    def test_requires_aioboto3(self):
+        """Тест ошибки при отсутствии пакета aioboto3."""
+        with patch.object(async_s3_module, "aioboto3", None):
+            with pytest.raises(ImportError, match="aioboto3"):
+                AsyncS3Uploader("key", "secret")
+
+    async def test_client_opened_once_and_closed(self, uploader, fake_aioboto3, async_client):
+        """Тест: все запросы идут через один клиент, который закрывается при выходе из async with."""
+        async with uploader:
+            await uploader.list_files()
+            await uploader.list_files()
+
+        fake_aioboto3.Session.return_value.client.assert_called_once()
+        client_cm = fake_aioboto3.Session.return_value.client.return_value
+        client_cm.__aexit__.assert_awaited_once()
+        assert uploader._client is None
+
+    async def test_client_opened_once_concurrently(self, uploader, fake_aioboto3):
+        """Тест: одновременные первые запросы открывают один клиент."""
+        client_cm = fake_aioboto3.Session.return_value.client.return_value
+        opened = client_cm.__aenter__.return_value
+
+        async def slow_enter():
+            await asyncio.sleep(0)
+            return opened
+
+        client_cm.__aenter__ = AsyncMock(side_effect=slow_enter)
+
+        clients = await asyncio.gather(*(uploader._get_client() for _ in range(5)))
+
+        assert all(client is opened for client in clients)
+        fake_aioboto3.Session.return_value.client.assert_called_once()
+        client_cm.__aenter__.assert_awaited_once()
+
+    async def test_upload_file_botocore_error(self, uploader, async_client, tmp_path, caplog):
+        """Тест: сетевая ошибка botocore дает статус 'error', а не исключение."""
+        from botocore.exceptions import EndpointConnectionError
+
+        local_path = tmp_path / "file.txt"
+        local_path.write_text("content")
+        async_client.upload_file.side_effect = EndpointConnectionError(endpoint_url="https://s3")
+
+        status = await uploader.upload_file(str(local_path), "key.txt")
+
+        assert status == 'error'
+        assert "Ошибка загрузки файла" in caplog.text
+
+    async def test_upload_file(self, uploader, async_client, tmp_path):
+        """Тест загрузки одного файла."""
+        local_path = tmp_path / "file.txt"
+        local_path.write_text("content")
+
+        status = await uploader.upload_file(str(local_path), "key.txt")
+
+        assert status == 'uploaded'
+        async_client.upload_file.assert_awaited_once_with(
+            str(local_path), "test-bucket", "key.txt",
+            ExtraArgs=uploader._uploader._upload_extra_args(str(local_path))
+        )
+
+    async def test_upload_file_invalidates_head_cache(self, uploader, async_client, tmp_path):
+        """Тест: загрузка сбрасывает закэшированный head_object общего загрузчика."""
+        local_path = tmp_path / "file.txt"
+        local_path.write_text("content")
+        uploader._uploader._head_cache[("test-bucket", "key.txt")] = None
+
+        await uploader.upload_file(str(local_path), "key.txt")
+
+        assert ("test-bucket", "key.txt") not in uploader._uploader._head_cache
+
+    async def test_upload_file_skip_if_exists(self, uploader, async_client, tmp_path):
+        """Тест пропуска файла, совпадающего с объектом в S3 по head_object."""
+        local_path = tmp_path / "file.txt"
+        local_path.write_bytes(b"content")
+        async_client.head_object.return_value = {
+            "ContentLength": 7,
+            "ETag": f'"{hashlib.md5(b"content").hexdigest()}"',
+            "LastModified": datetime(2000, 1, 1),
+        }
+
+        status = await uploader.upload_file(str(local_path), "key.txt", skip_if_exists=True)
+
+        assert status == 'skipped'
+        async_client.upload_file.assert_not_awaited()
+
+    async def test_upload_file_not_found(self, uploader, async_client, caplog):
+        """Тест загрузки несуществующего файла."""
+        status = await uploader.upload_file("/non/existent/file.txt", "key.txt")
+
+        assert status == 'error'
+        assert "не найден" in caplog.text
+        async_client.upload_file.assert_not_awaited()
+
+    @pytest.mark.parametrize("pages", [[{'Contents': [{
+        'Key': 'p/same.txt', 'Size': 4, 'ETag': f'"{hashlib.md5(b"same").hexdigest()}"',
+        'LastModified': datetime(2000, 1, 1)
+    }]}]])
+    async def test_upload_directory_skip_if_exists(self, uploader, async_client, tmp_path):
+        """Тест загрузки директории с пропуском файлов, совпадающих с листингом."""
+        (tmp_path / "same.txt").write_text("same")
+        (tmp_path / "new.txt").write_text("new")
+
+        stats = await uploader.upload_directory(str(tmp_path), s3_prefix="p", skip_if_exists=True)
+
+        assert stats == {'uploaded': 1, 'skipped': 1, 'errors': 0}
+        async_client.get_paginator.return_value.paginate.assert_called_once_with(
+            Bucket="test-bucket", Prefix="p"
+        )
+        async_client.head_object.assert_not_awaited()
+        assert async_client.upload_file.call_args.args[2] == "p/new.txt"
+
+    async def test_upload_directory_not_a_directory(self, uploader, tmp_path):
+        """Тест загрузки пути, не являющегося директорией."""
+        stats = await uploader.upload_directory(str(tmp_path / "missing"))
+
+        assert stats == {'uploaded': 0, 'skipped': 0, 'errors': 1}
+
+    @pytest.mark.parametrize("pages", [[
+        {'Contents': [{'Key': 'a'}, {'Key': 'b'}]},
+        {'Contents': [{'Key': 'c'}]},
+        {},
+    ]])
+    async def test_list_files(self, uploader):
+        """Тест получения списка файлов со всех страниц листинга."""
+        assert await uploader.list_files("prefix/") == ["a", "b", "c"]
+
+    async def test_download_file(self, uploader, async_client, tmp_path):
+        """Тест скачивания файла с созданием директории."""
+        local_path = tmp_path / "sub" / "file.txt"
+
+        await uploader.download_file("key.txt", str(local_path))
+
+        async_client.download_file.assert_awaited_once_with("test-bucket", "key.txt", str(local_path))
+        assert local_path.parent.is_dir()
+
+    async def test_delete_files_batches(self, uploader, async_client):
+        """Тест удаления пакетами по DELETE_BATCH_SIZE ключей."""
+        async_client.delete_objects.side_effect = [
+            {},
+            {'Errors': [{'Key': 'k2', 'Message': 'Access Denied'}]},
+        ]
+
+        with patch.object(async_s3_module, "DELETE_BATCH_SIZE", 2):
+            result = await uploader.delete_files(f"k{i}" for i in range(3))
+
+        assert result == {'deleted': 2, 'errors': 1}
+        async_client.delete_objects.assert_has_awaits([
+            call(Bucket="test-bucket",
+                 Delete={'Objects': [{'Key': 'k0'}, {'Key': 'k1'}], 'Quiet': True}),
+            call(Bucket="test-bucket", Delete={'Objects': [{'Key': 'k2'}], 'Quiet': True}),
+        ])
+
+    async def test_delete_files_invalidates_head_cache(self, uploader, async_client):
+        """Тест: удаление сбрасывает закэшированный head_object удаленных ключей."""
+        uploader._uploader._head_cache[("test-bucket", "k0")] = None
+        uploader._uploader._head_cache[("test-bucket", "other")] = None
+
+        await uploader.delete_files(["k0"])
+
+        assert ("test-bucket", "k0") not in uploader._uploader._head_cache
+        assert ("test-bucket", "other") in uploader._uploader._head_cache
@@ -1,10 +1,19 @@
 import pytest
 import pandas as pd
 import io
+import pyarrow as pa
+import pyarrow.parquet as pq
 from unittest.mock import MagicMock, patch, ANY
+from botocore.exceptions import ClientError
+from data_utils.parquet_loader import parquet_loader as parquet_loader_module
 from data_utils.parquet_loader.parquet_loader import ParquetUploader
 
 
+def no_such_key():
+    """Ошибка S3 об отсутствии объекта."""
+    return ClientError({'Error': {'Code': 'NoSuchKey', 'Message': 'Not found'}}, 'GetObject')
+
+
 class TestParquetUploader:
     """Тесты для класса ParquetUploader."""
 
@@ -46,52 +55,133 @@ class TestParquetUploader:
         s3_key = 'data/test.parquet'
         bucket_name = 'my-bucket'
 
-        with patch('data_utils.parquet_loader.parquet_loader.tempfile.NamedTemporaryFile') as mock_tempfile:
-            mock_temp_file_instance = MagicMock()
-            mock_temp_file_instance.name = '/tmp/mock_file.parquet'
-            mock_tempfile.return_value.__enter__.return_value = mock_temp_file_instance
-            mock_tempfile.return_value.__exit__.return_value = None
+        uploaded = []
+        mock_s3_uploader.upload_fileobj.side_effect = lambda fileobj, **kwargs: uploaded.append(fileobj.read())
 
-            with patch('data_utils.parquet_loader.parquet_loader.os.unlink') as mock_unlink:
-                parquet_uploader.upload_dataframe(sample_dataframe, s3_key, bucket_name)
+        parquet_uploader.upload_dataframe(sample_dataframe, s3_key, bucket_name)
 
-                mock_tempfile.assert_called_once_with(suffix='.parquet', delete=False)
+        mock_s3_uploader.upload_fileobj.assert_called_once_with(
+            fileobj=ANY,
+            s3_key=s3_key,
+            bucket_name=bucket_name,
+            skip_if_exists=False
+        )
 
-                mock_temp_file_instance.write.assert_called()
+        # В S3 уходит буфер с валидным Parquet, спозиционированный на начало
+        pd.testing.assert_frame_equal(pd.read_parquet(io.BytesIO(uploaded[0])), sample_dataframe)
+        mock_s3_uploader.upload_file.assert_not_called()
 
-                mock_s3_uploader.upload_file.assert_called_once_with(
-                    local_file_path='/tmp/mock_file.parquet',
-                    s3_key=s3_key,
-                    bucket_name=bucket_name,
-                    skip_if_exists=False
-                )
+    @pytest.mark.parametrize("spool_max_size, rolled", [(1, True), (None, False)])
+    def test_upload_dataframe_spool_max_size(self, mock_s3_uploader, sample_dataframe,
+                                             spool_max_size, rolled):
+        """Тест порога сброса буфера на диск: None держит весь файл в памяти."""
+        uploader = ParquetUploader(mock_s3_uploader, spool_max_size=spool_max_size)
+        rolled_states = []
+        mock_s3_uploader.upload_fileobj.side_effect = \
+            lambda fileobj, **kwargs: rolled_states.append(fileobj._rolled)
 
-                mock_unlink.assert_called_once_with('/tmp/mock_file.parquet')
+        uploader.upload_dataframe(sample_dataframe, 'data/test.parquet')
+
+        assert rolled_states == [rolled]
 
     def test_upload_dataframe_with_kwargs(self, parquet_uploader, mock_s3_uploader, sample_dataframe):
         """Тест загрузки DataFrame с дополнительными параметрами."""
         s3_key = 'data/test.parquet'
         parquet_kwargs = {'compression': 'gzip'}
 
-        with patch('data_utils.parquet_loader.parquet_loader.tempfile.NamedTemporaryFile'):
-             with patch('data_utils.parquet_loader.parquet_loader.os.unlink'):
-
-                with patch.object(sample_dataframe, 'to_parquet') as mock_to_parquet:
-                    parquet_uploader.upload_dataframe(sample_dataframe, s3_key, parquet_kwargs=parquet_kwargs)
-
-                    args, kwargs = mock_to_parquet.call_args
-                    assert kwargs.get('compression') == 'gzip'
-                    assert kwargs.get('index') is False
-
-    def test_upload_dataframe_exception(self, parquet_uploader, sample_dataframe, capsys):
-        """Тест обработки исключения при загрузке DataFrame."""
+        with patch.object(sample_dataframe, 'to_parquet') as mock_to_parquet:
+            parquet_uploader.upload_dataframe(sample_dataframe, s3_key, parquet_kwargs=parquet_kwargs)
+
+            args, kwargs = mock_to_parquet.call_args
+            assert kwargs.get('compression') == 'gzip'
+            assert kwargs.get('index') is False
+
+    def test_upload_dataframe_default_kwargs(self, parquet_uploader, sample_dataframe):
+        """Тест параметров записи Parquet по умолчанию (pyarrow + zstd)."""
+        with patch.object(sample_dataframe, 'to_parquet') as mock_to_parquet:
+            parquet_uploader.upload_dataframe(sample_dataframe, 'data/test.parquet')
+
+            args, kwargs = mock_to_parquet.call_args
+            assert kwargs['engine'] == 'pyarrow'
+            assert kwargs['compression'] == 'zstd'
+            assert kwargs['compression_level'] == 3
+            assert kwargs['row_group_size'] == 500_000
+            assert kwargs['use_dictionary'] is True
+
+    def test_upload_dataframe_codec_override(self, mock_s3_uploader, sample_dataframe):
+        """Тест переопределения кодека без уровня сжатия (snappy)."""
+        uploader = ParquetUploader(mock_s3_uploader, parquet_defaults={'row_group_size': 1000})
+
+        with patch.object(sample_dataframe, 'to_parquet') as mock_to_parquet:
+            uploader.upload_dataframe(sample_dataframe, 'data/test.parquet',
+                                      parquet_kwargs={'compression': 'snappy'})
+
+            args, kwargs = mock_to_parquet.call_args
+            assert kwargs['compression'] == 'snappy'
+            assert 'compression_level' not in kwargs
+            assert kwargs['row_group_size'] == 1000
+
+    def test_parquet_defaults_codec_override(self, mock_s3_uploader, sample_dataframe):
+        """Тест: кодек без уровня сжатия в parquet_defaults отменяет уровень по умолчанию."""
+        uploader = ParquetUploader(mock_s3_uploader, parquet_defaults={'compression': 'snappy'})
+
+        assert uploader.parquet_defaults['compression'] == 'snappy'
+        assert 'compression_level' not in uploader.parquet_defaults
+        # Реальная сериализация: с уровнем сжатия snappy вызвал бы ArrowInvalid
+        uploader.upload_dataframe(sample_dataframe, 'data/test.parquet')
+        mock_s3_uploader.upload_fileobj.assert_called_once()
+
+    @pytest.mark.parametrize("operation, keys_disjoint", [
+        ('append', None), ('upsert', True), ('upsert', False),
+    ])
+    def test_parquet_defaults_compression_wins_over_presets(self, mock_s3_uploader, operation,
+                                                           keys_disjoint):
+        """Тест: сжатие из parquet_defaults используется в append и в обеих ветках upsert."""
+        uploader = ParquetUploader(mock_s3_uploader, parquet_defaults={'compression': 'gzip'})
+        uploaded = []
+        mock_s3_uploader.upload_fileobj.side_effect = lambda fileobj, **kwargs: uploaded.append(fileobj.read())
+        new_df = pd.DataFrame({'id': [3], 'val': ['C']})
+        existing_table = pa.table({'id': [1, 2], 'val': ['A', 'B']})
+
+        with patch.object(uploader, 'download_dataframe', return_value=existing_table), \
+                patch.object(uploader, '_list_parts', return_value=['data/events/part-1.parquet']), \
+                patch.object(uploader, '_read_parts_table', return_value=existing_table), \
+                patch.object(uploader, '_keys_disjoint', return_value=keys_disjoint):
+            if operation == 'append':
+                uploader.append_dataframe(new_df, 'data/file.parquet')
+            else:
+                uploader.upsert_dataframe(new_df, 'data/events/', ['id'])
+
+        [data] = uploaded
+        metadata = pq.read_metadata(io.BytesIO(data))
+        assert metadata.row_group(0).column(0).compression == 'GZIP'
+
+    @pytest.mark.parametrize("codec, expected", [
+        ('fast', {'compression': 'snappy'}),
+        ('balanced', {'compression': 'zstd', 'compression_level': 3}),
+        ('max', {'compression': 'zstd', 'compression_level': 15}),
+    ])
+    def test_codec_presets(self, mock_s3_uploader, codec, expected):
+        """Тест применения пресетов сжатия к параметрам по умолчанию."""
+        uploader = ParquetUploader(mock_s3_uploader, codec=codec)
+
+        kwargs = uploader._build_parquet_kwargs()
+
+        assert kwargs['compression'] == expected['compression']
+        assert kwargs.get('compression_level') == expected.get('compression_level')
+
+    def test_codec_unknown(self, mock_s3_uploader):
+        """Тест ошибки при неизвестном пресете сжатия."""
+        with pytest.raises(ValueError):
+            ParquetUploader(mock_s3_uploader, codec='ultra')
+
+    def test_upload_dataframe_exception(self, parquet_uploader, sample_dataframe):
+        """Тест проброса исключения при загрузке DataFrame."""
         s3_key = 'data/test.parquet'
         # Мокаем to_parquet, чтобы он выбрасывал исключение
         with patch.object(sample_dataframe, 'to_parquet', side_effect=Exception("Test error")):
-            parquet_uploader.upload_dataframe(sample_dataframe, s3_key)
-
-        captured = capsys.readouterr()
-        assert "Ошибка загрузки DataFrame: Test error" in captured.out
+            with pytest.raises(Exception, match="Test error"):
+                parquet_uploader.upload_dataframe(sample_dataframe, s3_key)
 
     # Тесты для upload_tuples
 
@@ -127,15 +217,13 @@ class TestParquetUploader:
             expected_df = pd.DataFrame(data)
             pd.testing.assert_frame_equal(df_arg, expected_df)
 
-    def test_upload_tuples_exception(self, parquet_uploader, capsys):
-        """Тест обработки исключения при загрузке кортежей."""
+    def test_upload_tuples_exception(self, parquet_uploader):
+        """Тест проброса исключения при загрузке кортежей."""
         data = [(1, 'a')]
         s3_key = 'data/error.parquet'
         with patch('data_utils.parquet_loader.parquet_loader.pd.DataFrame', side_effect=Exception("DataFrame error")):
-            parquet_uploader.upload_tuples(data, s3_key)
-
-        captured = capsys.readouterr()
-        assert "Ошибка загрузки данных кортежей: DataFrame error" in captured.out
+            with pytest.raises(Exception, match="DataFrame error"):
+                parquet_uploader.upload_tuples(data, s3_key)
 
     # Тесты для download_dataframe
 
@@ -149,30 +237,39 @@ class TestParquetUploader:
         buffer.seek(0)
         parquet_bytes = buffer.getvalue()
 
-        def mock_download_fileobj(bucket, key, target_buffer):
-            target_buffer.write(parquet_bytes)
-            target_buffer.seek(0)
-
-        mock_s3_uploader.s3_client.download_fileobj.side_effect = mock_download_fileobj
+        mock_s3_uploader.s3_client.get_object.return_value = {'Body': io.BytesIO(parquet_bytes)}
         mock_s3_uploader._resolve_bucket.return_value = bucket_name
 
         result_df = parquet_uploader.download_dataframe(s3_key, bucket_name)
 
         assert result_df is not None
         pd.testing.assert_frame_equal(result_df, test_df)
-        mock_s3_uploader.s3_client.download_fileobj.assert_called_once_with(bucket_name, s3_key, ANY)
+        mock_s3_uploader.s3_client.get_object.assert_called_once_with(Bucket=bucket_name, Key=s3_key)
+
+    def test_download_dataframe_columns_and_filters(self, parquet_uploader, mock_s3_uploader):
+        """Тест скачивания DataFrame с выбором колонок и фильтрацией строк."""
+        test_df = pd.DataFrame({'A': [1, 2, 3], 'B': [3, 4, 5], 'C': ['x', 'y', 'z']})
+        buffer = io.BytesIO()
+        test_df.to_parquet(buffer, index=False)
 
-    def test_download_dataframe_exception(self, parquet_uploader, mock_s3_uploader, capsys):
-        """Тест обработки исключения при скачивании DataFrame."""
+        mock_s3_uploader.s3_client.get_object.return_value = {'Body': io.BytesIO(buffer.getvalue())}
+
+        result_df = parquet_uploader.download_dataframe(
+            'data/download.parquet', 'download-bucket',
+            columns=['A', 'C'], filters=[('A', '>', 1)]
+        )
+
+        expected_df = pd.DataFrame({'A': [2, 3], 'C': ['y', 'z']})
+        pd.testing.assert_frame_equal(result_df, expected_df)
+
+    def test_download_dataframe_exception(self, parquet_uploader, mock_s3_uploader):
+        """Тест проброса исключения при скачивании DataFrame."""
         s3_key = 'data/error_download.parquet'
-        mock_s3_uploader.s3_client.download_fileobj.side_effect = Exception("Download error")
+        mock_s3_uploader.s3_client.get_object.side_effect = Exception("Download error")
         mock_s3_uploader._resolve_bucket.return_value = 'error-bucket'
 
-        result_df = parquet_uploader.download_dataframe(s3_key, 'error-bucket')
-
-        assert result_df is None
-        captured = capsys.readouterr()
-        assert "Ошибка скачивания DataFrame: Download error" in captured.out
+        with pytest.raises(Exception, match="Download error"):
+            parquet_uploader.download_dataframe(s3_key, 'error-bucket')
 
     # Тесты для dataframe_to_s3_url
 
@@ -201,11 +298,13 @@ class TestParquetUploader:
         s3_key = 'data/append_new.parquet'
         bucket_name = 'append-bucket'
 
-        with patch.object(parquet_uploader, 'download_dataframe', side_effect=Exception("File not found")):
+        with patch.object(parquet_uploader, 'download_dataframe', side_effect=no_such_key()):
             with patch.object(parquet_uploader, 'upload_dataframe') as mock_upload_df:
                 result_df = parquet_uploader.append_dataframe(new_df, s3_key, bucket_name)
 
-                mock_upload_df.assert_called_once_with(new_df, s3_key, bucket_name, parquet_kwargs=None)
+                mock_upload_df.assert_called_once_with(
+                    new_df, s3_key, bucket_name, parquet_kwargs={'compression': 'snappy'}
+                )
                 pd.testing.assert_frame_equal(result_df, new_df)
 
     def test_append_dataframe_existing_file(self, parquet_uploader, mock_s3_uploader):
@@ -216,33 +315,48 @@ class TestParquetUploader:
 
         s3_key = 'data/append_existing.parquet'
 
-        with patch.object(parquet_uploader, 'download_dataframe', return_value=existing_df):
-            with patch.object(parquet_uploader, 'upload_dataframe') as mock_upload_df:
+        existing_table = pa.Table.from_pandas(existing_df, preserve_index=False)
+        with patch.object(parquet_uploader, 'download_dataframe', return_value=existing_table) as mock_download:
+            with patch.object(parquet_uploader, 'upload_table') as mock_upload_table:
                 result_df = parquet_uploader.append_dataframe(new_df, s3_key)
 
                 pd.testing.assert_frame_equal(result_df, expected_combined_df)
+                mock_download.assert_called_once_with(s3_key, None, as_arrow=True)
 
-                mock_upload_df.assert_called_once()
-                args, kwargs = mock_upload_df.call_args
-                uploaded_df = args[0]
-                pd.testing.assert_frame_equal(uploaded_df, expected_combined_df)
+                mock_upload_table.assert_called_once()
+                args, kwargs = mock_upload_table.call_args
+                uploaded_table = args[0]
+                pd.testing.assert_frame_equal(uploaded_table.to_pandas(), expected_combined_df)
 
-    def test_append_dataframe_exception(self, parquet_uploader, mock_s3_uploader, capsys):
-        """Тест обработки исключения при добавлении DataFrame."""
+    def test_append_dataframe_missing_file_logged(self, parquet_uploader, mock_s3_uploader, caplog):
+        """Тест: отсутствие файла при добавлении логируется, файл создается."""
         new_df = pd.DataFrame({'C': [99]})
         s3_key = 'data/append_error.parquet'
 
-        with patch.object(parquet_uploader, 'download_dataframe', side_effect=Exception("Read error")):
+        with patch.object(parquet_uploader, 'download_dataframe', side_effect=no_such_key()):
             with patch.object(parquet_uploader, 'upload_dataframe') as mock_upload_df:
-                result_df = parquet_uploader.append_dataframe(new_df, s3_key)
+                with caplog.at_level('INFO', logger='data_utils.parquet_loader.parquet_loader'):
+                    result_df = parquet_uploader.append_dataframe(new_df, s3_key)
 
-                mock_upload_df.assert_called_once_with(new_df, s3_key, None, parquet_kwargs=None)
+                mock_upload_df.assert_called_once_with(
+                    new_df, s3_key, None, parquet_kwargs={'compression': 'snappy'}
+                )
                 pd.testing.assert_frame_equal(result_df, new_df)
+                assert "Файл data/append_error.parquet не существует, создаем новый" in caplog.text
 
-                captured = capsys.readouterr()
-                assert "Файл data/append_error.parquet не существует, создаем новый" in captured.out
+    def test_append_dataframe_read_error_propagates(self, parquet_uploader, mock_s3_uploader):
+        """Тест: сбой чтения существующего файла не приводит к его перезаписи."""
+        new_df = pd.DataFrame({'C': [99]})
+        read_error = ClientError({'Error': {'Code': 'SlowDown', 'Message': 'Reduce rate'}}, 'GetObject')
 
-    # Тесты для upsert_dataframe и _perform_upsert
+        with patch.object(parquet_uploader, 'download_dataframe', side_effect=read_error):
+            with patch.object(parquet_uploader, 'upload_dataframe') as mock_upload_df:
+                with pytest.raises(ClientError):
+                    parquet_uploader.append_dataframe(new_df, 'data/append.parquet')
+
+        mock_upload_df.assert_not_called()
+
+    # Тесты для upsert_dataframe и _perform_upsert_table
 
     def test_upsert_dataframe_new_file(self, parquet_uploader, mock_s3_uploader):
         """Тест upsert в несуществующий файл (создание нового)."""
@@ -250,11 +364,13 @@ class TestParquetUploader:
         s3_key = 'data/upsert_new.parquet'
         key_columns = ['id']
 
-        with patch.object(parquet_uploader, 'download_dataframe', return_value=None):
-             with patch.object(parquet_uploader, 'upload_dataframe') as mock_upload_df:
+        with patch.object(parquet_uploader, 'download_dataframe', side_effect=no_such_key()):
+            with patch.object(parquet_uploader, 'upload_dataframe') as mock_upload_df:
                 result_df = parquet_uploader.upsert_dataframe(new_df, s3_key, key_columns)
 
-                mock_upload_df.assert_called_once_with(new_df, s3_key, None, parquet_kwargs=None)
+                mock_upload_df.assert_called_once_with(
+                    new_df, s3_key, None, parquet_kwargs={'compression': 'zstd', 'compression_level': 3}
+                )
                 pd.testing.assert_frame_equal(result_df, new_df)
 
     def test_upsert_dataframe_success(self, parquet_uploader, mock_s3_uploader):
@@ -267,24 +383,228 @@ class TestParquetUploader:
         s3_key = 'data/upsert.parquet'
         key_columns = ['id']
 
-        with patch.object(parquet_uploader, 'download_dataframe', return_value=existing_df):
-            with patch.object(parquet_uploader, 'upload_dataframe') as mock_upload_df:
+        existing_table = pa.Table.from_pandas(existing_df, preserve_index=False)
+        with patch.object(parquet_uploader, 'download_dataframe', return_value=existing_table):
+            with patch.object(parquet_uploader, 'upload_table') as mock_upload_table:
                 result_df = parquet_uploader.upsert_dataframe(new_df, s3_key, key_columns)
 
-                assert result_df is not None
+                pd.testing.assert_frame_equal(result_df, expected_df)
                 # Проверяем, что upload был вызван
-                mock_upload_df.assert_called_once()
+                mock_upload_table.assert_called_once()
 
-    def test_perform_upsert_success(self, parquet_uploader):
-        """Тест внутреннего метода _perform_upsert."""
-        existing_df = pd.DataFrame({'id': [1, 2, 3], 'val': ['A', 'B', 'C']})
-        new_df = pd.DataFrame({'id': [1, 4], 'val': ['A_updated', 'D']})
-        key_columns = ['id']
+    def test_perform_upsert_table_single_key(self, parquet_uploader):
+        """Тест _perform_upsert_table с одной ключевой колонкой."""
+        existing = pa.table({'id': [1, 2, 3], 'val': ['A', 'B', 'C']})
+        new = pa.table({'id': [1, 4], 'val': ['A_updated', 'D']})
+
+        result = parquet_uploader._perform_upsert_table(existing, new, ['id'])
+
+        assert result.to_pydict() == {'id': [2, 3, 1, 4], 'val': ['B', 'C', 'A_updated', 'D']}
+
+    def test_perform_upsert_table_composite_keys(self, parquet_uploader):
+        """Тест _perform_upsert_table с составным ключом: порядок существующих строк сохраняется."""
+        existing = pa.table({'k1': [2, 1, 1, 2], 'k2': ['a', 'a', 'b', 'b'], 'val': [30, 10, 20, 50]})
+        new = pa.table({'k1': [1, 2], 'k2': ['b', 'b'], 'val': [21, 40]})
+
+        result = parquet_uploader._perform_upsert_table(existing, new, ['k1', 'k2'])
+
+        assert result.to_pydict() == {'k1': [2, 1, 1, 2], 'k2': ['a', 'a', 'b', 'b'], 'val': [30, 10, 21, 40]}
 
-        result_df = parquet_uploader._perform_upsert(existing_df, new_df, key_columns)
+    def test_perform_upsert_table_integer_composite_keys(self, parquet_uploader):
+        """Тест _perform_upsert_table с целочисленным составным ключом (векторный путь NumPy)."""
+        existing = pa.table({'k1': [2, 1, 1, 2], 'k2': pa.array([1, 1, 2, 2], pa.int32()),
+                             'val': [30, 10, 20, 50]})
+        new = pa.table({'k1': [1, 2], 'k2': [2, 2], 'val': [21, 40]})
 
-        # Проверяем результат: id=1 обновлен, id=2 и 3 остались, id=4 добавлен
-        # Используем sort_values для стабильного сравнения
-        result_sorted = result_df.sort_values('id').reset_index(drop=True)
-        expected_sorted = pd.DataFrame({'id': [1, 2, 3, 4], 'val': ['A_updated', 'B', 'C', 'D']}).sort_values('id').reset_index(drop=True)
-        pd.testing.assert_frame_equal(result_sorted, expected_sorted)
+        with patch.object(parquet_loader_module, '_integer_keys_superseded',
+                          wraps=parquet_loader_module._integer_keys_superseded) as mock_superseded:
+            result = parquet_uploader._perform_upsert_table(existing, new, ['k1', 'k2'])
+
+        mock_superseded.assert_called_once()
+        assert result.to_pydict() == {'k1': [2, 1, 1, 2], 'k2': [1, 1, 2, 2], 'val': [30, 10, 21, 40]}
+
+    def test_integer_keys_superseded(self):
+        """Тест упакованной проверки вхождения: пропуски и нецелые ключи идут через join."""
+        existing = pa.table({'k1': [1, 1, 2], 'k2': [1, 2, 1]})
+        new = pa.table({'k1': [1, 2], 'k2': [2, 2]})
+
+        mask = parquet_loader_module._integer_keys_superseded(existing, new, ['k1', 'k2'])
+
+        assert mask.tolist() == [False, True, False]
+        with_nulls = pa.table({'k1': [1, None], 'k2': [2, 2]})
+        assert parquet_loader_module._integer_keys_superseded(existing, with_nulls, ['k1', 'k2']) is None
+        strings = pa.table({'k1': [1], 'k2': ['a']})
+        assert parquet_loader_module._integer_keys_superseded(existing, strings, ['k1', 'k2']) is None
+
+    def test_perform_upsert_table_promotes_types(self, parquet_uploader):
+        """Тест _perform_upsert_table с расширением типа колонки (int64 и double)."""
+        existing = pa.table({'id': [1, 2], 'val': [1, 2]})
+        new = pa.table({'id': [2], 'val': [2.5]})
+
+        result = parquet_uploader._perform_upsert_table(existing, new, ['id'])
+
+        assert result.schema.field('val').type == pa.float64()
+        assert result.to_pydict() == {'id': [1, 2], 'val': [1.0, 2.5]}
+
+    def test_perform_upsert_table_missing_keys(self, parquet_uploader):
+        """Тест _perform_upsert_table при отсутствии ключевой колонки."""
+        existing = pa.table({'id': [1]})
+        new = pa.table({'other': [1]})
+
+        with pytest.raises(ValueError):
+            parquet_uploader._perform_upsert_table(existing, new, ['id'])
+
+    # Тесты для проверки пересечения ключей по статистикам
+
+    @staticmethod
+    def _ranged_get_object(data):
+        """Эмуляция get_object с поддержкой Range вида bytes=-N."""
+        def get_object(Bucket, Key, Range=None):
+            body = data
+            if Range is not None:
+                body = data[-int(Range.split('-')[1]):]
+            return {'Body': io.BytesIO(body)}
+        return get_object
+
+    def test_keys_disjoint(self, parquet_uploader, mock_s3_uploader):
+        """Тест определения непересекающихся диапазонов ключей по футеру файла."""
+        buffer = io.BytesIO()
+        pq.write_table(pa.table({'id': list(range(100)), 'val': ['x'] * 100}), buffer, row_group_size=30)
+        mock_s3_uploader.s3_client.get_object.side_effect = self._ranged_get_object(buffer.getvalue())
+
+        disjoint_df = pd.DataFrame({'id': [100, 150], 'val': ['a', 'b']})
+        overlapping_df = pd.DataFrame({'id': [99, 150], 'val': ['a', 'b']})
+
+        assert parquet_uploader._keys_disjoint(disjoint_df, 'b', ['id'], ['k']) is True
+        assert parquet_uploader._keys_disjoint(overlapping_df, 'b', ['id'], ['k']) is False
+        # Читается только хвост файла
+        _, kwargs = mock_s3_uploader.s3_client.get_object.call_args
+        assert kwargs['Range'] == 'bytes=-65536'
+
+    def test_keys_disjoint_large_footer(self, parquet_uploader, mock_s3_uploader):
+        """Тест дочитывания футера, не поместившегося в первый запрос."""
+        buffer = io.BytesIO()
+        pq.write_table(pa.table({'id': list(range(100))}), buffer)
+        data = buffer.getvalue()
+        mock_s3_uploader.s3_client.get_object.side_effect = self._ranged_get_object(data)
+
+        with patch('data_utils.parquet_loader.parquet_loader.FOOTER_PROBE_SIZE', 16):
+            assert parquet_uploader._keys_disjoint(pd.DataFrame({'id': [-5]}), 'b', ['id'], ['k']) is True
+
+        assert mock_s3_uploader.s3_client.get_object.call_count == 2
+
+    def test_keys_disjoint_probe_error(self, parquet_uploader, mock_s3_uploader):
+        """Тест: при ошибке чтения метаданных пересечение не исключается."""
+        mock_s3_uploader.s3_client.get_object.side_effect = no_such_key()
+
+        assert parquet_uploader._keys_disjoint(pd.DataFrame({'id': [1]}), 'b', ['id'], ['k']) is False
+
+    def test_keys_disjoint_unexpected_error_propagates(self, parquet_uploader, mock_s3_uploader):
+        """Тест: непредвиденная ошибка не скрывается за полным путем upsert."""
+        with patch.object(parquet_uploader, '_read_metadata', side_effect=KeyError('bug')):
+            with pytest.raises(KeyError):
+                parquet_uploader._keys_disjoint(pd.DataFrame({'id': [1]}), 'b', ['id'], ['k'])
+
+    def test_upsert_dataframe_single_object_skips_footer_probe(self, parquet_uploader, mock_s3_uploader):
+        """Тест: для одного объекта футер не читается - файл все равно переписывается целиком."""
+        existing_table = pa.table({'id': [1], 'val': ['A']})
+
+        with patch.object(parquet_uploader, '_keys_disjoint') as mock_disjoint, \
+                patch.object(parquet_uploader, 'download_dataframe', return_value=existing_table), \
+                patch.object(parquet_uploader, 'upload_table'):
+            parquet_uploader.upsert_dataframe(pd.DataFrame({'id': [5], 'val': ['E']}),
+                                              'data/upsert.parquet', ['id'])
+
+        mock_disjoint.assert_not_called()
+
+    def test_upsert_dataframe_disjoint_keys_appends(self, parquet_uploader, mock_s3_uploader):
+        """Тест: при непересекающихся ключах upsert в каталог сводится к append новой части."""
+        new_df = pd.DataFrame({'id': [10], 'val': ['J']})
+
+        with patch.object(parquet_uploader, '_list_parts', return_value=['data/events/part-1.parquet']), \
+                patch.object(parquet_uploader, '_keys_disjoint', return_value=True):
+            with patch.object(parquet_uploader, 'append_dataframe', return_value=new_df) as mock_append:
+                with patch.object(parquet_uploader, '_perform_upsert_table') as mock_upsert:
+                    result_df = parquet_uploader.upsert_dataframe(new_df, 'data/events/', ['id'])
+
+        mock_append.assert_called_once_with(
+            new_df, 'data/events/', None,
+            parquet_kwargs={'compression': 'zstd', 'compression_level': 3}, codec='balanced'
+        )
+        mock_upsert.assert_not_called()
+        assert result_df is new_df
+
+    # Тесты для наборов данных из нескольких частей
+
+    @staticmethod
+    def _parquet_bytes(df):
+        """Сериализация DataFrame в байты Parquet."""
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+
+    def test_append_dataframe_dataset_writes_part(self, parquet_uploader, mock_s3_uploader):
+        """Тест: append в каталог загружает только новую часть без чтения старых."""
+        new_df = pd.DataFrame({'A': [1]})
+
+        with patch.object(parquet_uploader, 'download_dataframe') as mock_download:
+            with patch.object(parquet_uploader, 'upload_dataframe') as mock_upload_df:
+                result_df = parquet_uploader.append_dataframe(new_df, 'data/events/')
+
+        mock_download.assert_not_called()
+        args, kwargs = mock_upload_df.call_args
+        assert args[0] is new_df
+        assert args[1].startswith('data/events/part-') and args[1].endswith('.parquet')
+        assert result_df is new_df
+
+    def test_new_part_keys_are_ordered(self, parquet_uploader):
+        """Тест: ключи частей уникальны и упорядочены по времени создания."""
+        keys = [parquet_uploader._new_part_key('p/') for _ in range(3)]
+
+        assert len(set(keys)) == 3
+        assert keys == sorted(keys)
+
+    def test_download_dataframe_dataset(self, parquet_uploader, mock_s3_uploader):
+        """Тест чтения каталога: все части объединяются, посторонние объекты пропускаются."""
+        parts = {
+            'data/events/part-1-a.parquet': self._parquet_bytes(pd.DataFrame({'A': [1, 2]})),
+            'data/events/part-2-b.parquet': self._parquet_bytes(pd.DataFrame({'A': [3]})),
+        }
+        paginator = mock_s3_uploader.s3_client.get_paginator.return_value
+        paginator.paginate.return_value = [{'Contents': [
+            {'Key': 'data/events/part-2-b.parquet'},
+            {'Key': 'data/events/_SUCCESS'},
+            {'Key': 'data/events/nested/part-3-c.parquet'},
+            {'Key': 'data/events/part-1-a.parquet'},
+        ]}]
+        mock_s3_uploader.s3_client.get_object.side_effect = (
+            lambda Bucket, Key: {'Body': io.BytesIO(parts[Key])}
+        )
+
+        result_df = parquet_uploader.download_dataframe('data/events/')
+
+        pd.testing.assert_frame_equal(result_df, pd.DataFrame({'A': [1, 2, 3]}))
+        paginator.paginate.assert_called_once_with(Bucket=ANY, Prefix='data/events/')
+
+    def test_upsert_dataframe_dataset_replaces_parts(self, parquet_uploader, mock_s3_uploader):
+        """Тест upsert в каталог: результат пишется новой частью, старые удаляются."""
+        existing_table = pa.table({'id': [1, 2], 'val': ['A', 'B']})
+        new_df = pd.DataFrame({'id': [2], 'val': ['B_new']})
+        old_parts = ['data/events/part-1-a.parquet', 'data/events/part-2-b.parquet']
+
+        with patch.object(parquet_uploader, '_list_parts', return_value=old_parts) as mock_list, \
+                patch.object(parquet_uploader, '_keys_disjoint', return_value=False) as mock_disjoint, \
+                patch.object(parquet_uploader, '_read_parts_table', return_value=existing_table) as mock_read, \
+                patch.object(parquet_uploader, 'upload_table') as mock_upload_table:
+            result_df = parquet_uploader.upsert_dataframe(new_df, 'data/events/', ['id'], 'bucket')
+
+        # Части листингуются один раз, и этот же список проверяется, читается и удаляется
+        mock_list.assert_called_once_with('data/events/', 'bucket')
+        assert mock_disjoint.call_args.args[3] is old_parts
+        mock_read.assert_called_once_with('bucket', 'data/events/', old_parts)
+
+        pd.testing.assert_frame_equal(result_df, pd.DataFrame({'id': [1, 2], 'val': ['A', 'B_new']}))
+        uploaded_key = mock_upload_table.call_args[0][1]
+        assert uploaded_key.startswith('data/events/part-') and uploaded_key not in old_parts
+        mock_s3_uploader.delete_files.assert_called_once_with(old_parts, 'bucket')
+        mock_s3_uploader.delete_file.assert_not_called()
@@ -1,44 +1,43 @@
 import pytest
 import pandas as pd
-from unittest.mock import MagicMock, patch, AsyncMock, call
+from unittest.mock import patch
+from data_utils.pg import pg as pg_module
 from data_utils.pg.pg import SyncPostgresConnector, AsyncPostgresConnector
 import psycopg2
-import asyncpg
+from pg_stubs import CONNECTOR_KWARGS, EMPTY_DF, StubConnection, raising, recorded_calls
+
+
+@pytest.fixture
+def mock_connection():
+    """Фикстура, создающая заглушку psycopg2 connection и ее курсора."""
+    conn = StubConnection()
+    return conn, conn.cursor_stub
+
+
+@pytest.fixture(autouse=True)
+def connect_calls(monkeypatch, mock_connection):
+    """
+    Подменить psycopg2.connect на функцию, возвращающую заглушку соединения.
+
+    :return: Список kwargs всех вызовов connect
+    """
+    calls = []
+
+    def connect(**kwargs):
+        calls.append(kwargs)
+        return mock_connection[0]
+
+    monkeypatch.setattr(psycopg2, 'connect', connect)
+    return calls
 
 
 class TestSyncPostgresConnector:
     """Тесты для класса SyncPostgresConnector."""
 
-    @pytest.fixture
-    def mock_connection(self):
-        """Фикстура, создающая мок для psycopg2 connection."""
-        mock_conn = MagicMock()
-        mock_conn.closed = False
-        mock_cursor = MagicMock()
-        mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
-        mock_conn.cursor.return_value.__exit__.return_value = None
-        return mock_conn, mock_cursor
-
     @pytest.fixture
     def sync_connector(self):
         """Фикстура, создающая экземпляр SyncPostgresConnector."""
-        return SyncPostgresConnector(
-            dbname='test_db',
-            user='test_user',
-            password='test_password',
-            host='localhost',
-            port=5432,
-            debug=False
-        )
-
-    @pytest.fixture
-    def sample_dataframe(self):
-        """Фикстура с тестовым DataFrame."""
-        return pd.DataFrame({
-            'id': [1, 2, 3],
-            'name': ['Alice', 'Bob', 'Charlie'],
-            'age': [25, 30, 35]
-        })
+        return SyncPostgresConnector(**CONNECTOR_KWARGS)
 
     # Тесты для __init__
 
@@ -56,6 +55,17 @@ class TestSyncPostgresConnector:
         assert connector.config['port'] == 5432
         assert connector.conn is None
 
+    def test_init_shares_module_logger(self):
+        """Тест: коннекторы используют логгер модуля и не добавляют обработчики."""
+        handlers = list(pg_module._LOGGER.handlers)
+
+        first = SyncPostgresConnector(dbname='db', user='u', password='p')
+        second = AsyncPostgresConnector(dbname='db', user='u', password='p')
+
+        assert first.logger is pg_module._LOGGER
+        assert second.logger is pg_module._LOGGER
+        assert pg_module._LOGGER.handlers == handlers
+
     def test_init_with_custom_host_port(self):
         """Тест инициализации с кастомными хостом и портом."""
         connector = SyncPostgresConnector(
@@ -74,37 +84,64 @@ class TestSyncPostgresConnector:
         """Тест использования как контекстного менеджера."""
         mock_conn, _ = mock_connection
 
-        with patch('psycopg2.connect', return_value=mock_conn):
-            with sync_connector as conn:
-                assert conn is sync_connector
-                assert sync_connector.conn is not None
+        with sync_connector as conn:
+            assert conn is sync_connector
+            assert sync_connector.conn is mock_conn
 
-            # Проверяем, что соединение закрыто
-            mock_conn.close.assert_called_once()
+        # Проверяем, что соединение закрыто
+        assert recorded_calls(mock_conn, 'close') == [()]
 
     # Тесты для connect
 
-    def test_connect_success(self, sync_connector, mock_connection):
+    def test_connect_success(self, sync_connector, mock_connection, connect_calls):
         """Тест успешного подключения."""
         mock_conn, _ = mock_connection
 
-        with patch('psycopg2.connect', return_value=mock_conn) as mock_connect:
-            sync_connector.connect()
+        sync_connector.connect()
 
-            mock_connect.assert_called_once_with(
-                dbname='test_db',
-                user='test_user',
-                password='test_password',
-                host='localhost',
-                port=5432
-            )
-            assert sync_connector.conn == mock_conn
+        assert connect_calls == [{
+            'dbname': 'test_db',
+            'user': 'test_user',
+            'password': 'test_password',
+            'host': 'localhost',
+            'port': 5432
+        }]
+        assert sync_connector.conn is mock_conn
 
-    def test_connect_failure(self, sync_connector):
+    def test_connect_failure(self, sync_connector, monkeypatch):
         """Тест ошибки подключения."""
-        with patch('psycopg2.connect', side_effect=psycopg2.Error("Connection failed")):
-            with pytest.raises(psycopg2.Error):
-                sync_connector.connect()
+        monkeypatch.setattr(psycopg2, 'connect', raising(psycopg2.Error("Connection failed")))
+
+        with pytest.raises(psycopg2.Error):
+            sync_connector.connect()
+
+    def test_connect_pool_shared(self, mock_connection):
+        """Тест получения соединений из общего пула."""
+        mock_conn, _ = mock_connection
+        pg_module._SYNC_POOLS.clear()
+
+        with patch('data_utils.pg.pg.ThreadedConnectionPool') as mock_pool_cls:
+            mock_pool = mock_pool_cls.return_value
+            mock_pool.closed = False
+            mock_pool.getconn.return_value = mock_conn
+
+            first = SyncPostgresConnector('test_db', 'test_user', 'test_password', pool_size=5)
+            second = SyncPostgresConnector('test_db', 'test_user', 'test_password', pool_size=5)
+
+            with first:
+                assert first.conn is mock_conn
+            with second:
+                pass
+
+        # Пул создается один раз на конфигурацию, соединения возвращаются в него
+        mock_pool_cls.assert_called_once_with(
+            1, 5, dbname='test_db', user='test_user', password='test_password', host='localhost', port=5432
+        )
+        assert mock_pool.getconn.call_count == 2
+        assert mock_pool.putconn.call_count == 2
+        assert not recorded_calls(mock_conn, 'close')
+        assert first.conn is None
+        pg_module._SYNC_POOLS.clear()
 
     # Тесты для close
 
@@ -115,7 +152,7 @@ class TestSyncPostgresConnector:
 
         sync_connector.close()
 
-        mock_conn.close.assert_called_once()
+        assert recorded_calls(mock_conn, 'close') == [()]
 
     def test_close_already_closed(self, sync_connector, mock_connection):
         """Тест закрытия уже закрытого соединения."""
@@ -126,7 +163,7 @@ class TestSyncPostgresConnector:
         sync_connector.close()
 
         # Не должно вызывать close, если уже закрыто
-        mock_conn.close.assert_not_called()
+        assert not recorded_calls(mock_conn, 'close')
 
     # Тесты для execute_query
 
@@ -140,29 +177,29 @@ class TestSyncPostgresConnector:
 
         sync_connector.execute_query(query, params)
 
-        mock_cursor.execute.assert_called_once_with(query, params)
-        mock_conn.commit.assert_called_once()
+        assert recorded_calls(mock_cursor, 'execute') == [(query, params)]
+        assert recorded_calls(mock_conn, 'commit') == [()]
 
     def test_execute_query_with_fetch(self, sync_connector, mock_connection):
         """Тест выполнения запроса с получением результата."""
         mock_conn, mock_cursor = mock_connection
         sync_connector.conn = mock_conn
 
-        mock_cursor.fetchall.return_value = [(1, 'Alice'), (2, 'Bob')]
+        mock_cursor.rows = [(1, 'Alice'), (2, 'Bob')]
 
         query = "SELECT * FROM users"
         result = sync_connector.execute_query(query, fetch=True)
 
         assert result == [(1, 'Alice'), (2, 'Bob')]
-        mock_cursor.execute.assert_called_once_with(query, ())
-        mock_cursor.fetchall.assert_called_once()
+        assert recorded_calls(mock_cursor, 'execute') == [(query, ())]
+        assert recorded_calls(mock_cursor, 'fetchall') == [()]
 
     def test_execute_query_with_columns(self, sync_connector, mock_connection):
         """Тест выполнения запроса с получением имен колонок."""
         mock_conn, mock_cursor = mock_connection
         sync_connector.conn = mock_conn
 
-        mock_cursor.fetchall.return_value = [(1, 'Alice'), (2, 'Bob')]
+        mock_cursor.rows = [(1, 'Alice'), (2, 'Bob')]
         mock_cursor.description = [('id',), ('name',)]
 
         query = "SELECT id, name FROM users"
@@ -182,8 +219,8 @@ class TestSyncPostgresConnector:
 
         sync_connector.execute_query(query, params_list=params_list)
 
-        mock_cursor.executemany.assert_called_once_with(query, params_list)
-        mock_conn.commit.assert_called_once()
+        assert recorded_calls(mock_cursor, 'executemany') == [(query, params_list)]
+        assert recorded_calls(mock_conn, 'commit') == [()]
 
     def test_execute_query_no_connection(self, sync_connector):
         """Тест выполнения запроса без установленного соединения."""
@@ -195,357 +232,96 @@ class TestSyncPostgresConnector:
         mock_conn, mock_cursor = mock_connection
         sync_connector.conn = mock_conn
 
-        mock_cursor.execute.side_effect = Exception("Query error")
+        mock_cursor.errors['execute'] = Exception("Query error")
 
         with pytest.raises(Exception, match="Query error"):
             sync_connector.execute_query("SELECT * FROM nonexistent")
 
-        mock_conn.rollback.assert_called_once()
+        assert recorded_calls(mock_conn, 'rollback') == [()]
 
     # Тесты для insert_dataframe
 
     def test_insert_dataframe_success(self, sync_connector, mock_connection, sample_dataframe):
-        """Тест успешной вставки DataFrame."""
+        """Тест успешной вставки DataFrame через COPY."""
         mock_conn, mock_cursor = mock_connection
         sync_connector.conn = mock_conn
 
         with patch('data_utils.pg.pg.execute_batch') as mock_execute_batch:
-            result = sync_connector.insert_dataframe(sample_dataframe, 'test_table', page_size=100)
+            result = sync_connector.insert_dataframe(sample_dataframe, 'test_table')
 
             assert result == 3
-            mock_execute_batch.assert_called_once()
-            mock_conn.commit.assert_called_once()
+            mock_execute_batch.assert_not_called()
+            assert recorded_calls(mock_conn, 'commit') == [()]
 
-    def test_insert_dataframe_empty(self, sync_connector):
-        """Тест вставки пустого DataFrame."""
-        empty_df = pd.DataFrame()
-        result = sync_connector.insert_dataframe(empty_df, 'test_table')
-
-        assert result == 0
+        [(query, data)] = recorded_calls(mock_cursor, 'copy_expert')
+        assert isinstance(query, psycopg2.sql.Composed)
+        assert data == b"1\tAlice\t25\n2\tBob\t30\n3\tCharlie\t35\n"
 
-    def test_insert_dataframe_exception(self, sync_connector, mock_connection, sample_dataframe):
-        """Тест обработки исключения при вставке DataFrame."""
+    def test_insert_dataframe_with_nulls(self, sync_connector, mock_connection):
+        """Тест вставки DataFrame с пропусками через COPY."""
         mock_conn, mock_cursor = mock_connection
         sync_connector.conn = mock_conn
+        df = pd.DataFrame({'id': [1, 2], 'name': ['Alice', None]})
 
-        with patch('data_utils.pg.pg.execute_batch', side_effect=Exception("Insert error")):
-            with pytest.raises(Exception, match="Insert error"):
-                sync_connector.insert_dataframe(sample_dataframe, 'test_table')
+        sync_connector.insert_dataframe(df, 'test_table')
 
-            mock_conn.rollback.assert_called_once()
+        assert [data for _, data in recorded_calls(mock_cursor, 'copy_expert')] == [b"1\tAlice\n2\t\\N\n"]
 
+    def test_insert_dataframe_execute_batch(self, sync_connector, mock_connection, sample_dataframe):
+        """Тест вставки DataFrame построчными INSERT (use_copy=False)."""
+        mock_conn, mock_cursor = mock_connection
+        sync_connector.conn = mock_conn
 
-class TestAsyncPostgresConnector:
-    """Тесты для класса AsyncPostgresConnector."""
-
-    @pytest.fixture
-    def mock_async_connection(self):
-        """Фикстура, создающая мок для asyncpg connection."""
-        mock_conn = AsyncMock()
-        mock_conn.is_closed = MagicMock(return_value=False)
-        return mock_conn
+        with patch('data_utils.pg.pg.execute_batch') as mock_execute_batch:
+            result = sync_connector.insert_dataframe(sample_dataframe, 'test_table', page_size=100, use_copy=False)
 
-    @pytest.fixture
-    def async_connector(self):
-        """Фикстура, создающая экземпляр AsyncPostgresConnector."""
-        return AsyncPostgresConnector(
-            dbname='test_db',
-            user='test_user',
-            password='test_password',
-            host='localhost',
-            port=5432,
-            debug=False
-        )
+            assert result == 3
+            mock_execute_batch.assert_called_once()
+            assert not recorded_calls(mock_cursor, 'copy_expert')
+            assert recorded_calls(mock_conn, 'commit') == [()]
 
-    @pytest.fixture
-    def sample_dataframe(self):
-        """Фикстура с тестовым DataFrame."""
-        return pd.DataFrame({
+    def test_insert_dataframe_execute_batch_nulls(self, sync_connector, mock_connection):
+        """Тест замены пропусков на None при вставке через execute_batch."""
+        mock_conn, _ = mock_connection
+        sync_connector.conn = mock_conn
+        df = pd.DataFrame({
             'id': [1, 2, 3],
-            'name': ['Alice', 'Bob', 'Charlie'],
-            'age': [25, 30, 35]
+            'score': [1.5, float('nan'), 3.5],
+            'name': pd.array(['Alice', pd.NA, 'Charlie'], dtype='string')
         })
 
-    # Тесты для __init__
-
-    def test_init_basic(self):
-        """Тест базовой инициализации AsyncPostgresConnector."""
-        connector = AsyncPostgresConnector(
-            dbname='my_db',
-            user='my_user',
-            password='my_pass'
-        )
-        assert connector.config['database'] == 'my_db'
-        assert connector.config['user'] == 'my_user'
-        assert connector.config['password'] == 'my_pass'
-        assert connector.config['host'] == 'localhost'
-        assert connector.config['port'] == 5432
-        assert connector.conn is None
-
-    def test_init_with_custom_host_port(self):
-        """Тест инициализации с кастомными хостом и портом."""
-        connector = AsyncPostgresConnector(
-            dbname='my_db',
-            user='my_user',
-            password='my_pass',
-            host='remote.host.com',
-            port=5433
-        )
-        assert connector.config['host'] == 'remote.host.com'
-        assert connector.config['port'] == 5433
-
-    # Тесты для async context manager
-
-    @pytest.mark.asyncio
-    async def test_async_context_manager(self, async_connector, mock_async_connection):
-        """Тест использования как асинхронного контекстного менеджера."""
-        with patch('asyncpg.connect', return_value=mock_async_connection):
-            async with async_connector as conn:
-                assert conn is async_connector
-                assert async_connector.conn is not None
-
-            # Проверяем, что соединение закрыто
-            mock_async_connection.close.assert_called_once()
-
-    # Тесты для connect
-
-    @pytest.mark.asyncio
-    async def test_connect_success(self, async_connector, mock_async_connection):
-        """Тест успешного асинхронного подключения."""
-        with patch('asyncpg.connect', return_value=mock_async_connection) as mock_connect:
-            await async_connector.connect()
-
-            mock_connect.assert_called_once_with(
-                database='test_db',
-                user='test_user',
-                password='test_password',
-                host='localhost',
-                port=5432
-            )
-            assert async_connector.conn == mock_async_connection
-
-    @pytest.mark.asyncio
-    async def test_connect_failure(self, async_connector):
-        """Тест ошибки асинхронного подключения."""
-        with patch('asyncpg.connect', side_effect=Exception("Connection failed")):
-            with pytest.raises(Exception, match="Connection failed"):
-                await async_connector.connect()
-
-    # Тесты для close
-
-    @pytest.mark.asyncio
-    async def test_close_connection(self, async_connector, mock_async_connection):
-        """Тест закрытия асинхронного соединения."""
-        async_connector.conn = mock_async_connection
-
-        await async_connector.close()
-
-        mock_async_connection.close.assert_called_once()
-
-    @pytest.mark.asyncio
-    async def test_close_already_closed(self, async_connector, mock_async_connection):
-        """Тест закрытия уже закрытого асинхронного соединения."""
-        mock_async_connection.is_closed.return_value = True
-        async_connector.conn = mock_async_connection
-
-        await async_connector.close()
-
-        # Не должно вызывать close, если уже закрыто
-        mock_async_connection.close.assert_not_called()
-
-    # Тесты для execute_query
-
-    @pytest.mark.asyncio
-    async def test_execute_query_simple(self, async_connector, mock_async_connection):
-        """Тест выполнения простого асинхронного запроса."""
-        async_connector.conn = mock_async_connection
-
-        query = "INSERT INTO test_table (name) VALUES ($1)"
-        params = ['test_value']
-
-        await async_connector.execute_query(query, params)
-
-        mock_async_connection.execute.assert_called_once_with(query, 'test_value')
-
-    @pytest.mark.asyncio
-    async def test_execute_query_with_fetch(self, async_connector, mock_async_connection):
-        """Тест выполнения асинхронного запроса с получением результата."""
-        async_connector.conn = mock_async_connection
-
-        mock_result = [{'id': 1, 'name': 'Alice'}, {'id': 2, 'name': 'Bob'}]
-        mock_async_connection.fetch.return_value = mock_result
-
-        query = "SELECT * FROM users"
-        result = await async_connector.execute_query(query, fetch=True)
-
-        assert result == mock_result
-        mock_async_connection.fetch.assert_called_once_with(query)
-
-    @pytest.mark.asyncio
-    async def test_execute_query_exception(self, async_connector, mock_async_connection):
-        """Тест обработки исключения при выполнении асинхронного запроса."""
-        async_connector.conn = mock_async_connection
-
-        mock_async_connection.execute.side_effect = Exception("Query error")
-
-        with pytest.raises(Exception, match="Query error"):
-            await async_connector.execute_query("SELECT * FROM nonexistent")
-
-    # Тесты для insert_dataframe
-
-    @pytest.mark.asyncio
-    async def test_insert_dataframe_success(self, async_connector, mock_async_connection, sample_dataframe):
-        """Тест успешной асинхронной вставки DataFrame с COPY."""
-        async_connector.conn = mock_async_connection
-
-        result = await async_connector.insert_dataframe(sample_dataframe, 'test_table', 'public', batch_size=100)
-
-        assert result == 3
-        mock_async_connection.copy_to_table.assert_called_once()
-
-    @pytest.mark.asyncio
-    async def test_insert_dataframe_empty(self, async_connector):
-        """Тест асинхронной вставки пустого DataFrame."""
-        empty_df = pd.DataFrame()
-        result = await async_connector.insert_dataframe(empty_df, 'test_table', 'public')
-
-        assert result == 0
-
-    @pytest.mark.asyncio
-    async def test_insert_dataframe_exception(self, async_connector, mock_async_connection, sample_dataframe):
-        """Тест обработки исключения при асинхронной вставке DataFrame."""
-        async_connector.conn = mock_async_connection
-        mock_async_connection.copy_to_table.side_effect = Exception("Insert error")
-
-        with pytest.raises(Exception, match="Insert error"):
-            await async_connector.insert_dataframe(sample_dataframe, 'test_table', 'public')
-
-    # Тесты для insert_dataframe_executemany
-
-    @pytest.mark.asyncio
-    async def test_insert_dataframe_executemany_success(self, async_connector, mock_async_connection, sample_dataframe):
-        """Тест успешной асинхронной вставки DataFrame через executemany."""
-        async_connector.conn = mock_async_connection
-
-        # Мокаем transaction
-        mock_transaction = AsyncMock()
-        mock_async_connection.transaction = MagicMock(return_value=mock_transaction)
-        mock_transaction.__aenter__ = AsyncMock(return_value=mock_transaction)
-        mock_transaction.__aexit__ = AsyncMock(return_value=None)
-
-        result = await async_connector.insert_dataframe_executemany(sample_dataframe, 'test_table', batch_size=2)
-
-        assert result == 3
-        # Проверяем, что executemany был вызван
-        assert mock_async_connection.executemany.call_count >= 1
-
-    @pytest.mark.asyncio
-    async def test_insert_dataframe_executemany_empty(self, async_connector):
-        """Тест асинхронной вставки пустого DataFrame через executemany."""
-        empty_df = pd.DataFrame()
-        result = await async_connector.insert_dataframe_executemany(empty_df, 'test_table')
-
-        assert result == 0
-
-    # Тесты для upsert_dataframe
-
-    @pytest.mark.asyncio
-    async def test_upsert_dataframe_success(self, async_connector, mock_async_connection, sample_dataframe):
-        """Тест успешного upsert DataFrame."""
-        async_connector.conn = mock_async_connection
-
-        # Мокаем transaction
-        mock_transaction = AsyncMock()
-        mock_async_connection.transaction = MagicMock(return_value=mock_transaction)
-        mock_transaction.__aenter__ = AsyncMock(return_value=mock_transaction)
-        mock_transaction.__aexit__ = AsyncMock(return_value=None)
-
-        conflict_columns = ['id']
-        update_columns = ['name', 'age']
-
-        result = await async_connector.upsert_dataframe(
-            sample_dataframe,
-            'test_table',
-            conflict_columns,
-            update_columns,
-            batch_size=2
-        )
-
-        assert result == 3
-        assert mock_async_connection.executemany.call_count >= 1
-
-    @pytest.mark.asyncio
-    async def test_upsert_dataframe_auto_update_columns(self, async_connector, mock_async_connection, sample_dataframe):
-        """Тест upsert DataFrame с автоматическим определением update_columns."""
-        async_connector.conn = mock_async_connection
+        with patch('data_utils.pg.pg.execute_batch') as mock_execute_batch:
+            sync_connector.insert_dataframe(df, 'test_table', page_size=2, use_copy=False)
 
-        # Мокаем transaction - transaction() возвращает async context manager напрямую
-        mock_transaction = AsyncMock()
-        mock_async_connection.transaction = MagicMock(return_value=mock_transaction)
-        mock_transaction.__aenter__ = AsyncMock(return_value=mock_transaction)
-        mock_transaction.__aexit__ = AsyncMock(return_value=None)
+        rows = list(mock_execute_batch.call_args.args[2])
+        assert rows == [[1, 1.5, 'Alice'], [2, None, None], [3, 3.5, 'Charlie']]
 
-        conflict_columns = ['id']
+    def test_insert_dataframe_skips_debug_formatting(self, sync_connector, mock_connection, sample_dataframe):
+        """Тест: при выключенном DEBUG df.head() не вычисляется."""
+        mock_conn, _ = mock_connection
+        sync_connector.conn = mock_conn
 
-        result = await async_connector.upsert_dataframe(
-            sample_dataframe,
-            'test_table',
-            conflict_columns,
-            batch_size=2
-        )
+        with patch.object(sync_connector.logger, 'isEnabledFor', return_value=False), \
+                patch.object(pd.DataFrame, 'head') as mock_head:
+            sync_connector.insert_dataframe(sample_dataframe, 'test_table')
 
-        assert result == 3
+        mock_head.assert_not_called()
 
-    @pytest.mark.asyncio
-    async def test_upsert_dataframe_empty(self, async_connector):
-        """Тест upsert пустого DataFrame."""
-        empty_df = pd.DataFrame()
-        result = await async_connector.upsert_dataframe(empty_df, 'test_table', ['id'])
+    def test_insert_dataframe_empty(self, sync_connector):
+        """Тест вставки пустого DataFrame."""
+        result = sync_connector.insert_dataframe(EMPTY_DF, 'test_table')
 
         assert result == 0
 
-    # Тесты для upsert_dataframe_with_ids
-
-    @pytest.mark.asyncio
-    async def test_upsert_dataframe_with_ids_success(self, async_connector, mock_async_connection):
-        """Тест успешного upsert DataFrame с использованием индекса как ID."""
-        async_connector.conn = mock_async_connection
-
-        # Создаем DataFrame с именованным индексом
-        df = pd.DataFrame({
-            'name': ['Alice', 'Bob', 'Charlie'],
-            'age': [25, 30, 35]
-        })
-        df.index = pd.Index([1, 2, 3], name='user_id')
-
-        # Мокаем transaction
-        mock_transaction = AsyncMock()
-        mock_async_connection.transaction = MagicMock(return_value=mock_transaction)
-        mock_transaction.__aenter__ = AsyncMock(return_value=mock_transaction)
-        mock_transaction.__aexit__ = AsyncMock(return_value=None)
-
-        result = await async_connector.upsert_dataframe_with_ids(df, 'test_table', 'user_id', batch_size=2)
-
-        assert result == 3
-        assert mock_async_connection.executemany.call_count >= 1
-
-    @pytest.mark.asyncio
-    async def test_upsert_dataframe_with_ids_wrong_index(self, async_connector):
-        """Тест upsert DataFrame с неправильным именем индекса."""
-        df = pd.DataFrame({
-            'name': ['Alice', 'Bob'],
-            'age': [25, 30]
-        })
-        df.index.name = 'wrong_id'
+    def test_insert_dataframe_exception(self, sync_connector, mock_connection, sample_dataframe):
+        """Тест обработки исключения при вставке DataFrame."""
+        mock_conn, mock_cursor = mock_connection
+        sync_connector.conn = mock_conn
 
-        with pytest.raises(ValueError, match="Индекс DataFrame должен называться 'user_id'"):
-            await async_connector.upsert_dataframe_with_ids(df, 'test_table', 'user_id')
+        mock_cursor.errors['copy_expert'] = Exception("Insert error")
 
-    @pytest.mark.asyncio
-    async def test_upsert_dataframe_with_ids_empty(self, async_connector):
-        """Тест upsert пустого DataFrame с ID."""
-        empty_df = pd.DataFrame()
-        empty_df.index.name = 'user_id'
-        result = await async_connector.upsert_dataframe_with_ids(empty_df, 'test_table', 'user_id')
+        with pytest.raises(Exception, match="Insert error"):
+            sync_connector.insert_dataframe(sample_dataframe, 'test_table')
 
-        assert result == 0
+        assert recorded_calls(mock_conn, 'rollback') == [()]
+        assert not recorded_calls(mock_conn, 'commit')
@@ -0,0 +1,336 @@
+import pytest
+import pandas as pd
+from unittest.mock import MagicMock, patch, AsyncMock
+from data_utils.pg import pg as pg_module
+from data_utils.pg.pg import AsyncPostgresConnector
+import asyncpg
+from pg_stubs import CONNECTOR_KWARGS, EMPTY_DF, EMPTY_DF_USER_ID, StubAsyncConnection, raising, recorded_calls
+
+
+@pytest.fixture
+def mock_async_connection():
+    """Фикстура, создающая заглушку asyncpg connection."""
+    return StubAsyncConnection()
+
+
+@pytest.fixture(autouse=True)
+def connect_calls(monkeypatch, mock_async_connection):
+    """
+    Подменить asyncpg.connect на функцию, возвращающую заглушку соединения.
+
+    :return: Список kwargs всех вызовов connect
+    """
+    calls = []
+
+    async def connect(**kwargs):
+        calls.append(kwargs)
+        return mock_async_connection
+
+    monkeypatch.setattr(asyncpg, 'connect', connect)
+    return calls
+
+
+class TestAsyncPostgresConnector:
+    """Тесты для класса AsyncPostgresConnector."""
+
+    @pytest.fixture
+    def async_connector(self):
+        """Фикстура, создающая экземпляр AsyncPostgresConnector."""
+        return AsyncPostgresConnector(**CONNECTOR_KWARGS)
+
+    # Тесты для __init__
+
+    def test_init_basic(self):
+        """Тест базовой инициализации AsyncPostgresConnector."""
+        connector = AsyncPostgresConnector(
+            dbname='my_db',
+            user='my_user',
+            password='my_pass'
+        )
+        assert connector.config['database'] == 'my_db'
+        assert connector.config['user'] == 'my_user'
+        assert connector.config['password'] == 'my_pass'
+        assert connector.config['host'] == 'localhost'
+        assert connector.config['port'] == 5432
+        assert connector.conn is None
+
+    def test_init_with_custom_host_port(self):
+        """Тест инициализации с кастомными хостом и портом."""
+        connector = AsyncPostgresConnector(
+            dbname='my_db',
+            user='my_user',
+            password='my_pass',
+            host='remote.host.com',
+            port=5433
+        )
+        assert connector.config['host'] == 'remote.host.com'
+        assert connector.config['port'] == 5433
+
+    # Тесты для async context manager
+
+    async def test_async_context_manager(self, async_connector, mock_async_connection):
+        """Тест использования как асинхронного контекстного менеджера."""
+        async with async_connector as conn:
+            assert conn is async_connector
+            assert async_connector.conn is mock_async_connection
+
+        # Проверяем, что соединение закрыто
+        assert recorded_calls(mock_async_connection, 'close') == [()]
+
+    # Тесты для connect
+
+    async def test_connect_success(self, async_connector, mock_async_connection, connect_calls):
+        """Тест успешного асинхронного подключения."""
+        await async_connector.connect()
+
+        assert connect_calls == [{
+            'database': 'test_db',
+            'user': 'test_user',
+            'password': 'test_password',
+            'host': 'localhost',
+            'port': 5432
+        }]
+        assert async_connector.conn is mock_async_connection
+
+    async def test_connect_failure(self, async_connector, monkeypatch):
+        """Тест ошибки асинхронного подключения."""
+        monkeypatch.setattr(asyncpg, 'connect', raising(Exception("Connection failed")))
+
+        with pytest.raises(Exception, match="Connection failed"):
+            await async_connector.connect()
+
+    async def test_connect_pool_shared(self, mock_async_connection):
+        """Тест получения асинхронных соединений из общего пула."""
+        # Event loop общий на сессию, поэтому пулы предыдущих тестов в нем сохраняются
+        pg_module._ASYNC_POOLS.clear()
+        mock_pool = MagicMock()
+        mock_pool.is_closing.return_value = False
+        mock_pool.acquire = AsyncMock(return_value=mock_async_connection)
+        mock_pool.release = AsyncMock()
+
+        with patch('asyncpg.create_pool', new=AsyncMock(return_value=mock_pool)) as mock_create_pool:
+            first = AsyncPostgresConnector('test_db', 'test_user', 'test_password', pool_size=5)
+            second = AsyncPostgresConnector('test_db', 'test_user', 'test_password', pool_size=5)
+
+            async with first:
+                assert first.conn is mock_async_connection
+            async with second:
+                pass
+
+        mock_create_pool.assert_called_once_with(
+            database='test_db', user='test_user', password='test_password', host='localhost', port=5432,
+            min_size=1, max_size=5
+        )
+        assert mock_pool.acquire.call_count == 2
+        assert mock_pool.release.call_count == 2
+        assert not recorded_calls(mock_async_connection, 'close')
+        pg_module._ASYNC_POOLS.clear()
+
+    # Тесты для close
+
+    async def test_close_connection(self, async_connector, mock_async_connection):
+        """Тест закрытия асинхронного соединения."""
+        async_connector.conn = mock_async_connection
+
+        await async_connector.close()
+
+        assert recorded_calls(mock_async_connection, 'close') == [()]
+
+    async def test_close_already_closed(self, async_connector, mock_async_connection):
+        """Тест закрытия уже закрытого асинхронного соединения."""
+        mock_async_connection.closed = True
+        async_connector.conn = mock_async_connection
+
+        await async_connector.close()
+
+        # Не должно вызывать close, если уже закрыто
+        assert not recorded_calls(mock_async_connection, 'close')
+
+    # Тесты для execute_query
+
+    async def test_execute_query_simple(self, async_connector, mock_async_connection):
+        """Тест выполнения простого асинхронного запроса."""
+        async_connector.conn = mock_async_connection
+
+        query = "INSERT INTO test_table (name) VALUES ($1)"
+        params = ['test_value']
+
+        await async_connector.execute_query(query, params)
+
+        assert recorded_calls(mock_async_connection, 'execute') == [(query, 'test_value')]
+
+    async def test_execute_query_with_fetch(self, async_connector, mock_async_connection):
+        """Тест выполнения асинхронного запроса с получением результата."""
+        async_connector.conn = mock_async_connection
+
+        mock_result = [{'id': 1, 'name': 'Alice'}, {'id': 2, 'name': 'Bob'}]
+        mock_async_connection.rows = mock_result
+
+        query = "SELECT * FROM users"
+        result = await async_connector.execute_query(query, fetch=True)
+
+        assert result == mock_result
+        assert recorded_calls(mock_async_connection, 'fetch') == [(query,)]
+
+    async def test_execute_query_exception(self, async_connector, mock_async_connection):
+        """Тест обработки исключения при выполнении асинхронного запроса."""
+        async_connector.conn = mock_async_connection
+
+        mock_async_connection.errors['execute'] = Exception("Query error")
+
+        with pytest.raises(Exception, match="Query error"):
+            await async_connector.execute_query("SELECT * FROM nonexistent")
+
+    # Тесты для insert_dataframe
+
+    async def test_insert_dataframe_success(self, async_connector, mock_async_connection, sample_dataframe):
+        """Тест успешной асинхронной вставки DataFrame с COPY."""
+        async_connector.conn = mock_async_connection
+
+        result = await async_connector.insert_dataframe(sample_dataframe, 'test_table', 'public', batch_size=100)
+
+        assert result == 3
+        assert len(recorded_calls(mock_async_connection, 'copy_to_table')) == 1
+
+    async def test_insert_dataframe_streams_csv_chunks(self, async_connector, mock_async_connection):
+        """Тест потоковой передачи CSV в copy_to_table кусками."""
+        async_connector.conn = mock_async_connection
+        df = pd.DataFrame({'id': [1, 2, 3], 'name': ['Alice', None, 'Charlie']})
+
+        chunks_direct = [chunk async for chunk in pg_module._iter_csv_chunks(df, chunk_rows=2)]
+        result = await async_connector.insert_dataframe(df, 'test_table', 'public')
+
+        assert result == 3
+        assert chunks_direct == [b'1\tAlice\n2\t\\N\n', b'3\tCharlie\n']
+        assert b''.join(mock_async_connection.copied) == b''.join(chunks_direct)
+        [(_, kwargs)] = recorded_calls(mock_async_connection, 'copy_to_table')
+        assert kwargs['null'] == '\\N'
+        assert kwargs['columns'] == ['id', 'name']
+
+    async def test_insert_dataframe_exception(self, async_connector, mock_async_connection, sample_dataframe):
+        """Тест обработки исключения при асинхронной вставке DataFrame."""
+        async_connector.conn = mock_async_connection
+        mock_async_connection.errors['copy_to_table'] = Exception("Insert error")
+
+        with pytest.raises(Exception, match="Insert error"):
+            await async_connector.insert_dataframe(sample_dataframe, 'test_table', 'public')
+
+    # Тесты для insert_dataframe_executemany
+
+    async def test_insert_dataframe_executemany_success(self, async_connector, mock_async_connection, sample_dataframe):
+        """Тест успешной асинхронной вставки DataFrame через executemany."""
+        async_connector.conn = mock_async_connection
+
+        result = await async_connector.insert_dataframe_executemany(sample_dataframe, 'test_table', batch_size=2)
+
+        assert result == 3
+        # Проверяем, что записи ушли через бинарный COPY
+        [(table_name, kwargs)] = recorded_calls(mock_async_connection, 'copy_records_to_table')
+        assert table_name == 'test_table'
+        assert kwargs['schema_name'] is None
+        assert kwargs['columns'] == ['id', 'name', 'age']
+        assert list(kwargs['records']) == [[1, 'Alice', 25], [2, 'Bob', 30], [3, 'Charlie', 35]]
+        assert not recorded_calls(mock_async_connection, 'executemany')
+
+    async def test_insert_dataframe_executemany_schema(self, async_connector, mock_async_connection, sample_dataframe):
+        """Тест вставки DataFrame через COPY в таблицу с указанием схемы."""
+        async_connector.conn = mock_async_connection
+
+        await async_connector.insert_dataframe_executemany(sample_dataframe, 'analytics.test_table')
+
+        [(table_name, kwargs)] = recorded_calls(mock_async_connection, 'copy_records_to_table')
+        assert table_name == 'test_table'
+        assert kwargs['schema_name'] == 'analytics'
+
+    # Тесты для upsert_dataframe
+
+    async def test_upsert_dataframe_success(self, async_connector, mock_async_connection, sample_dataframe):
+        """Тест успешного upsert DataFrame."""
+        async_connector.conn = mock_async_connection
+
+        conflict_columns = ['id']
+        update_columns = ['name', 'age']
+
+        result = await async_connector.upsert_dataframe(
+            sample_dataframe,
+            'test_table',
+            conflict_columns,
+            update_columns,
+            batch_size=2
+        )
+
+        assert result == 3
+        # COPY во временную таблицу и один INSERT ... SELECT
+        [(create_query,), (upsert_query,)] = recorded_calls(mock_async_connection, 'execute')
+        assert "CREATE TEMP TABLE" in create_query
+        assert "ON COMMIT DROP" in create_query
+        assert 'ON CONFLICT ("id") DO UPDATE SET "name" = EXCLUDED."name", "age" = EXCLUDED."age"' in upsert_query
+
+        [(_, kwargs)] = recorded_calls(mock_async_connection, 'copy_records_to_table')
+        assert kwargs['columns'] == ['id', 'name', 'age']
+        assert len(list(kwargs['records'])) == 3
+        assert not recorded_calls(mock_async_connection, 'executemany')
+
+    async def test_upsert_dataframe_auto_update_columns(self, async_connector, mock_async_connection, sample_dataframe):
+        """Тест upsert DataFrame с автоматическим определением update_columns."""
+        async_connector.conn = mock_async_connection
+
+        conflict_columns = ['id']
+
+        result = await async_connector.upsert_dataframe(
+            sample_dataframe,
+            'test_table',
+            conflict_columns,
+            batch_size=2
+        )
+
+        assert result == 3
+
+    # Тесты для upsert_dataframe_with_ids
+
+    async def test_upsert_dataframe_with_ids_success(self, async_connector, mock_async_connection,
+                                                     sample_dataframe_with_ids):
+        """Тест успешного upsert DataFrame с использованием индекса как ID."""
+        async_connector.conn = mock_async_connection
+
+        result = await async_connector.upsert_dataframe_with_ids(
+            sample_dataframe_with_ids, 'test_table', 'user_id', batch_size=2
+        )
+
+        assert result == 3
+        # Записи уходят одним COPY во временную таблицу, без executemany
+        assert not recorded_calls(mock_async_connection, 'executemany')
+        [(table_name, kwargs)] = recorded_calls(mock_async_connection, 'copy_records_to_table')
+        assert table_name == '_data_utils_staging'
+        assert kwargs['columns'] == ['user_id', 'name', 'age']
+        assert list(kwargs['records']) == [[1, 'Alice', 25], [2, 'Bob', 30], [3, 'Charlie', 35]]
+
+        [(create_query,), (upsert_query,)] = recorded_calls(mock_async_connection, 'execute')
+        assert create_query.startswith('DROP TABLE IF EXISTS pg_temp._data_utils_staging; ')
+        assert 'CREATE TEMP TABLE _data_utils_staging ON COMMIT DROP' in create_query
+        assert 'ON CONFLICT ("user_id") DO UPDATE SET "name" = EXCLUDED."name", "age" = EXCLUDED."age"' in upsert_query
+
+    async def test_upsert_dataframe_with_ids_wrong_index(self, async_connector):
+        """Тест upsert DataFrame с неправильным именем индекса."""
+        df = pd.DataFrame({
+            'name': ['Alice', 'Bob'],
+            'age': [25, 30]
+        })
+        df.index.name = 'wrong_id'
+
+        with pytest.raises(ValueError, match="Индекс DataFrame должен называться 'user_id'"):
+            await async_connector.upsert_dataframe_with_ids(df, 'test_table', 'user_id')
+
+    # Тесты для пустого DataFrame
+
+    @pytest.mark.parametrize("method_name, empty_df, args", [
+        ("insert_dataframe", EMPTY_DF, ('test_table', 'public')),
+        ("insert_dataframe_executemany", EMPTY_DF, ('test_table',)),
+        ("upsert_dataframe", EMPTY_DF, ('test_table', ['id'])),
+        ("upsert_dataframe_with_ids", EMPTY_DF_USER_ID, ('test_table', 'user_id')),
+    ])
+    async def test_empty_dataframe(self, async_connector, method_name, empty_df, args):
+        """Тест: методы вставки и upsert возвращают 0 для пустого DataFrame, не обращаясь к БД."""
+        result = await getattr(async_connector, method_name)(empty_df, *args)
+
+        assert result == 0
@@ -1,11 +1,43 @@
+import asyncio
+import base64
+import dataclasses
+import hashlib
+import io
 import os
 import tempfile
+import threading
 from datetime import datetime
-from unittest.mock import MagicMock, call, patch
+from unittest.mock import AsyncMock, MagicMock, call, patch
 
 import pytest
 
-from data_utils.s3.s3 import S3Uploader
+from data_utils.s3 import async_s3 as async_s3_module
+from data_utils.s3 import s3 as s3_module
+from data_utils.s3.s3 import (
+    CHECKSUM_EXTRA_ARGS, DEFAULT_CLIENT_CONFIG, DEFAULT_DOWNLOAD_CONFIG, DEFAULT_TRANSFER_CONFIG, HASH_BLOCK_SIZE, S3ObjectInfo,
+    S3Uploader
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_client_cache():
+    """Сбросить кэш клиентов S3: иначе тест получит клиент, созданный под патчем другого теста."""
+    s3_module._cached_session_client.cache_clear()
+    s3_module._cached_unvalidated_client.cache_clear()
+    yield
+    s3_module._cached_session_client.cache_clear()
+    s3_module._cached_unvalidated_client.cache_clear()
+
+
+@pytest.fixture(scope="module")
+def client_exceptions():
+    """Классы исключений настоящего клиента S3 (создание клиента не обращается к сети)."""
+    import botocore.session
+
+    client = botocore.session.get_session().create_client(
+        "s3", region_name="us-east-1", aws_access_key_id="key", aws_secret_access_key="secret"
+    )
+    return client.exceptions
 
 
 class TestS3Uploader:
@@ -14,9 +46,9 @@ class TestS3Uploader:
     @pytest.fixture
     def s3_uploader(self):
         """Фикстура, создающая экземпляр S3Uploader с мокированным клиентом."""
-        with patch("data_utils.s3.s3.boto3.client") as mock_boto_client:
+        with patch("data_utils.s3.s3.boto3.session.Session") as mock_session:
             mock_s3_client = MagicMock()
-            mock_boto_client.return_value = mock_s3_client
+            mock_session.return_value.client.return_value = mock_s3_client
 
             uploader = S3Uploader(
                 aws_access_key_id="test_key",
@@ -29,6 +61,8 @@ class TestS3Uploader:
 
             uploader.s3_client = mock_s3_client
             yield uploader, mock_s3_client
+            # Останавливает TransferManager'ы, созданные в тесте
+            uploader.close()
 
     @pytest.fixture
     def temp_file(self):
@@ -46,9 +80,9 @@ class TestS3Uploader:
 
     def test_init(self):
         """Тест инициализации S3Uploader."""
-        with patch("data_utils.s3.s3.boto3.client") as mock_boto_client:
+        with patch("data_utils.s3.s3.boto3.session.Session") as mock_session:
             mock_s3_client = MagicMock()
-            mock_boto_client.return_value = mock_s3_client
+            mock_session.return_value.client.return_value = mock_s3_client
 
             uploader = S3Uploader(
                 aws_access_key_id="my_key",
@@ -58,21 +92,95 @@ class TestS3Uploader:
                 default_bucket="my-default-bucket",
             )
 
-            mock_boto_client.assert_called_once_with(
-                "s3",
+            mock_session.assert_called_once_with(
                 aws_access_key_id="my_key",
                 aws_secret_access_key="my_secret",
-                endpoint_url="https://my-s3.example.com",
                 region_name="eu-west-1",
             )
+            mock_session.return_value.client.assert_called_once_with(
+                "s3",
+                endpoint_url="https://my-s3.example.com",
+                config=DEFAULT_CLIENT_CONFIG,
+            )
             assert uploader.s3_client == mock_s3_client
             assert uploader.default_bucket == "my-default-bucket"
             assert uploader.debug is False  # По умолчанию False
+            assert uploader.transfer_config is DEFAULT_TRANSFER_CONFIG
+
+    def test_init_reuses_cached_client(self):
+        """Тест: загрузчики с одинаковыми параметрами используют один клиент."""
+        with patch("data_utils.s3.s3.boto3.session.Session") as mock_session:
+            mock_session.return_value.client.side_effect = lambda *args, **kwargs: MagicMock()
+
+            first = S3Uploader("key", "secret", endpoint_url="https://s3.example.com")
+            second = S3Uploader("key", "secret", endpoint_url="https://s3.example.com")
+            other = S3Uploader("other_key", "secret", endpoint_url="https://s3.example.com")
+
+        assert first.s3_client is second.s3_client
+        assert other.s3_client is not first.s3_client
+        assert mock_session.call_count == 2
+
+    def test_default_client_config(self):
+        """Тест пула соединений и повторов клиента по умолчанию."""
+        uploader = S3Uploader("key", "secret")
+
+        assert DEFAULT_CLIENT_CONFIG.max_pool_connections == 64
+        assert uploader.s3_client.meta.config.max_pool_connections == 64
+        assert uploader.s3_client.meta.config.retries['mode'] == 'adaptive'
+        assert uploader.s3_client.meta.config.tcp_keepalive is True
+        assert uploader.s3_client.meta.config.connect_timeout == 5
+        assert uploader.s3_client.meta.config.read_timeout == 30
+        # Клиент общий с пользовательским кодом: параметры вызовов проверяются botocore
+        assert uploader.s3_client.meta.config.parameter_validation is True
+
+    def test_directory_client_skips_parameter_validation(self):
+        """Тест: без проверки параметров работает только внутренний клиент upload_directory."""
+        uploader = S3Uploader("key", "secret")
+
+        with patch("data_utils.s3.s3.create_transfer_manager") as mock_create:
+            uploader._get_directory_transfer_manager()
+            uploader._get_directory_transfer_manager()
+
+        from botocore.validate import ParamValidationDecorator
+
+        [(directory_client, _)] = [c.args for c in mock_create.call_args_list]
+        # Проверку параметров botocore выполняет обертка сериализатора запросов
+        assert not isinstance(directory_client._serializer, ParamValidationDecorator)
+        assert isinstance(uploader.s3_client._serializer, ParamValidationDecorator)
+        assert directory_client.meta.config.max_pool_connections == 64
+
+    def test_default_transfer_config(self):
+        """Тест параметров multipart-загрузки по умолчанию."""
+        assert DEFAULT_TRANSFER_CONFIG.multipart_threshold == 64 * 1024 * 1024
+        assert DEFAULT_TRANSFER_CONFIG.multipart_chunksize == 64 * 1024 * 1024
+        assert DEFAULT_TRANSFER_CONFIG.max_request_concurrency == 20
+        assert DEFAULT_TRANSFER_CONFIG.use_threads is True
+
+    def test_default_download_config(self):
+        """Тест параметров скачивания по умолчанию: параллельные range-GET по 8 МБ."""
+        assert DEFAULT_DOWNLOAD_CONFIG.multipart_threshold == 8 * 1024 * 1024
+        assert DEFAULT_DOWNLOAD_CONFIG.multipart_chunksize == 8 * 1024 * 1024
+        assert DEFAULT_DOWNLOAD_CONFIG.max_request_concurrency == 16
+
+    def test_download_config_falls_back_to_transfer_config(self):
+        """Тест: явно переданный transfer_config используется и для скачивания."""
+        custom = s3_module.TransferConfig(max_concurrency=4)
+        with patch("data_utils.s3.s3.boto3.session.Session"):
+            uploader = S3Uploader("key", "secret", transfer_config=custom)
+            assert uploader.download_config is custom
 
     def test_calculate_local_file_hash(self, temp_file):
-        """Тест вычисления хэша локального файла."""
-
-        assert os.path.exists(temp_file)
+        """Тест вычисления хэша локального файла: MD5 по умолчанию, SHA-256 и xxh3."""
+        uploader = S3Uploader("key", "secret")
+        with open(temp_file, "rb") as f:
+            content = f.read()
+
+        assert uploader._calculate_local_file_hash(temp_file) == hashlib.md5(content).hexdigest()
+        assert (uploader._calculate_local_file_hash(temp_file, "sha256")
+                == hashlib.sha256(content).hexdigest())
+        if s3_module.xxhash is not None:
+            assert (uploader._calculate_local_file_hash(temp_file, "xxh3")
+                    == s3_module.xxhash.xxh3_64_hexdigest(content))
 
     def test_get_s3_object_info_success(self, s3_uploader):
         """Тест получения информации о существующем объекте S3."""
@@ -86,15 +194,76 @@ class TestS3Uploader:
         info = uploader._get_s3_object_info("my-bucket", "my-key")
 
         mock_client.head_object.assert_called_once_with(
-            Bucket="my-bucket", Key="my-key"
+            Bucket="my-bucket", Key="my-key", ChecksumMode="ENABLED"
+        )
+        assert info == S3ObjectInfo(
+            size=1024,
+            etag="abc123def456",
+            last_modified=datetime(2023, 10, 27, 10, 0, 0),
+            checksum_sha256=None,
+            metadata={},
         )
-        assert info == {
-            "size": 1024,
-            "etag": "abc123def456",
-            "last_modified": datetime(2023, 10, 27, 10, 0, 0),
+        assert info.size == 1024
+        assert info.etag == "abc123def456"
+        assert not hasattr(info, "__dict__")
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            info.size = 0
+
+    def test_get_s3_object_info_cached(self, s3_uploader):
+        """Тест кэширования head_object до истечения TTL и сброса кэша при загрузке."""
+        uploader, mock_client = s3_uploader
+        mock_client.head_object.return_value = {
+            "ContentLength": 1, "ETag": '"e"', "LastModified": datetime(2023, 1, 1),
         }
 
-    def test_get_s3_object_info_not_found(self, s3_uploader, capsys):
+        with patch("data_utils.s3.s3.time.monotonic", return_value=100.0):
+            first = uploader._get_s3_object_info("bucket", "key")
+            assert uploader._get_s3_object_info("bucket", "key") is first
+        assert mock_client.head_object.call_count == 1
+
+        with patch("data_utils.s3.s3.time.monotonic", return_value=100.0 + uploader.head_cache_ttl):
+            uploader._get_s3_object_info("bucket", "key")
+        assert mock_client.head_object.call_count == 2
+
+        with patch("data_utils.s3.s3.create_transfer_manager", return_value=self._fake_transfer_manager()):
+            uploader.upload_fileobj(io.BytesIO(b"x"), "key", bucket_name="bucket")
+        uploader._get_s3_object_info("bucket", "key")
+        assert mock_client.head_object.call_count == 3
+
+    def test_get_s3_object_info_cache_disabled(self, s3_uploader):
+        """Тест отключения кэша head_object через head_cache_ttl=0."""
+        uploader, mock_client = s3_uploader
+        uploader.head_cache_ttl = 0
+        mock_client.head_object.return_value = {
+            "ContentLength": 1, "ETag": '"e"', "LastModified": datetime(2023, 1, 1),
+        }
+
+        uploader._get_s3_object_info("bucket", "key")
+        uploader._get_s3_object_info("bucket", "key")
+
+        assert mock_client.head_object.call_count == 2
+        assert uploader._head_cache == {}
+
+    def test_index_prefix_fills_head_cache(self, s3_uploader):
+        """Тест: листинг префикса заполняет кэш head_object, не затирая свежие ответы head."""
+        uploader, mock_client = s3_uploader
+        mock_client.head_object.return_value = {
+            "ContentLength": 5, "ETag": '"head"', "LastModified": datetime(2023, 1, 1),
+            "Metadata": {"mtime": "1"},
+        }
+        headed = uploader._get_s3_object_info("bucket", "p/headed.txt")
+        mock_client.get_paginator.return_value.paginate.return_value = [{'Contents': [
+            {'Key': 'p/listed.txt', 'Size': 3, 'ETag': '"listed"', 'LastModified': datetime(2023, 1, 1)},
+            {'Key': 'p/headed.txt', 'Size': 5, 'ETag': '"head"', 'LastModified': datetime(2023, 1, 1)},
+        ]}]
+
+        index = uploader._index_prefix("bucket", "p/")
+
+        assert uploader._get_s3_object_info("bucket", "p/listed.txt") == index['p/listed.txt']
+        assert uploader._get_s3_object_info("bucket", "p/headed.txt") is headed
+        assert mock_client.head_object.call_count == 1
+
+    def test_get_s3_object_info_not_found(self, s3_uploader, caplog):
         """Тест получения информации о несуществующем объекте S3."""
         uploader, mock_client = s3_uploader
         from botocore.exceptions import ClientError
@@ -103,14 +272,13 @@ class TestS3Uploader:
         mock_client.head_object.side_effect = ClientError(error_response,
                                                           "HeadObject")
 
-        info = uploader._get_s3_object_info("my-bucket", "nonexistent-key")
+        with caplog.at_level("ERROR", logger="data_utils.s3.s3"):
+            info = uploader._get_s3_object_info("my-bucket", "nonexistent-key")
 
         assert info is None
+        assert "Ошибка получения информации о файле" not in caplog.text
 
-        captured = capsys.readouterr()
-        assert "Ошибка получения информации о файле" not in captured.out
-
-    def test_get_s3_object_info_other_error(self, s3_uploader, capsys):
+    def test_get_s3_object_info_other_error(self, s3_uploader, caplog):
         """Тест получения информации при другой ошибке S3."""
         uploader, mock_client = s3_uploader
         from botocore.exceptions import ClientError
@@ -120,11 +288,11 @@ class TestS3Uploader:
         mock_client.head_object.side_effect = ClientError(error_response,
                                                           "HeadObject")
 
-        info = uploader._get_s3_object_info("my-bucket", "error-key")
+        with caplog.at_level("ERROR", logger="data_utils.s3.s3"):
+            info = uploader._get_s3_object_info("my-bucket", "error-key")
 
         assert info is None
-        captured = capsys.readouterr()
-        assert "Ошибка получения информации о файле error-key" in captured.out
+        assert "Ошибка получения информации о файле error-key" in caplog.text
 
     def test_files_are_equal_true(self, s3_uploader, temp_file):
         """Тест, когда файлы идентичны."""
@@ -149,6 +317,229 @@ class TestS3Uploader:
 
         assert result is True
 
+    def test_files_are_equal_sha256_checksum(self, s3_uploader, temp_file):
+        """Тест сравнения по ChecksumSHA256, когда S3 его возвращает."""
+        uploader, mock_client = s3_uploader
+        with open(temp_file, "rb") as f:
+            content = f.read()
+
+        mock_client.head_object.return_value = {
+            "ContentLength": len(content),
+            "ETag": '"abc-2"',  # multipart ETag не сравним с MD5
+            "LastModified": datetime(2000, 1, 1),
+            "ChecksumSHA256": base64.b64encode(hashlib.sha256(content).digest()).decode(),
+        }
+
+        assert uploader._files_are_equal(temp_file, "bucket", "key") is True
+
+        mock_client.head_object.return_value["ChecksumSHA256"] = base64.b64encode(
+            hashlib.sha256(b"other").digest()).decode()
+        uploader._head_cache.clear()
+        assert uploader._files_are_equal(temp_file, "bucket", "key") is False
+
+    def test_files_are_equal_no_datetime_without_debug(self, s3_uploader, temp_file, caplog):
+        """Тест: без отладочного логирования datetime для вывода не создается."""
+        uploader, mock_client = s3_uploader
+        caplog.set_level("INFO", logger="data_utils.s3.s3")
+        mock_client.head_object.return_value = {
+            "ContentLength": os.path.getsize(temp_file),
+            "ETag": '"etag"',
+            "LastModified": datetime.fromtimestamp(os.path.getmtime(temp_file)),
+        }
+
+        with patch("data_utils.s3.s3.datetime") as mock_datetime:
+            assert uploader._files_are_equal(temp_file, "bucket", "key") is True
+
+        mock_datetime.fromtimestamp.assert_not_called()
+
+    def test_debug_does_not_change_module_logger_level(self):
+        """Тест: debug=True не меняет уровень общего логгера модуля."""
+        level = s3_module._LOGGER.level
+
+        with patch("data_utils.s3.s3.boto3.session.Session"):
+            S3Uploader("key", "secret", debug=True)
+
+        assert s3_module._LOGGER.level == level
+
+    def test_debug_logging_enabled_by_logger_level(self, s3_uploader, temp_file, caplog):
+        """Тест: отладочные сообщения сравнения файлов включаются уровнем логгера."""
+        uploader, mock_client = s3_uploader
+        mock_client.head_object.return_value = {
+            "ContentLength": os.path.getsize(temp_file) + 1,
+            "ETag": '"etag"',
+            "LastModified": datetime(2000, 1, 1),
+        }
+
+        with caplog.at_level("DEBUG", logger="data_utils.s3.s3"):
+            uploader._files_are_equal(temp_file, "bucket", "key")
+
+        assert "Размеры не совпадают" in caplog.text
+
+    def test_files_are_equal_uses_given_stat(self, s3_uploader, temp_file):
+        """Тест: переданный stat из обхода директории заменяет вызов os.stat."""
+        uploader, mock_client = s3_uploader
+        local_stat = os.stat(temp_file)
+        mock_client.head_object.return_value = {
+            "ContentLength": local_stat.st_size,
+            "ETag": '"etag"',
+            "LastModified": datetime.fromtimestamp(local_stat.st_mtime),
+        }
+
+        with patch("data_utils.s3.s3.os.stat") as mock_stat:
+            assert uploader._files_are_equal(temp_file, "bucket", "key", local_stat=local_stat) is True
+
+        mock_stat.assert_not_called()
+
+    def test_files_are_equal_metadata_mtime(self, s3_uploader, temp_file):
+        """Тест совпадения по времени модификации из метаданных без хэширования файла."""
+        uploader, mock_client = s3_uploader
+        mock_client.head_object.return_value = {
+            "ContentLength": os.path.getsize(temp_file),
+            "ETag": '"abc-2"',
+            "LastModified": datetime(2000, 1, 1),
+            "Metadata": {"mtime": str(os.stat(temp_file).st_mtime_ns)},
+        }
+
+        with patch.object(uploader, "_calculate_local_file_hash") as mock_hash:
+            assert uploader._files_are_equal(temp_file, "bucket", "key") is True
+
+        mock_hash.assert_not_called()
+
+    def test_files_are_equal_metadata_sha256(self, s3_uploader, temp_file):
+        """Тест сравнения с SHA-256 из метаданных, если файл был изменен после загрузки."""
+        uploader, mock_client = s3_uploader
+        with open(temp_file, "rb") as f:
+            content = f.read()
+
+        mock_client.head_object.return_value = {
+            "ContentLength": len(content),
+            "ETag": '"abc-2"',
+            "LastModified": datetime(2000, 1, 1),
+            "Metadata": {"mtime": "0", "sha256": hashlib.sha256(content).hexdigest()},
+        }
+        assert uploader._files_are_equal(temp_file, "bucket", "key") is True
+
+        mock_client.head_object.return_value["Metadata"] = {"sha256": hashlib.sha256(b"x").hexdigest()}
+        uploader._head_cache.clear()
+        assert uploader._files_are_equal(temp_file, "bucket", "key") is False
+
+    def test_files_are_equal_metadata_xxh3(self, s3_uploader, temp_file):
+        """Тест сравнения с xxh3 из метаданных до SHA-256."""
+        xxhash = pytest.importorskip("xxhash")
+        uploader, mock_client = s3_uploader
+        with open(temp_file, "rb") as f:
+            content = f.read()
+
+        mock_client.head_object.return_value = {
+            "ContentLength": len(content),
+            "ETag": '"abc-2"',
+            "LastModified": datetime(2000, 1, 1),
+            "Metadata": {"xxh3": xxhash.xxh3_64_hexdigest(content), "sha256": "mismatch"},
+        }
+        assert uploader._files_are_equal(temp_file, "bucket", "key") is True
+
+    def test_upload_extra_args_xxh3_only_multipart(self, s3_uploader, temp_file):
+        """Тест: xxh3 считается только для файлов, загружаемых частями."""
+        xxhash = pytest.importorskip("xxhash")
+        uploader, _ = s3_uploader
+        with open(temp_file, "rb") as f:
+            content = f.read()
+
+        uploader.transfer_config = MagicMock(multipart_threshold=len(content) + 1)
+        with patch.object(uploader, "_calculate_local_file_hashes") as mock_hash:
+            metadata = uploader._upload_extra_args(temp_file)["Metadata"]
+        mock_hash.assert_not_called()
+        assert set(metadata) == {"mtime"}
+
+        uploader.transfer_config = MagicMock(multipart_threshold=1)
+        assert uploader._upload_extra_args(temp_file)["Metadata"]["xxh3"] == xxhash.xxh3_64_hexdigest(content)
+
+    def test_upload_extra_args_hashes_in_one_pass(self, s3_uploader, tmp_path):
+        """Тест: SHA-256 и xxh3 считаются за одно открытие и один проход по файлу."""
+        xxhash = pytest.importorskip("xxhash")
+        uploader, _ = s3_uploader
+        content = os.urandom(HASH_BLOCK_SIZE * 2 + 17)
+        large_file = tmp_path / "large.bin"
+        large_file.write_bytes(content)
+        uploader.transfer_config = MagicMock(multipart_threshold=1)
+
+        with patch("builtins.open", wraps=open) as mock_open:
+            metadata = uploader._upload_extra_args(str(large_file))["Metadata"]
+
+        mock_open.assert_called_once_with(str(large_file), "rb", buffering=0)
+        assert metadata["sha256"] == hashlib.sha256(content).hexdigest()
+        assert metadata["xxh3"] == xxhash.xxh3_64_hexdigest(content)
+
+    def test_files_are_equal_xxh3_without_xxhash(self, s3_uploader, temp_file):
+        """Тест: без пакета xxhash сохраненный xxh3 пропускается и сравнивается SHA-256."""
+        uploader, mock_client = s3_uploader
+        with open(temp_file, "rb") as f:
+            content = f.read()
+
+        mock_client.head_object.return_value = {
+            "ContentLength": len(content),
+            "ETag": '"abc-2"',
+            "LastModified": datetime(2000, 1, 1),
+            "Metadata": {"xxh3": "0", "sha256": hashlib.sha256(content).hexdigest()},
+        }
+        with patch.object(s3_module, "xxhash", None):
+            assert uploader._files_are_equal(temp_file, "bucket", "key") is True
+
+    def test_calculate_local_file_hash_algorithms(self, temp_file):
+        """Тест вычисления MD5 и SHA-256 локального файла."""
+        uploader = S3Uploader("key", "secret")
+        with open(temp_file, "rb") as f:
+            content = f.read()
+
+        assert uploader._calculate_local_file_hash(temp_file) == hashlib.md5(content).hexdigest()
+        assert (uploader._calculate_local_file_hash(temp_file, "sha256")
+                == hashlib.sha256(content).hexdigest())
+
+    def test_calculate_local_file_hash_not_for_security(self, temp_file):
+        """Тест: хэшеры, не заготовленные заранее, создаются с usedforsecurity=False."""
+        uploader = S3Uploader("key", "secret")
+        with open(temp_file, "rb") as f:
+            content = f.read()
+
+        with patch("data_utils.s3.s3.hashlib.new", wraps=hashlib.new) as mock_new:
+            result = uploader._calculate_local_file_hash(temp_file, "sha1")
+
+        assert result == hashlib.sha1(content).hexdigest()
+        mock_new.assert_called_once_with("sha1", usedforsecurity=False)
+
+    def test_calculate_local_file_hash_empty_file(self, tmp_path):
+        """Тест хэша пустого файла (mmap не поддерживает пустые файлы)."""
+        uploader = S3Uploader("key", "secret")
+        empty_file = tmp_path / "empty.bin"
+        empty_file.write_bytes(b"")
+
+        assert uploader._calculate_local_file_hash(str(empty_file)) == hashlib.md5(b"").hexdigest()
+
+    def test_calculate_local_file_hash_mmap_fallback(self, tmp_path):
+        """Тест чтения блоками, если mmap недоступен."""
+        uploader = S3Uploader("key", "secret")
+        content = os.urandom(HASH_BLOCK_SIZE * 2 + 17)
+        large_file = tmp_path / "large.bin"
+        large_file.write_bytes(content)
+
+        with patch("data_utils.s3.s3.mmap.mmap", side_effect=OSError("mmap unsupported")) as mock_mmap:
+            result = uploader._calculate_local_file_hash(str(large_file), "sha256")
+
+        mock_mmap.assert_called_once()
+        assert result == hashlib.sha256(content).hexdigest()
+
+    def test_calculate_local_file_hash_small_file_skips_mmap(self, temp_file):
+        """Тест хэширования небольшого файла через readinto без mmap."""
+        uploader = S3Uploader("key", "secret")
+        with open(temp_file, "rb") as f:
+            content = f.read()
+
+        with patch("data_utils.s3.s3.mmap.mmap") as mock_mmap:
+            result = uploader._calculate_local_file_hash(temp_file)
+
+        mock_mmap.assert_not_called()
+        assert result == hashlib.md5(content).hexdigest()
+
     def test_files_are_equal_false_size(self, s3_uploader, temp_file):
         """Тест, когда размеры файлов различаются."""
         uploader, mock_client = s3_uploader
@@ -168,7 +559,7 @@ class TestS3Uploader:
     def test_files_are_equal_false_mtime_large_file(self,
                                                     s3_uploader,
                                                     temp_file):
-        """Тест для большого файла (>5MB) - проверяет только размер."""
+        """Тест для большого файла (>5MB) с совпадающим временем модификации."""
         uploader, mock_client = s3_uploader
 
         large_size = 6 * 1024 * 1024  # 6 MB
@@ -189,6 +580,77 @@ class TestS3Uploader:
 
         assert result is True
 
+    @staticmethod
+    def _multipart_etag(content, part_size):
+        """Составной ETag, который S3 присваивает объекту, загруженному частями."""
+        digests = b"".join(hashlib.md5(content[i:i + part_size]).digest()
+                           for i in range(0, len(content), part_size))
+        return f"{hashlib.md5(digests).hexdigest()}-{-(-len(content) // part_size)}"
+
+    @pytest.mark.parametrize("part_size", [8 * 1024 * 1024, 5 * 1024 * 1024])
+    def test_files_are_equal_multipart_etag(self, s3_uploader, tmp_path, part_size):
+        """Тест сравнения большого файла с составным ETag multipart-загрузки."""
+        uploader, mock_client = s3_uploader
+        content = os.urandom(part_size * 2 + 1024)
+        large_file = tmp_path / "large.bin"
+        large_file.write_bytes(content)
+
+        mock_client.head_object.return_value = {
+            "ContentLength": len(content),
+            "ETag": f'"{self._multipart_etag(content, part_size)}"',
+            "LastModified": datetime(2000, 1, 1),
+        }
+        assert uploader._files_are_equal(str(large_file), "bucket", "key") is True
+        assert uploader._part_size_cache["bucket"] == part_size
+
+        # Изменение содержимого без изменения размера обнаруживается
+        large_file.write_bytes(content[:-1] + bytes([content[-1] ^ 1]))
+        uploader._head_cache.clear()
+        assert uploader._files_are_equal(str(large_file), "bucket", "key") is False
+
+    def test_calculate_multipart_etag_known_size(self, s3_uploader, tmp_path):
+        """Тест: при известном размере файла составной ETag считается без os.fstat."""
+        uploader, _ = s3_uploader
+        content = os.urandom(2 * 1024 * 1024 + 1)
+        large_file = tmp_path / "large.bin"
+        large_file.write_bytes(content)
+        part_size = 1024 * 1024
+
+        with patch("data_utils.s3.s3.os.fstat", wraps=os.fstat) as mock_fstat:
+            result = uploader._calculate_multipart_etag(str(large_file), part_size, len(content))
+
+        mock_fstat.assert_not_called()
+        assert result == self._multipart_etag(content, part_size)
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_calculate_multipart_etag_parallel_parts(self, s3_uploader, tmp_path, workers):
+        """Тест одинакового составного ETag при последовательном и параллельном хэшировании частей."""
+        uploader, _ = s3_uploader
+        content = os.urandom(5 * 1024 * 1024 + 3)
+        large_file = tmp_path / "large.bin"
+        large_file.write_bytes(content)
+        part_size = 1024 * 1024
+
+        with patch.object(s3_module, "MULTIPART_HASH_WORKERS", workers):
+            result = uploader._calculate_multipart_etag(str(large_file), part_size)
+
+        assert result == self._multipart_etag(content, part_size)
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_calculate_multipart_etag_mmap_fallback(self, s3_uploader, tmp_path, workers):
+        """Тест вычисления составного ETag чтением частей (по смещению в нескольких потоках), если mmap недоступен."""
+        uploader, _ = s3_uploader
+        content = os.urandom(3 * 1024 * 1024 + 5)
+        large_file = tmp_path / "large.bin"
+        large_file.write_bytes(content)
+        part_size = 1024 * 1024
+
+        with patch("data_utils.s3.s3.mmap.mmap", side_effect=OSError("mmap unsupported")), \
+                patch.object(s3_module, "MULTIPART_HASH_WORKERS", workers):
+            result = uploader._calculate_multipart_etag(str(large_file), part_size)
+
+        assert result == self._multipart_etag(content, part_size)
+
     def test_resolve_bucket_with_param(self, s3_uploader):
         """Тест разрешения имени бакета с явным параметром."""
         uploader, _ = s3_uploader
@@ -221,29 +683,130 @@ class TestS3Uploader:
         """Тест успешной загрузки файла."""
         uploader, mock_client = s3_uploader
         uploader.default_bucket = "dest-bucket"
+        bodies = []
+        mock_client.put_object.side_effect = lambda **kwargs: bodies.append(kwargs["Body"][:])
+
+        with patch("data_utils.s3.s3.create_transfer_manager") as mock_create, \
+                patch.object(s3_module, "xxhash", None):
+            uploader.upload_file(temp_file, "uploaded/path/file.txt")
+
+        expected_extra_args = {
+            **CHECKSUM_EXTRA_ARGS,
+            "Metadata": {"mtime": str(os.stat(temp_file).st_mtime_ns)},
+        }
+        # Файл меньше порога multipart отправляется одним put_object без TransferManager
+        mock_create.assert_not_called()
+        put_kwargs = mock_client.put_object.call_args.kwargs
+        assert put_kwargs["Bucket"] == "dest-bucket"
+        assert put_kwargs["Key"] == "uploaded/path/file.txt"
+        assert {k: put_kwargs[k] for k in expected_extra_args} == expected_extra_args
+        with open(temp_file, "rb") as f:
+            assert bodies == [f.read()]
+
+    def test_upload_file_multipart_uses_transfer_manager(self, s3_uploader, temp_file):
+        """Тест: файл не меньше порога multipart загружается через TransferManager."""
+        uploader, mock_client = s3_uploader
+        uploader.transfer_config = MagicMock(multipart_threshold=1)
+        manager = self._fake_transfer_manager()
 
-        uploader.upload_file(temp_file, "uploaded/path/file.txt")
+        with patch("data_utils.s3.s3.create_transfer_manager", return_value=manager) as mock_create:
+            uploader.upload_file(temp_file, "key", bucket_name="bucket")
 
-        mock_client.upload_file.assert_called_once_with(
-            temp_file, "dest-bucket", "uploaded/path/file.txt"
+        mock_create.assert_called_once_with(mock_client, uploader.transfer_config)
+        manager.upload.assert_called_once_with(
+            temp_file, "bucket", "key", extra_args=uploader._upload_extra_args(temp_file)
         )
+        manager.upload.return_value.result.assert_called_once()
+        mock_client.put_object.assert_not_called()
 
-    def test_upload_file_not_found(self, s3_uploader, capsys):
-        """Тест загрузки несуществующего файла."""
+    def test_upload_file_empty_uses_transfer_manager(self, s3_uploader, tmp_path):
+        """Тест: пустой файл, который нельзя отобразить в память, загружается через TransferManager."""
         uploader, mock_client = s3_uploader
+        empty = tmp_path / "empty.txt"
+        empty.touch()
+        manager = self._fake_transfer_manager()
 
-        uploader.upload_file("/path/does/not/exist.txt", "some/key")
+        with patch("data_utils.s3.s3.create_transfer_manager", return_value=manager):
+            uploader.upload_file(str(empty), "key", bucket_name="bucket")
 
-        mock_client.upload_file.assert_not_called()
-        captured = capsys.readouterr()
-        assert "Ошибка: файл /path/does/not/exist.txt не найден." in captured.out
+        assert manager.upload.call_count == 1
+        mock_client.put_object.assert_not_called()
+
+    def test_upload_file_client_error(self, s3_uploader, temp_file, caplog):
+        """Тест логирования ошибки S3 при загрузке файла."""
+        from botocore.exceptions import ClientError
+
+        uploader, mock_client = s3_uploader
+        mock_client.put_object.side_effect = ClientError(
+            {"Error": {"Code": "AccessDenied", "Message": "Access Denied"}}, "PutObject"
+        )
+
+        with caplog.at_level("ERROR", logger="data_utils.s3.s3"):
+            uploader.upload_file(temp_file, "key", bucket_name="bucket")
+
+        assert "Ошибка загрузки файла" in caplog.text
+
+    def test_transfer_manager_shared_between_uploads(self, s3_uploader, temp_file):
+        """Тест: TransferManager создается один раз и останавливается в close()."""
+        uploader, _ = s3_uploader
+        uploader.transfer_config = MagicMock(multipart_threshold=1)
+        manager = self._fake_transfer_manager()
+
+        with patch("data_utils.s3.s3.create_transfer_manager", return_value=manager) as mock_create:
+            uploader.upload_file(temp_file, "first", bucket_name="bucket")
+            uploader.upload_fileobj(io.BytesIO(b"x"), "second", bucket_name="bucket")
+            uploader.close()
+            uploader.close()
+
+        mock_create.assert_called_once()
+        assert manager.upload.call_count == 2
+        manager.shutdown.assert_called_once()
+        assert uploader._transfer_manager is None
+
+    def test_upload_extra_args_multipart_sha256(self, s3_uploader, temp_file):
+        """Тест записи SHA-256 в метаданные для файлов, загружаемых частями."""
+        uploader, _ = s3_uploader
+        uploader.transfer_config = MagicMock(multipart_threshold=1)
+        with open(temp_file, "rb") as f:
+            expected_sha256 = hashlib.sha256(f.read()).hexdigest()
+
+        with patch.object(s3_module, "xxhash", None):
+            extra_args = uploader._upload_extra_args(temp_file)
+
+        assert extra_args["ChecksumAlgorithm"] == "SHA256"
+        assert extra_args["Metadata"] == {
+            "mtime": str(os.stat(temp_file).st_mtime_ns),
+            "sha256": expected_sha256,
+        }
+
+    def test_upload_extra_args_skips_failed_hash(self, s3_uploader, temp_file):
+        """Тест: при ошибке хэширования контрольная сумма не попадает в метаданные."""
+        uploader, _ = s3_uploader
+        uploader.transfer_config = MagicMock(multipart_threshold=1)
+
+        with patch.object(uploader, "_calculate_local_file_hashes", return_value=None):
+            extra_args = uploader._upload_extra_args(temp_file)
+
+        assert extra_args["Metadata"] == {"mtime": str(os.stat(temp_file).st_mtime_ns)}
+
+    def test_upload_file_not_found(self, s3_uploader, caplog):
+        """Тест загрузки несуществующего файла."""
+        uploader, _ = s3_uploader
+
+        with patch("data_utils.s3.s3.create_transfer_manager") as mock_create, \
+                caplog.at_level("ERROR", logger="data_utils.s3.s3"):
+            uploader.upload_file("/path/does/not/exist.txt", "some/key")
+
+        mock_create.assert_not_called()
+        assert "Ошибка: файл /path/does/not/exist.txt не найден." in caplog.text
 
     def test_upload_file_skip_if_exists_true(self, s3_uploader, temp_file):
         """Тест пропуска загрузки, если файл не изменился."""
-        uploader, mock_client = s3_uploader
+        uploader, _ = s3_uploader
 
         # Настраиваем _files_are_equal на True
-        with patch.object(uploader, "_files_are_equal", return_value=True):
+        with patch.object(uploader, "_files_are_equal", return_value=True), \
+                patch("data_utils.s3.s3.create_transfer_manager") as mock_create:
             # Мокаем _get_s3_url для проверки сообщения
             with patch.object(
                 uploader, "_get_s3_url",
@@ -253,7 +816,110 @@ class TestS3Uploader:
                     temp_file, "key", bucket_name="bucket", skip_if_exists=True
                 )
 
-        mock_client.upload_file.assert_not_called()
+        mock_create.assert_not_called()
+
+    def test_upload_state_skips_head(self, s3_uploader, tmp_path):
+        """Тест: неизмененный с момента загрузки файл пропускается без head_object."""
+        uploader, mock_client = s3_uploader
+        state_path = tmp_path / "state.db"
+        local_path = tmp_path / "file.txt"
+        local_path.write_text("content")
+
+        with patch("data_utils.s3.s3.boto3.session.Session"):
+            stateful = S3Uploader("key", "secret", upload_state_path=str(state_path))
+        stateful.s3_client = mock_client
+        stateful.upload_file(str(local_path), "key", bucket_name="bucket")
+        stateful.upload_file(str(local_path), "key", bucket_name="bucket", skip_if_exists=True)
+        stateful.close()
+
+        assert mock_client.put_object.call_count == 1
+        mock_client.head_object.assert_not_called()
+
+        # Состояние сохраняется между экземплярами
+        with patch("data_utils.s3.s3.boto3.session.Session"):
+            reopened = S3Uploader("key", "secret", upload_state_path=str(state_path))
+        assert reopened._files_are_equal(str(local_path), "bucket", "key") is True
+        # Отсутствие объекта в листинге важнее записанного состояния
+        assert reopened._files_are_equal(str(local_path), "bucket", "key", s3_index={}) is False
+
+        # Изменение файла сбрасывает совпадение
+        os.utime(local_path, ns=(0, 0))
+        assert reopened._upload_state_matches("bucket", "key", str(local_path), os.stat(local_path)) is False
+        reopened.close()
+
+    def test_upload_state_forgotten_on_delete(self, s3_uploader, tmp_path):
+        """Тест: удаление объекта удаляет запись о загрузке."""
+        _, mock_client = s3_uploader
+        local_path = tmp_path / "file.txt"
+        local_path.write_text("content")
+        local_stat = os.stat(local_path)
+
+        with patch("data_utils.s3.s3.boto3.session.Session"):
+            stateful = S3Uploader("key", "secret", upload_state_path=str(tmp_path / "state.db"))
+        stateful.s3_client = mock_client
+        mock_client.delete_objects.return_value = {}
+        for key in ("a", "b"):
+            stateful._remember_upload("bucket", key, str(local_path), local_stat)
+
+        stateful.delete_file("a", bucket_name="bucket")
+        stateful.delete_files(["b"], bucket_name="bucket")
+
+        for key in ("a", "b"):
+            assert stateful._upload_state_matches("bucket", key, str(local_path), local_stat) is False
+        stateful.close()
+
+    def test_upload_fileobj_success(self, s3_uploader):
+        """Тест загрузки файлового объекта без записи на диск."""
+        uploader, _ = s3_uploader
+        uploader.default_bucket = "dest-bucket"
+        buffer = io.BytesIO(b"parquet bytes")
+        manager = self._fake_transfer_manager()
+
+        with patch("data_utils.s3.s3.create_transfer_manager", return_value=manager):
+            uploader.upload_fileobj(buffer, "data/file.parquet")
+
+        manager.upload.assert_called_once_with(
+            buffer, "dest-bucket", "data/file.parquet", extra_args=CHECKSUM_EXTRA_ARGS
+        )
+
+    def test_upload_fileobj_skip_if_exists_true(self, s3_uploader):
+        """Тест пропуска загрузки файлового объекта с тем же содержимым."""
+        uploader, mock_client = s3_uploader
+        content = b"parquet bytes"
+        buffer = io.BytesIO(content)
+
+        mock_client.head_object.return_value = {
+            "ContentLength": len(content),
+            "ETag": f'"{hashlib.md5(content).hexdigest()}"',
+            "LastModified": datetime.now(),
+        }
+
+        with patch("data_utils.s3.s3.create_transfer_manager") as mock_create:
+            uploader.upload_fileobj(buffer, "key", bucket_name="bucket",
+                                    skip_if_exists=True)
+
+        mock_create.assert_not_called()
+        assert buffer.tell() == 0
+
+    def test_upload_fileobj_skip_if_exists_changed(self, s3_uploader):
+        """Тест загрузки файлового объекта, если содержимое в S3 другое."""
+        uploader, mock_client = s3_uploader
+        content = b"parquet bytes"
+        buffer = io.BytesIO(content)
+
+        mock_client.head_object.return_value = {
+            "ContentLength": len(content),
+            "ETag": '"differentetag"',
+            "LastModified": datetime.now(),
+        }
+
+        manager = self._fake_transfer_manager()
+        with patch("data_utils.s3.s3.create_transfer_manager", return_value=manager):
+            uploader.upload_fileobj(buffer, "key", bucket_name="bucket",
+                                    skip_if_exists=True)
+
+        manager.upload.assert_called_once_with(buffer, "bucket", "key", extra_args=CHECKSUM_EXTRA_ARGS)
+        assert buffer.tell() == 0
 
     def test_upload_directory_success(self, s3_uploader):
         """Тест успешной загрузки директории."""
@@ -270,30 +936,268 @@ class TestS3Uploader:
             with open(file2_path, "w") as f2:
                 f2.write("Content of file 2")
 
-            with patch.object(uploader, "_upload_file_with_status") as mock_upload_status:
-                mock_upload_status.return_value = 'uploaded'
-
+            manager = self._fake_transfer_manager()
+            with patch("data_utils.s3.s3.create_transfer_manager", return_value=manager) as mock_create:
                 result_stats = uploader.upload_directory(
                     temp_dir, s3_prefix="uploads/", skip_if_exists=True
                 )
 
-            assert mock_upload_status.call_count == 2
+            # Все файлы ставятся в очередь одного TransferManager на клиенте без проверки параметров
+            [(directory_client, transfer_config)] = [c.args for c in mock_create.call_args_list]
+            assert directory_client is uploader.session.client.return_value
+            assert transfer_config is uploader.transfer_config
+            # Публичный s3_client создан в конструкторе с исходной конфигурацией
+            public_call, directory_call = uploader.session.client.call_args_list
+            assert public_call.kwargs['config'] is uploader._client_config
+            assert directory_call.kwargs['config'].parameter_validation is False
+            assert manager.upload.call_count == 2
+            manager.upload.assert_has_calls([
+                call(file1_path, 'my-bucket', 'uploads/file1.txt',
+                     extra_args=uploader._upload_extra_args(file1_path)),
+                call(file2_path, 'my-bucket', 'uploads/subdir/file2.txt',
+                     extra_args=uploader._upload_extra_args(file2_path)),
+            ], any_order=True)
 
-            # Получаем список всех вызовов
-            calls_made = mock_upload_status.call_args_list
+            assert result_stats == {'uploaded': 2, 'skipped': 0, 'errors': 0}
 
-            # expected_call_1 = call(file1_path, 'uploads/file1.txt', 'my-bucket', True)
-            # expected_call_2 = call(file2_path, 'uploads/subdir/file2.txt', 'my-bucket', True)
+    @staticmethod
+    def _fake_transfer_manager(failing_keys=()):
+        """Мок TransferManager: upload возвращает future, падающий для failing_keys."""
+        future = MagicMock()
+        failing_future = MagicMock()
+        failing_future.result.side_effect = Exception("upload failed")
+
+        manager = MagicMock()
+        manager.upload.return_value = future
+        manager.upload.side_effect = lambda fileobj, bucket, key, extra_args=None: (
+            failing_future if key in failing_keys else future
+        )
+        return manager
+
+    @pytest.mark.parametrize("s3_prefix, key_prefix", [("", ""), ("p", "p/"), ("p/", "p/")])
+    def test_iter_directory_files(self, tmp_path, s3_prefix, key_prefix):
+        """Тест построения ключей S3 для вложенных файлов директории."""
+        (tmp_path / "sub" / "deep").mkdir(parents=True)
+        (tmp_path / "root.txt").write_text("r")
+        (tmp_path / "sub" / "deep" / "leaf.txt").write_text("l")
+        (tmp_path / "link").symlink_to(tmp_path / "sub", target_is_directory=True)
+
+        result = list(S3Uploader._iter_directory_files(str(tmp_path) + os.sep, s3_prefix))
+
+        assert sorted((path, key) for path, key, _ in result) == [
+            (os.path.join(str(tmp_path), "root.txt"), f"{key_prefix}root.txt"),
+            (os.path.join(str(tmp_path), "sub", "deep", "leaf.txt"), f"{key_prefix}sub/deep/leaf.txt"),
+        ]
+        # stat из обхода совпадает с os.stat файла
+        for path, _, local_stat in result:
+            assert local_stat.st_size == os.stat(path).st_size
+            assert local_stat.st_mtime_ns == os.stat(path).st_mtime_ns
+
+    def test_upload_directory_counts_statuses(self, s3_uploader, tmp_path):
+        """Тест подсчета статусов параллельной загрузки директории."""
+        uploader, _ = s3_uploader
+        for name in ("a.txt", "b.txt", "c.txt"):
+            (tmp_path / name).write_text(name)
+        manager = self._fake_transfer_manager(failing_keys={'c.txt'})
+
+        with patch("data_utils.s3.s3.create_transfer_manager", return_value=manager), \
+                patch.object(uploader, "_index_prefix", return_value={}), \
+                patch.object(uploader, "_files_are_equal",
+                             side_effect=lambda path, bucket, key, s3_index, local_stat: key == 'b.txt'):
+            result_stats = uploader.upload_directory(str(tmp_path), bucket_name="bucket",
+                                                     skip_if_exists=True, max_workers=2)
+
+        assert result_stats == {'uploaded': 1, 'skipped': 1, 'errors': 1}
+        assert {c.args[2] for c in manager.upload.call_args_list} == {'a.txt', 'c.txt'}
+
+    def test_upload_directory_uploads_during_checks(self, s3_uploader, tmp_path):
+        """Тест: измененный файл уходит в загрузку, не дожидаясь проверки остальных."""
+        uploader, _ = s3_uploader
+        files = []
+        for name in ("first.txt", "last.txt"):
+            (tmp_path / name).write_text(name)
+            files.append((str(tmp_path / name), name, None))
+        first_queued = threading.Event()
+        manager = self._fake_transfer_manager()
+        manager.upload.side_effect = lambda *args, **kwargs: first_queued.set() or MagicMock()
+
+        def files_are_equal(path, bucket, key, s3_index, local_stat):
+            # Проверка последнего файла завершается, только когда первый уже в очереди
+            return key == 'last.txt' and first_queued.wait(timeout=5)
+
+        with patch("data_utils.s3.s3.create_transfer_manager", return_value=manager), \
+                patch.object(uploader, "_iter_directory_files", return_value=iter(files)), \
+                patch.object(uploader, "_index_prefix", return_value={}), \
+                patch.object(uploader, "_files_are_equal", side_effect=files_are_equal):
+            result_stats = uploader.upload_directory(str(tmp_path), bucket_name="bucket",
+                                                     skip_if_exists=True, max_workers=2)
+
+        assert result_stats == {'uploaded': 1, 'skipped': 1, 'errors': 0}
+
+    def test_upload_directory_uploads_in_completion_order(self, s3_uploader, tmp_path):
+        """Тест: файл, проверка которого завершилась раньше, загружается первым."""
+        uploader, _ = s3_uploader
+        files = []
+        for name in ("slow.txt", "fast.txt"):
+            (tmp_path / name).write_text(name)
+            files.append((str(tmp_path / name), name, None))
+        fast_queued = threading.Event()
+        queued = []
+        manager = self._fake_transfer_manager()
+        manager.upload.side_effect = lambda fileobj, bucket, key, extra_args=None: (
+            queued.append(key) or fast_queued.set() or MagicMock()
+        )
 
-            call_1_args, call_1_kwargs = calls_made[0]
-            assert call_1_args == (file1_path, 'uploads/file1.txt', 'my-bucket', True)
-            assert call_1_kwargs == {}
+        def files_are_equal(path, bucket, key, s3_index, local_stat):
+            # Проверка первого по обходу файла завершается, только когда второй уже в очереди
+            if key == 'slow.txt':
+                assert fast_queued.wait(timeout=5)
+            return False
 
-            call_2_args, call_2_kwargs = calls_made[1]
-            assert call_2_args == (file2_path, 'uploads/subdir/file2.txt', 'my-bucket', True)
-            assert call_2_kwargs == {}
+        with patch("data_utils.s3.s3.create_transfer_manager", return_value=manager), \
+                patch.object(uploader, "_iter_directory_files", return_value=iter(files)), \
+                patch.object(uploader, "_index_prefix", return_value={}), \
+                patch.object(uploader, "_files_are_equal", side_effect=files_are_equal):
+            result_stats = uploader.upload_directory(str(tmp_path), bucket_name="bucket",
+                                                     skip_if_exists=True, max_workers=2)
 
-            assert result_stats == {'uploaded': 2, 'skipped': 0, 'errors': 0}
+        assert result_stats == {'uploaded': 2, 'skipped': 0, 'errors': 0}
+        assert queued == ['fast.txt', 'slow.txt']
+
+    def test_upload_directory_prepares_in_workers(self, s3_uploader, tmp_path):
+        """Тест: метаданные и постановка в очередь загрузки выполняются в потоках пула."""
+        uploader, _ = s3_uploader
+        (tmp_path / "a.txt").write_text("a")
+        threads = []
+        manager = self._fake_transfer_manager()
+
+        def upload_extra_args(local_file_path, local_stat=None):
+            threads.append(threading.current_thread())
+            return {}
+
+        with patch("data_utils.s3.s3.create_transfer_manager", return_value=manager), \
+                patch.object(uploader, "_upload_extra_args", side_effect=upload_extra_args):
+            result_stats = uploader.upload_directory(str(tmp_path), bucket_name="bucket")
+
+        assert result_stats == {'uploaded': 1, 'skipped': 0, 'errors': 0}
+        assert threads and threading.main_thread() not in threads
+
+    def test_upload_directory_skip_uses_prefix_index(self, s3_uploader, tmp_path):
+        """Тест: при skip_if_exists состояние S3 берется из одного листинга, без head_object."""
+        uploader, mock_client = s3_uploader
+        same = tmp_path / "same.txt"
+        same.write_text("same content")
+        changed = tmp_path / "changed.txt"
+        changed.write_text("new content")
+        new = tmp_path / "new.txt"
+        new.write_text("brand new")
+
+        mock_client.get_paginator.return_value.paginate.return_value = [{'Contents': [
+            {'Key': 'p/same.txt', 'Size': same.stat().st_size,
+             'ETag': f'"{hashlib.md5(b"same content").hexdigest()}"',
+             'LastModified': datetime(2000, 1, 1)},
+            {'Key': 'p/changed.txt', 'Size': changed.stat().st_size,
+             'ETag': '"0123456789abcdef"', 'LastModified': datetime(2000, 1, 1)},
+        ]}]
+
+        manager = self._fake_transfer_manager()
+        with patch("data_utils.s3.s3.create_transfer_manager", return_value=manager):
+            result_stats = uploader.upload_directory(str(tmp_path), s3_prefix="p/",
+                                                     bucket_name="bucket", skip_if_exists=True)
+
+        assert result_stats == {'uploaded': 2, 'skipped': 1, 'errors': 0}
+        mock_client.get_paginator.assert_called_once_with('list_objects_v2')
+        mock_client.get_paginator.return_value.paginate.assert_called_once_with(Bucket="bucket", Prefix="p/")
+        mock_client.head_object.assert_not_called()
+        uploaded_keys = {c.args[2] for c in manager.upload.call_args_list}
+        assert uploaded_keys == {'p/changed.txt', 'p/new.txt'}
+
+    @staticmethod
+    def _fake_aioboto3(async_client, pages):
+        """Мок модуля aioboto3 с асинхронным клиентом и постраничным листингом."""
+        async def paginate(**kwargs):
+            for page in pages:
+                yield page
+
+        async_client.get_paginator = MagicMock()
+        async_client.get_paginator.return_value.paginate = paginate
+
+        client_cm = MagicMock()
+        client_cm.__aenter__ = AsyncMock(return_value=async_client)
+        client_cm.__aexit__ = AsyncMock(return_value=None)
+
+        fake_module = MagicMock()
+        fake_module.Session.return_value.client.return_value = client_cm
+        return fake_module
+
+    def test_upload_directory_async(self, s3_uploader, tmp_path):
+        """Тест асинхронной загрузки директории через один клиент aioboto3."""
+        uploader, mock_client = s3_uploader
+        (tmp_path / "a.txt").write_text("a")
+        (tmp_path / "b.txt").write_text("b")
+        async_client = MagicMock()
+        async_client.upload_file = AsyncMock()
+        fake_aioboto3 = self._fake_aioboto3(async_client, [])
+
+        with patch.object(async_s3_module, "aioboto3", fake_aioboto3), \
+                patch.object(async_s3_module, "AioConfig", MagicMock()):
+            result_stats = uploader.upload_directory(str(tmp_path), s3_prefix="p/",
+                                                     bucket_name="bucket", use_async=True)
+
+        assert result_stats == {'uploaded': 2, 'skipped': 0, 'errors': 0}
+        fake_aioboto3.Session.return_value.client.assert_called_once()
+        async_client.upload_file.assert_has_calls([
+            call(str(tmp_path / name), "bucket", f"p/{name}",
+                 ExtraArgs=uploader._upload_extra_args(str(tmp_path / name)))
+            for name in ("a.txt", "b.txt")
+        ], any_order=True)
+        mock_client.upload_file.assert_not_called()
+
+    def test_upload_directory_async_skip_if_exists(self, s3_uploader, tmp_path):
+        """Тест асинхронной загрузки с пропуском файлов, совпадающих с листингом."""
+        uploader, _ = s3_uploader
+        (tmp_path / "same.txt").write_text("same")
+        (tmp_path / "new.txt").write_text("new")
+        pages = [{'Contents': [{'Key': 'same.txt', 'Size': 4,
+                                'ETag': f'"{hashlib.md5(b"same").hexdigest()}"',
+                                'LastModified': datetime(2000, 1, 1)}]}]
+        async_client = MagicMock()
+        async_client.upload_file = AsyncMock(side_effect=[None])
+
+        with patch.object(async_s3_module, "aioboto3", self._fake_aioboto3(async_client, pages)), \
+                patch.object(async_s3_module, "AioConfig", MagicMock()):
+            result_stats = asyncio.run(uploader.upload_directory_async(
+                str(tmp_path), bucket_name="bucket", skip_if_exists=True
+            ))
+
+        assert result_stats == {'uploaded': 1, 'skipped': 1, 'errors': 0}
+        assert async_client.upload_file.call_args.args[2] == "new.txt"
+
+    def test_upload_directory_async_logs_errors(self, s3_uploader, tmp_path, caplog):
+        """Тест: ошибка асинхронной загрузки учитывается и пишется в лог."""
+        from botocore.exceptions import ClientError
+
+        uploader, _ = s3_uploader
+        (tmp_path / "a.txt").write_text("a")
+        async_client = MagicMock()
+        async_client.upload_file = AsyncMock(side_effect=ClientError(
+            {'Error': {'Code': 'AccessDenied', 'Message': 'Access Denied'}}, 'PutObject'
+        ))
+
+        with patch.object(async_s3_module, "aioboto3", self._fake_aioboto3(async_client, [])), \
+                patch.object(async_s3_module, "AioConfig", MagicMock()):
+            result_stats = asyncio.run(uploader.upload_directory_async(str(tmp_path), bucket_name="bucket"))
+
+        assert result_stats == {'uploaded': 0, 'skipped': 0, 'errors': 1}
+        assert "AccessDenied" in caplog.text
+
+    def test_upload_directory_async_requires_aioboto3(self, s3_uploader, tmp_path):
+        """Тест ошибки при отсутствии пакета aioboto3."""
+        uploader, _ = s3_uploader
+
+        with patch.object(async_s3_module, "aioboto3", None):
+            with pytest.raises(ImportError, match="aioboto3"):
+                asyncio.run(uploader.upload_directory_async(str(tmp_path), bucket_name="bucket"))
 
     def test_download_file_success(self, s3_uploader):
         """Тест успешного скачивания файла."""
@@ -306,7 +1210,8 @@ class TestS3Uploader:
             uploader.download_file("source/key/file.txt", local_path)
 
             mock_client.download_file.assert_called_once_with(
-                "source-bucket", "source/key/file.txt", local_path
+                "source-bucket", "source/key/file.txt", local_path,
+                Config=DEFAULT_DOWNLOAD_CONFIG
             )
             # Проверяем, что директория создана (os.makedirs)
             assert os.path.exists(temp_dir)
@@ -316,21 +1221,51 @@ class TestS3Uploader:
         uploader, mock_client = s3_uploader
         uploader.default_bucket = "list-bucket"
 
-        mock_client.list_objects_v2.return_value = {
-            "Contents": [
-                {"Key": "file1.txt"},
-                {"Key": "folder/file2.txt"},
-                {"Key": "file3.log"},
-            ]
-        }
+        mock_client.get_paginator.return_value.paginate.return_value = [
+            {"Contents": [{"Key": "file1.txt"}, {"Key": "folder/file2.txt"}]},
+            {"Contents": [{"Key": "file3.log"}]},
+            {},
+        ]
 
         files = uploader.list_files(prefix="folder/")
 
-        mock_client.list_objects_v2.assert_called_once_with(
+        mock_client.get_paginator.assert_called_once_with("list_objects_v2")
+        mock_client.get_paginator.return_value.paginate.assert_called_once_with(
             Bucket="list-bucket", Prefix="folder/"
         )
         assert files == ["file1.txt", "folder/file2.txt", "file3.log"]
 
+    def test_list_files_error(self, s3_uploader, caplog):
+        """Тест: ошибка листинга логируется, возвращается пустой список."""
+        from botocore.exceptions import ClientError
+
+        uploader, mock_client = s3_uploader
+        mock_client.get_paginator.return_value.paginate.side_effect = ClientError(
+            {"Error": {"Code": "AccessDenied", "Message": "Access Denied"}}, "ListObjectsV2"
+        )
+
+        with caplog.at_level("ERROR", logger="data_utils.s3.s3"):
+            assert uploader.list_files(bucket_name="bucket") == []
+        assert "Ошибка получения списка файлов" in caplog.text
+
+    def test_iter_keys_lazy(self, s3_uploader):
+        """Тест: следующая страница запрашивается только по мере потребления ключей."""
+        uploader, mock_client = s3_uploader
+        fetched = []
+
+        def paginate(**kwargs):
+            for number, keys in enumerate((["a", "b"], ["c"])):
+                fetched.append(number)
+                yield {"Contents": [{"Key": key} for key in keys]}
+
+        mock_client.get_paginator.return_value.paginate.side_effect = paginate
+
+        keys = uploader.iter_keys("p/", bucket_name="bucket")
+        assert next(keys) == "a"
+        assert fetched == [0]
+        assert list(keys) == ["b", "c"]
+        assert fetched == [0, 1]
+
     def test_delete_file_success(self, s3_uploader):
         """Тест успешного удаления файла."""
         uploader, mock_client = s3_uploader
@@ -342,10 +1277,69 @@ class TestS3Uploader:
             Bucket="delete-bucket", Key="to/delete/key.txt"
         )
 
-    def test_create_bucket_success(self, s3_uploader):
+    def test_delete_files_batches(self, s3_uploader):
+        """Тест удаления набора файлов пакетами delete_objects."""
+        from botocore.exceptions import ClientError
+
+        uploader, mock_client = s3_uploader
+        keys = [f"k{i}" for i in range(2500)]
+        mock_client.delete_objects.side_effect = [
+            {"Errors": [{"Key": "k5", "Message": "Access Denied"}]},
+            {},
+            ClientError({"Error": {"Code": "InternalError", "Message": "boom"}}, "DeleteObjects"),
+        ]
+
+        stats = uploader.delete_files(iter(keys), bucket_name="bucket")
+
+        assert stats == {"deleted": 1999, "errors": 501}
+        batches = [c.kwargs["Delete"] for c in mock_client.delete_objects.call_args_list]
+        assert [len(batch["Objects"]) for batch in batches] == [1000, 1000, 500]
+        assert batches[0]["Objects"][0] == {"Key": "k0"}
+        assert all(batch["Quiet"] for batch in batches)
+
+    def test_delete_files_empty(self, s3_uploader):
+        """Тест: пустой набор ключей не отправляет запросов."""
+        uploader, mock_client = s3_uploader
+
+        assert uploader.delete_files([], bucket_name="bucket") == {"deleted": 0, "errors": 0}
+        mock_client.delete_objects.assert_not_called()
+
+    def test_delete_all_files_in_directory_paginates(self, s3_uploader):
+        """Тест: удаляются ключи со всех страниц листинга, а не только с первой."""
+        uploader, mock_client = s3_uploader
+        mock_client.get_paginator.return_value.paginate.return_value = [
+            {"Contents": [{"Key": f"dir/k{i}"} for i in range(1000)]},
+            {"Contents": [{"Key": "dir/last"}]},
+        ]
+        mock_client.delete_objects.return_value = {}
+
+        stats = uploader.delete_all_files_in_directory("dir/", bucket_name="bucket", confirm=True)
+
+        assert stats == {"deleted": 1001, "errors": 0}
+        mock_client.get_paginator.return_value.paginate.assert_called_once_with(Bucket="bucket", Prefix="dir/")
+        mock_client.list_objects_v2.assert_not_called()
+        batches = [c.kwargs["Delete"]["Objects"] for c in mock_client.delete_objects.call_args_list]
+        assert [len(batch) for batch in batches] == [1000, 1]
+
+    def test_delete_all_files_in_directory_list_error(self, s3_uploader):
+        """Тест: ошибка листинга дает одну ошибку в статистике."""
+        from botocore.exceptions import ClientError
+
+        uploader, mock_client = s3_uploader
+        mock_client.get_paginator.return_value.paginate.side_effect = ClientError(
+            {"Error": {"Code": "AccessDenied", "Message": "Access Denied"}}, "ListObjectsV2"
+        )
+
+        stats = uploader.delete_all_files_in_directory("dir/", bucket_name="bucket", confirm=True)
+
+        assert stats == {"deleted": 0, "errors": 1}
+        mock_client.delete_objects.assert_not_called()
+
+    def test_create_bucket_success(self, s3_uploader, client_exceptions, caplog):
         """Тест успешного создания бакета."""
         uploader, mock_client = s3_uploader
         uploader.default_bucket = "new-bucket"
+        mock_client.exceptions = client_exceptions
 
         # Сначала проверим случай, когда бакет
         # уже существует (BucketAlreadyOwnedByYou)
@@ -355,13 +1349,52 @@ class TestS3Uploader:
             "Error": {"Code": "BucketAlreadyOwnedByYou",
                       "Message": "Already owned"}
         }
-        mock_client.create_bucket.side_effect = ClientError(
+        mock_client.head_bucket.side_effect = ClientError(
+            {"Error": {"Code": "404", "Message": "Not Found"}}, "HeadBucket"
+        )
+        mock_client.create_bucket.side_effect = client_exceptions.BucketAlreadyOwnedByYou(
             error_response_owned, "CreateBucket"
         )
 
-        uploader.create_bucket()
+        with caplog.at_level("INFO", logger="data_utils.s3.s3"):
+            uploader.create_bucket()
 
         mock_client.create_bucket.assert_called_once_with(Bucket="new-bucket")
+        assert "уже принадлежит вам" in caplog.text
+
+    def test_create_bucket_other_error(self, s3_uploader, client_exceptions, caplog):
+        """Тест логирования ошибки создания бакета, не связанной с его существованием."""
+        from botocore.exceptions import ClientError
+
+        uploader, mock_client = s3_uploader
+        mock_client.exceptions = client_exceptions
+        mock_client.head_bucket.side_effect = ClientError(
+            {"Error": {"Code": "404", "Message": "Not Found"}}, "HeadBucket"
+        )
+        mock_client.create_bucket.side_effect = ClientError(
+            {"Error": {"Code": "AccessDenied", "Message": "Access Denied"}}, "CreateBucket"
+        )
+
+        with caplog.at_level("ERROR", logger="data_utils.s3.s3"):
+            uploader.create_bucket("bucket")
+
+        assert "Ошибка создания бакета" in caplog.text
+
+    @pytest.mark.parametrize("head_error", [None, "403"])
+    def test_create_bucket_existing_skips_create(self, s3_uploader, head_error):
+        """Тест: существующий бакет определяется head_bucket без вызова CreateBucket."""
+        uploader, mock_client = s3_uploader
+        from botocore.exceptions import ClientError
+
+        if head_error:
+            mock_client.head_bucket.side_effect = ClientError(
+                {"Error": {"Code": head_error, "Message": "Forbidden"}}, "HeadBucket"
+            )
+
+        uploader.create_bucket("existing-bucket")
+
+        mock_client.head_bucket.assert_called_once_with(Bucket="existing-bucket")
+        mock_client.create_bucket.assert_not_called()
 
     def test_list_buckets_success(self, s3_uploader):
         """Тест успешного получения списка бакетов."""